@@ -1,7 +1,9 @@
 """
 数据库模块初始化
 """
-from .database import get_db, init_db, close_db
-from .scheduler import start_scheduler, stop_scheduler
+from .database import get_db, init_db, close_db, db_connection, get_pool_stats
+from .writer import db_writer
+from .async_db import async_db
+from .scheduler import start_scheduler, stop_scheduler, register_warmer, next_run_time
 
-__all__ = ['get_db', 'init_db', 'close_db', 'start_scheduler', 'stop_scheduler']
+__all__ = ['get_db', 'init_db', 'close_db', 'db_connection', 'get_pool_stats', 'db_writer', 'async_db', 'start_scheduler', 'stop_scheduler', 'register_warmer', 'next_run_time']
@@ -0,0 +1,132 @@
+"""
+异步数据库访问层
+为 FastAPI 异步端点提供可等待的查询接口，查询在专用读线程池中执行，不阻塞事件循环；
+写操作交给单写线程，直接等待其 Future，不占用任何线程
+"""
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+import logging
+
+from .database import get_db, _swap_table_rows
+from .writer import db_writer
+
+logger = logging.getLogger(__name__)
+
+
+# 读线程数量（可通过环境变量 DB_READER_THREADS 覆盖）
+DEFAULT_READER_THREADS = 4
+
+
+def _reader_threads() -> int:
+    """读取读线程数量配置"""
+    env_value = os.getenv('DB_READER_THREADS')
+    if env_value:
+        try:
+            return max(1, int(env_value))
+        except ValueError:
+            logger.warning(f"[异步数据库] 无效的读线程数配置: {env_value}，使用默认值")
+    return DEFAULT_READER_THREADS
+
+
+def _fetch_all(query: str, params: tuple) -> List[Dict[str, Any]]:
+    cursor = get_db().cursor()
+    cursor.execute(query, params)
+    return [dict(row) for row in cursor.fetchall()]
+
+
+def _fetch_one(query: str, params: tuple) -> Optional[Dict[str, Any]]:
+    cursor = get_db().cursor()
+    cursor.execute(query, params)
+    row = cursor.fetchone()
+    return dict(row) if row is not None else None
+
+
+class AsyncDatabase:
+    """
+    异步数据库门面
+
+    每个读线程持有自己的 SQLite 连接（WAL 模式下多个读连接可并发执行），
+    慢查询只占用一个读线程，不会阻塞事件循环和其他端点
+    """
+
+    def __init__(self, max_readers: Optional[int] = None):
+        self.max_readers = max_readers or _reader_threads()
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.max_readers,
+            thread_name_prefix='db-reader'
+        )
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        在读线程中执行任意同步数据库函数
+
+        Args:
+            func: 同步函数，内部可通过 get_db() 获取当前读线程的连接
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, lambda: func(*args, **kwargs))
+
+    async def fetch_all(self, query: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        """
+        执行查询并返回全部结果
+
+        Returns:
+            字典列表
+        """
+        return await self.run(_fetch_all, query, tuple(params))
+
+    async def fetch_one(self, query: str, params: tuple = ()) -> Optional[Dict[str, Any]]:
+        """
+        执行查询并返回第一行
+
+        Returns:
+            字典，无结果时返回 None
+        """
+        return await self.run(_fetch_one, query, tuple(params))
+
+    async def execute(self, query: str, params: tuple = ()) -> int:
+        """
+        执行单条写语句（经由单写线程）
+
+        Returns:
+            影响的行数
+        """
+        return await asyncio.wrap_future(db_writer.submit_write(query, params))
+
+    async def execute_many(self, query: str, params_list: list) -> int:
+        """
+        批量执行写语句（经由单写线程）
+
+        Returns:
+            影响的行数
+        """
+        return await asyncio.wrap_future(db_writer.submit_many(query, params_list))
+
+    async def transaction(self, fn: Callable) -> Any:
+        """
+        在单写线程的一个事务中执行 fn(conn)，fn 内不要 commit/rollback
+
+        Returns:
+            fn 的返回值
+        """
+        return await asyncio.wrap_future(db_writer.submit_transaction(fn))
+
+    async def replace_table_rows(self, table: str, columns: List[str], records: list) -> int:
+        """
+        影子表方式整体替换表内容（见 database.replace_table_rows）
+
+        Returns:
+            写入的行数
+        """
+        return await self.transaction(lambda conn: _swap_table_rows(conn, table, columns, records))
+
+    def shutdown(self, wait: bool = False):
+        """关闭读线程池"""
+        self.executor.shutdown(wait=wait, cancel_futures=True)
+        logger.info("[异步数据库] 读线程池已关闭")
+
+
+# 全局异步数据库实例
+async_db = AsyncDatabase()
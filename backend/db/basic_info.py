@@ -0,0 +1,169 @@
+"""
+基金基本信息缓存
+合并东方财富基金概况（fund_overview_em）和雪球基本信息（fund_individual_basic_info_xq），保存到 fund_basic_info_cache
+
+- 基金详情、基金对比等页面直接读取缓存（过期的条目同样返回），只有从未缓存的基金才同步请求上游
+- 过期条目由定时任务按更新时间从旧到新、限速逐个刷新，避免集中请求上游；
+  刷新失败的条目记录尝试时间后排到队尾，不会反复占用每批的名额
+"""
+import time
+import logging
+from typing import Any, Dict, Optional
+
+import akshare as ak
+import pandas as pd
+
+from .cache_helper import CacheHelper
+
+logger = logging.getLogger(__name__)
+
+# 定时任务每次最多刷新的基金数
+BASIC_INFO_REFRESH_BATCH = 30
+
+# 定时任务中两次刷新之间的间隔（秒）
+BASIC_INFO_REFRESH_INTERVAL_SECONDS = 1.0
+
+# 雪球基本信息项 -> 缓存列
+_XQ_COLUMNS = {
+    '基金名称': '基金简称',
+    '基金全称': '基金全称',
+    '基金类型': '基金类型',
+    '基金公司': '基金公司',
+    '基金经理': '基金经理',
+    '成立时间': '成立日期',
+    '最新规模': '最新规模',
+    '托管银行': '托管银行',
+    '业绩比较基准': '业绩比较基准',
+    '投资目标': '投资目标',
+    '投资策略': '投资策略',
+}
+
+# 东方财富基金概况列 -> 缓存列
+_EM_COLUMNS = {
+    '基金简称': '基金简称',
+    '基金全称': '基金全称',
+    '基金类型': '基金类型',
+    '基金管理人': '基金公司',
+    '基金经理人': '基金经理',
+    '成立日期/规模': '成立日期',
+    '资产规模': '最新规模',
+    '基金托管人': '托管银行',
+    '业绩比较基准': '业绩比较基准',
+    '管理费率': '管理费率',
+    '托管费率': '托管费率',
+    '销售服务费率': '销售服务费率',
+    '最高申购费率': '最高申购费率',
+    '最高赎回费率': '最高赎回费率',
+    '跟踪标的': '跟踪标的',
+}
+
+# 以东方财富为准的列（其余列以雪球为准，缺失时互相补充）
+_EM_PREFERRED = ('基金全称', '管理费率', '托管费率', '销售服务费率', '最高申购费率', '最高赎回费率', '跟踪标的')
+
+
+def _clean(value: Any) -> Optional[str]:
+    """上游返回值转为文本，空值、'--' 返回 None"""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    text = str(value).strip()
+    return text if text and text != '--' else None
+
+
+def _fetch_xq(fund_code: str) -> Dict[str, Optional[str]]:
+    """雪球基本信息（item/value 两列）转为缓存列字典"""
+    df = ak.fund_individual_basic_info_xq(symbol=fund_code)
+    if df is None or df.empty:
+        return {}
+    items = dict(zip(df['item'].astype(str), df['value']))
+    return {column: _clean(items.get(item)) for item, column in _XQ_COLUMNS.items()}
+
+
+def _fetch_em(fund_code: str) -> Dict[str, Optional[str]]:
+    """东方财富基金概况（单行）转为缓存列字典"""
+    df = ak.fund_overview_em(symbol=fund_code)
+    if df is None or df.empty:
+        return {}
+    row = df.iloc[0].to_dict()
+    return {column: _clean(row.get(source)) for source, column in _EM_COLUMNS.items()}
+
+
+def merge_basic_info(fund_code: str, xq: Dict[str, Optional[str]], em: Dict[str, Optional[str]]) -> Dict[str, Any]:
+    """
+    合并两个数据源的基本信息
+
+    Args:
+        fund_code: 基金代码
+        xq: 雪球基本信息（_fetch_xq 的返回值）
+        em: 东方财富基金概况（_fetch_em 的返回值）
+
+    Returns:
+        以 CacheHelper.BASIC_INFO_COLUMNS 为键的字典
+    """
+    data: Dict[str, Any] = {'基金代码': fund_code}
+    for column in CacheHelper.BASIC_INFO_COLUMNS[1:]:
+        first, second = (em, xq) if column in _EM_PREFERRED else (xq, em)
+        data[column] = first.get(column) or second.get(column)
+    # 东方财富的成立日期列为 "2001年09月21日 / 32.11亿份"，只保留日期部分
+    if data['成立日期'] and not xq.get('成立日期'):
+        data['成立日期'] = data['成立日期'].split('/')[0].strip()
+    return data
+
+
+def sync_fund_basic_info(fund_code: str) -> Optional[Dict[str, Any]]:
+    """
+    从两个数据源获取基金基本信息并保存（在上游线程池或调度器线程中执行）
+
+    任一数据源失败时使用另一个数据源的结果；两个都失败时抛出最后一个异常
+
+    Returns:
+        合并后的基本信息，两个数据源都没有数据时返回 None
+    """
+    results = {}
+    error = None
+    for name, fetch in (('xq', _fetch_xq), ('em', _fetch_em)):
+        try:
+            results[name] = fetch(fund_code)
+        except Exception as e:
+            logger.warning(f"[基本信息] {fund_code} 获取{name}数据失败: {e}")
+            results[name] = {}
+            error = e
+
+    if not results['xq'] and not results['em']:
+        if error is not None:
+            raise error
+        return None
+
+    data = merge_basic_info(fund_code, results['xq'], results['em'])
+    CacheHelper.set_fund_basic_info(data)
+    logger.info(f"[基本信息] {fund_code} 同步完成")
+    return data
+
+
+def refresh_stale_basic_info(limit: int = BASIC_INFO_REFRESH_BATCH,
+                             interval: float = BASIC_INFO_REFRESH_INTERVAL_SECONDS) -> int:
+    """
+    限速刷新过期的基金基本信息（按最后一次尝试从旧到新，供定时任务调用）
+
+    Args:
+        limit: 本次最多刷新的基金数
+        interval: 两次刷新之间的间隔（秒）
+
+    Returns:
+        刷新成功的基金数
+    """
+    codes = CacheHelper.get_stale_fund_basic_info_codes(limit)
+    refreshed = 0
+    for i, fund_code in enumerate(codes):
+        if i and interval > 0:
+            time.sleep(interval)
+        try:
+            if sync_fund_basic_info(fund_code) is not None:
+                refreshed += 1
+                continue
+            logger.warning(f"[基本信息] {fund_code} 两个数据源都没有数据")
+        except Exception as e:
+            logger.warning(f"[基本信息] {fund_code} 刷新失败: {e}")
+        CacheHelper.mark_fund_basic_info_attempt(fund_code)
+    if codes:
+        logger.info(f"[基本信息] 过期条目刷新完成: {refreshed}/{len(codes)}")
+    return refreshed
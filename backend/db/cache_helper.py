@@ -2,9 +2,15 @@
 缓存助手模块 - 实现智能缓存读写逻辑
 """
 import json
-from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Any
-from .database import get_db, execute_query, execute_update
+import threading
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Tuple, Union
+
+import pandas as pd
+
+from .database import execute_query, execute_update, execute_transaction
+from .frame_codec import encode_frame, decode_frame
+from .early_expiry import jittered_ttl, should_refresh_early
 
 
 class CacheHelper:
@@ -12,32 +18,88 @@ class CacheHelper:
 
     # 缓存TTL配置 (分钟)
     TTL_CONFIG = {
-        'fund_basic_info': 30,      # 基金基本信息: 30分钟
-        'fund_daily_nav': 5,         # 实时净值: 5分钟
+        'fund_basic_info': 1440,    # 基金基本信息: 24小时（过期后仍返回旧值，由定时任务限速刷新）
         'fund_ranking': 10,          # 排行榜: 10分钟
         'fund_value_estimation': 5,  # 实时估值: 5分钟
         'fund_dividend': 1440,       # 分红记录: 24小时
         'fund_rating': 60,           # 基金评级: 1小时
+        'fund_net_value_history': 60,  # 历史净值: 同步后1小时内不再请求上游（已有当日数据时不再请求）
+        'fund_money': 10,            # 货币基金: 同步后10分钟内不再请求上游
+    }
+
+    # 软过期后仍可返回旧值的时长 (分钟)，期间由调用方后台刷新；未配置的类型到期即失效
+    STALE_TTL_CONFIG = {
+        'fund_ranking': 120,         # 排行榜: 过期后2小时内先返回旧值
+    }
+
+    # 基金基本信息缓存的列（不含 更新时间、最后尝试时间）
+    BASIC_INFO_COLUMNS = (
+        '基金代码', '基金简称', '基金全称', '基金类型', '基金公司', '基金经理', '成立日期', '最新规模',
+        '托管银行', '业绩比较基准', '投资目标', '投资策略',
+        '管理费率', '托管费率', '销售服务费率', '最高申购费率', '最高赎回费率', '跟踪标的',
+    )
+
+    # 基金基本信息长期未能刷新（如基金已清盘）时保留的天数
+    BASIC_INFO_RETENTION_DAYS = 30
+
+    # 每日净值列表可排序的列（接口参数 -> 排序表达式，文本存储的数值列按数值排序）
+    DAILY_NAV_SORT_COLUMNS = {
+        '基金代码': '基金代码',
+        '单位净值': '单位净值',
+        '累计净值': '累计净值',
+        '日增长率': "CAST(NULLIF(日增长率, '') AS REAL)",
+        '日增长值': "CAST(NULLIF(日增长值, '') AS REAL)",
+    }
+
+    # 历史净值走势指标: 指标 -> (上游日期列, {上游列名: fund_net_value_history 中的列名})
+    NET_VALUE_INDICATORS = {
+        '单位净值走势': ('净值日期', {'单位净值': '单位净值', '日增长率': '日增长率'}),
+        '累计净值走势': ('净值日期', {'累计净值': '累计净值'}),
+        '累计收益率走势': ('日期', {'累计收益率': '累计收益率'}),
+        '同类排名走势': ('报告日期', {
+            '同类型排名-每日近三月排名': '同类排名',
+            '总排名-每日近三月排名': '同类总排名',
+        }),
+        '同类排名百分比': ('报告日期', {'同类型排名-每日近3月收益排名百分比': '同类排名百分比'}),
+        '每万份收益': ('净值日期', {'每万份收益': '每万份收益'}),
+        '7日年化收益率': ('净值日期', {'7日年化收益率': '七日年化收益率'}),
     }
 
+    # 已解码的排行快照: 基金类型 -> (更新时间, DataFrame)，数据库中的快照未更新时直接复用
+    _ranking_frames: Dict[str, Tuple[str, pd.DataFrame]] = {}
+    _ranking_frames_lock = threading.Lock()
+
     @staticmethod
-    def is_cache_valid(update_time_str: str, ttl_minutes: int) -> bool:
+    def cache_age_seconds(update_time_str: str) -> Optional[float]:
         """
-        检查缓存是否有效
+        计算缓存已存在的秒数
 
         Args:
-            update_time_str: 更新时间字符串
-            ttl_minutes: TTL时长(分钟)
+            update_time_str: 更新时间字符串（SQLite CURRENT_TIMESTAMP，UTC）
 
         Returns:
-            bool: 缓存是否有效
+            float or None: 缓存年龄(秒)，无法解析时返回None
         """
         try:
             update_time = datetime.strptime(update_time_str, '%Y-%m-%d %H:%M:%S')
-            expiry_time = update_time + timedelta(minutes=ttl_minutes)
-            return datetime.now() < expiry_time
+            return (datetime.utcnow() - update_time).total_seconds()
         except Exception:
-            return False
+            return None
+
+    @classmethod
+    def is_cache_valid(cls, update_time_str: str, ttl_minutes: int) -> bool:
+        """
+        检查缓存是否有效
+
+        Args:
+            update_time_str: 更新时间字符串（SQLite CURRENT_TIMESTAMP，UTC）
+            ttl_minutes: TTL时长(分钟)
+
+        Returns:
+            bool: 缓存是否有效
+        """
+        age = cls.cache_age_seconds(update_time_str)
+        return age is not None and age < ttl_minutes * 60
 
     @classmethod
     def get_fund_basic_info(cls, fund_code: str) -> Optional[Dict[str, Any]]:
@@ -50,18 +112,73 @@ class CacheHelper:
         Returns:
             Dict or None: 基金信息字典,缓存过期返回None
         """
-        query = '''
+        entry = cls.get_fund_basic_info_entries([fund_code]).get(fund_code)
+        return entry['data'] if entry is not None and not entry['stale'] else None
+
+    @classmethod
+    def get_fund_basic_info_entries(cls, fund_codes: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        批量获取基金基本信息缓存（过期的条目同样返回，由调用方决定是否使用）
+
+        Args:
+            fund_codes: 基金代码列表
+
+        Returns:
+            {基金代码: {'data': 基金信息字典, 'age': 缓存秒数, 'stale': 是否超过TTL}}，未缓存的基金不包含在内
+        """
+        if not fund_codes:
+            return {}
+        results = execute_query(f'''
             SELECT * FROM fund_basic_info_cache
-            WHERE 基金代码 = ?
-        '''
-        results = execute_query(query, (fund_code,))
+            WHERE 基金代码 IN ({','.join('?' * len(fund_codes))})
+        ''', tuple(fund_codes))
+
+        entries = {}
+        for data in results:
+            data.pop('id', None)
+            data.pop('最后尝试时间', None)
+            age = cls.cache_age_seconds(data['更新时间'])
+            entries[data['基金代码']] = {
+                'data': data,
+                'age': age,
+                'stale': age is None or age >= cls.TTL_CONFIG['fund_basic_info'] * 60
+            }
+        return entries
 
-        if results:
-            data = results[0]
-            if cls.is_cache_valid(data['更新时间'], cls.TTL_CONFIG['fund_basic_info']):
-                return data
+    @classmethod
+    def get_stale_fund_basic_info_codes(cls, limit: int) -> List[str]:
+        """
+        获取已过期的基金基本信息（按最后一次刷新尝试从旧到新，从未尝试过的按更新时间）
 
-        return None
+        刷新失败的条目记录了尝试时间（见 mark_fund_basic_info_attempt），排到其他过期条目之后，
+        持续失败的基金（如已清盘）不会占满每批的名额
+
+        Args:
+            limit: 最多返回的条数
+
+        Returns:
+            List[str]: 基金代码列表
+        """
+        results = execute_query(f'''
+            SELECT 基金代码 FROM fund_basic_info_cache
+            WHERE datetime(更新时间) < datetime('now', '-{cls.TTL_CONFIG["fund_basic_info"]} minutes')
+            ORDER BY COALESCE(最后尝试时间, 更新时间)
+            LIMIT ?
+        ''', (limit,))
+        return [row['基金代码'] for row in results]
+
+    @classmethod
+    def mark_fund_basic_info_attempt(cls, fund_code: str):
+        """
+        记录一次未成功的基本信息刷新（不改变更新时间，条目仍为过期状态）
+
+        Args:
+            fund_code: 基金代码
+        """
+        execute_update(
+            'UPDATE fund_basic_info_cache SET 最后尝试时间 = CURRENT_TIMESTAMP WHERE 基金代码 = ?',
+            (fund_code,)
+        )
 
     @classmethod
     def set_fund_basic_info(cls, data: Dict[str, Any]) -> bool:
@@ -75,25 +192,13 @@ class CacheHelper:
             bool: 是否成功
         """
         try:
-            query = '''
+            columns = [column for column in cls.BASIC_INFO_COLUMNS if column != '基金代码']
+            query = f'''
                 INSERT OR REPLACE INTO fund_basic_info_cache
-                (基金代码, 基金简称, 基金类型, 基金公司, 基金经理,
-                 成立日期, 最新规模, 托管银行, 业绩比较基准, 投资目标, 投资策略, 更新时间)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                (基金代码, {', '.join(columns)}, 更新时间, 最后尝试时间)
+                VALUES (?, {', '.join('?' * len(columns))}, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
             '''
-            params = (
-                data.get('基金代码'),
-                data.get('基金简称'),
-                data.get('基金类型'),
-                data.get('基金公司'),
-                data.get('基金经理'),
-                data.get('成立日期'),
-                data.get('最新规模'),
-                data.get('托管银行'),
-                data.get('业绩比较基准'),
-                data.get('投资目标'),
-                data.get('投资策略')
-            )
+            params = (data.get('基金代码'), *(data.get(column) for column in columns))
             execute_update(query, params)
             return True
         except Exception as e:
@@ -103,26 +208,74 @@ class CacheHelper:
     @classmethod
     def get_fund_daily_nav(cls, fund_code: str) -> Optional[Dict[str, Any]]:
         """
-        获取实时净值缓存
+        获取单只基金的每日净值（表由定时任务整体刷新，不按行判断过期）
 
         Args:
             fund_code: 基金代码
 
         Returns:
-            Dict or None: 净值数据,缓存过期返回None
+            Dict or None: 净值数据,不存在返回None
         """
         query = '''
             SELECT * FROM fund_daily_nav_cache
             WHERE 基金代码 = ?
         '''
         results = execute_query(query, (fund_code,))
+        return results[0] if results else None
 
-        if results:
-            data = results[0]
-            if cls.is_cache_valid(data['更新时间'], cls.TTL_CONFIG['fund_daily_nav']):
-                return data
+    @classmethod
+    def query_fund_daily_nav(cls, fund_codes: Optional[List[str]] = None, keyword: Optional[str] = None,
+                             purchase_status: Optional[str] = None, sort_by: str = '基金代码',
+                             order: str = 'asc', page: int = 1,
+                             page_size: int = 50) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        分页查询每日净值列表（筛选、排序、分页均在数据库中完成）
 
-        return None
+        Args:
+            fund_codes: 只返回这些基金代码
+            keyword: 基金代码前缀或基金简称包含的关键字
+            purchase_status: 申购状态，如 '开放申购'
+            sort_by: 排序列（见 DAILY_NAV_SORT_COLUMNS）
+            order: 'asc' / 'desc'，空值始终排在最后
+            page: 页码（从1开始）
+            page_size: 每页条数
+
+        Returns:
+            (当前页数据, 符合条件的总条数)
+
+        Raises:
+            ValueError: 排序列或排序方向不支持
+        """
+        if sort_by not in cls.DAILY_NAV_SORT_COLUMNS:
+            raise ValueError(f"不支持的排序列: {sort_by}")
+        if order not in ('asc', 'desc'):
+            raise ValueError(f"不支持的排序方向: {order}")
+
+        conditions = []
+        params: List[Any] = []
+        if fund_codes:
+            conditions.append(f"基金代码 IN ({','.join('?' * len(fund_codes))})")
+            params.extend(fund_codes)
+        if keyword:
+            conditions.append("(基金代码 LIKE ? OR 基金简称 LIKE ?)")
+            params.extend([f"{keyword}%", f"%{keyword}%"])
+        if purchase_status:
+            conditions.append("申购状态 = ?")
+            params.append(purchase_status)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+
+        total = execute_query(f'SELECT COUNT(*) AS total FROM fund_daily_nav_cache {where}', tuple(params))[0]['total']
+
+        sort_expr = cls.DAILY_NAV_SORT_COLUMNS[sort_by]
+        rows = execute_query(f'''
+            SELECT 基金代码, 基金简称, 净值日期, 单位净值, 累计净值,
+                   前一净值日期, 前一单位净值, 前一累计净值,
+                   日增长值, 日增长率, 申购状态, 赎回状态, 手续费
+            FROM fund_daily_nav_cache {where}
+            ORDER BY {sort_expr} IS NULL, {sort_expr} {order.upper()}, 基金代码
+            LIMIT ? OFFSET ?
+        ''', (*params, page_size, (page - 1) * page_size))
+        return rows, total
 
     @classmethod
     def set_fund_daily_nav(cls, data: Dict[str, Any]) -> bool:
@@ -139,8 +292,9 @@ class CacheHelper:
             query = '''
                 INSERT OR REPLACE INTO fund_daily_nav_cache
                 (基金代码, 基金简称, 净值日期, 单位净值, 累计净值,
-                 日增长率, 日增长值, 申购状态, 赎回状态, 手续费, 更新时间)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                 日增长率, 日增长值, 申购状态, 赎回状态, 手续费,
+                 前一净值日期, 前一单位净值, 前一累计净值, 更新时间)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
             '''
             params = (
                 data.get('基金代码'),
@@ -152,7 +306,10 @@ class CacheHelper:
                 data.get('日增长值'),
                 data.get('申购状态'),
                 data.get('赎回状态'),
-                data.get('手续费')
+                data.get('手续费'),
+                data.get('前一净值日期'),
+                data.get('前一单位净值'),
+                data.get('前一累计净值')
             )
             execute_update(query, params)
             return True
@@ -171,79 +328,248 @@ class CacheHelper:
         Returns:
             List[Dict] or None: 排行数据列表,缓存过期返回None
         """
-        query = '''
-            SELECT * FROM fund_ranking_cache
-            WHERE 基金类型 = ?
-        '''
-        results = execute_query(query, (fund_type,))
+        entry = cls.get_fund_ranking_entry(fund_type)
+        if entry is not None and not entry['stale']:
+            return entry['data'].to_dict('records')
+        return None
+
+    @classmethod
+    def get_fund_ranking_entry(cls, fund_type: str) -> Optional[Dict[str, Any]]:
+        """
+        获取排行榜缓存及其新鲜度（软过期后仍返回旧值，由调用方决定是否后台刷新）
 
-        if results:
-            data = results[0]
-            if cls.is_cache_valid(data['更新时间'], cls.TTL_CONFIG['fund_ranking']):
-                try:
-                    return json.loads(data['排行数据'])
-                except Exception:
-                    return None
+        软过期时间按分类加入抖动（见 db/early_expiry.py），软过期前按 XFetch 概率提前标记刷新
 
-        return None
+        Args:
+            fund_type: 基金类型
+
+        Returns:
+            Dict or None: {'data': 排行 DataFrame（多个请求共享，不得原地修改）, 'age': 缓存年龄(秒),
+            'stale': 是否已软过期, 'refresh': 是否应后台刷新（已软过期或抽中提前刷新）,
+            'compute_seconds': 上次从上游获取的耗时(秒)}，不存在或已硬过期返回None
+        """
+        results = execute_query(
+            'SELECT 更新时间, 计算耗时 FROM fund_ranking_cache WHERE 基金类型 = ?',
+            (fund_type,)
+        )
+        if not results:
+            return None
+
+        update_time = results[0]['更新时间']
+        compute_seconds = results[0]['计算耗时']
+        age = cls.cache_age_seconds(update_time)
+        ttl_seconds = jittered_ttl(cls.TTL_CONFIG['fund_ranking'] * 60, f'fund_ranking:{fund_type}')
+        stale_seconds = cls.STALE_TTL_CONFIG['fund_ranking'] * 60
+        if age is None or age >= ttl_seconds + stale_seconds:
+            return None
+
+        with cls._ranking_frames_lock:
+            decoded = cls._ranking_frames.get(fund_type)
+        if decoded is not None and decoded[0] == update_time:
+            frame = decoded[1]
+        else:
+            frame = cls._load_ranking_frame(fund_type)
+            if frame is None:
+                return None
+        return {
+            'data': frame,
+            'age': age,
+            'stale': age >= ttl_seconds,
+            'refresh': should_refresh_early(age, ttl_seconds, compute_seconds),
+            'compute_seconds': compute_seconds
+        }
+
+    @classmethod
+    def _load_ranking_frame(cls, fund_type: str) -> Optional[pd.DataFrame]:
+        """从数据库读取并解码排行快照，解码结果按更新时间留在内存中"""
+        results = execute_query(
+            'SELECT 排行快照, 排行数据, 更新时间 FROM fund_ranking_cache WHERE 基金类型 = ?',
+            (fund_type,)
+        )
+        if not results:
+            return None
+
+        row = results[0]
+        try:
+            if row['排行快照'] is not None:
+                frame = decode_frame(row['排行快照'])
+            else:
+                # 旧格式（迁移前写入的 JSON）
+                frame = pd.DataFrame(json.loads(row['排行数据']))
+        except Exception as e:
+            print(f"[缓存] 排行快照解码失败: {e}")
+            return None
+
+        with cls._ranking_frames_lock:
+            cls._ranking_frames[fund_type] = (row['更新时间'], frame)
+        return frame
 
     @classmethod
-    def set_fund_ranking(cls, fund_type: str, ranking_data: List[Dict[str, Any]]) -> bool:
+    def set_fund_ranking(cls, fund_type: str, ranking_data: Union[pd.DataFrame, List[Dict[str, Any]]],
+                         compute_seconds: Optional[float] = None) -> bool:
         """
-        设置排行榜缓存
+        设置排行榜缓存（列式二进制快照）
 
         Args:
             fund_type: 基金类型
-            ranking_data: 排行数据列表
+            ranking_data: 排行 DataFrame 或排行数据列表
+            compute_seconds: 从上游获取排行的耗时（秒），用于提前刷新判断
 
         Returns:
             bool: 是否成功
         """
         try:
+            frame = ranking_data if isinstance(ranking_data, pd.DataFrame) else pd.DataFrame(ranking_data)
+            # 与 CURRENT_TIMESTAMP 一致使用 UTC，便于内存中的解码结果按更新时间匹配
+            update_time = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
             query = '''
                 INSERT OR REPLACE INTO fund_ranking_cache
-                (基金类型, 排行数据, 总记录数, 更新时间)
-                VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+                (基金类型, 排行数据, 排行快照, 总记录数, 更新时间, 计算耗时)
+                VALUES (?, '', ?, ?, ?, ?)
             '''
-            params = (
-                fund_type,
-                json.dumps(ranking_data, ensure_ascii=False),
-                len(ranking_data)
-            )
-            execute_update(query, params)
+            execute_update(query, (fund_type, encode_frame(frame), len(frame), update_time, compute_seconds))
+            with cls._ranking_frames_lock:
+                cls._ranking_frames[fund_type] = (update_time, frame)
             return True
         except Exception as e:
             print(f"[缓存] 排行榜缓存失败: {e}")
             return False
 
+    @classmethod
+    def get_net_value_sync_state(cls, fund_code: str, indicator: str) -> Optional[Dict[str, Any]]:
+        """
+        获取历史净值同步状态
+
+        Args:
+            fund_code: 基金代码
+            indicator: 走势指标（见 NET_VALUE_INDICATORS）
+
+        Returns:
+            {'最新日期', '行数', '同步时间', 'age_minutes'}，从未同步返回None
+        """
+        results = execute_query('''
+            SELECT 最新日期, 行数, 同步时间,
+                   (julianday('now') - julianday(同步时间)) * 1440 as age_minutes
+            FROM fund_net_value_sync
+            WHERE 基金代码 = ? AND 指标 = ?
+        ''', (fund_code, indicator))
+        return results[0] if results else None
+
+    @classmethod
+    def is_net_value_sync_due(cls, state: Optional[Dict[str, Any]]) -> bool:
+        """
+        是否需要从上游同步历史净值: 从未同步，或尚无当日数据且距上次同步超过TTL
+
+        Args:
+            state: get_net_value_sync_state 的返回值
+        """
+        if state is None:
+            return True
+        if state['最新日期'] and state['最新日期'] >= datetime.now().strftime('%Y-%m-%d'):
+            return False
+        return state['age_minutes'] >= cls.TTL_CONFIG['fund_net_value_history']
+
+    @classmethod
+    def get_net_value_history(cls, fund_code: str, indicator: str) -> List[Dict[str, Any]]:
+        """
+        读取历史净值（按日期降序，列名与 AkShare 返回一致）
+
+        使用 (基金代码, 日期 DESC) 索引做范围扫描
+
+        Args:
+            fund_code: 基金代码
+            indicator: 走势指标（见 NET_VALUE_INDICATORS）
+
+        Returns:
+            List[Dict]: 历史数据，未入库时为空列表
+        """
+        date_column, columns = cls.NET_VALUE_INDICATORS[indicator]
+        select = ', '.join(f'{target} AS "{source}"' for source, target in columns.items())
+        has_value = ' OR '.join(f'{target} IS NOT NULL' for target in columns.values())
+        return execute_query(f'''
+            SELECT 日期 AS "{date_column}", {select}
+            FROM fund_net_value_history
+            WHERE 基金代码 = ? AND ({has_value})
+            ORDER BY 日期 DESC
+        ''', (fund_code,))
+
+    @classmethod
+    def append_net_value_history(cls, fund_code: str, indicator: str, df: Optional[pd.DataFrame]) -> int:
+        """
+        追加历史净值: 只写入比已入库最新日期更新的行，已入库的日期不再改写
+
+        同一日期的不同指标写入同一行的不同列；同步状态与数据在同一个事务中更新
+
+        Args:
+            fund_code: 基金代码
+            indicator: 走势指标（见 NET_VALUE_INDICATORS）
+            df: AkShare fund_open_fund_info_em 的返回值（为空时只记录同步时间）
+
+        Returns:
+            int: 新写入的行数
+        """
+        date_column, columns = cls.NET_VALUE_INDICATORS[indicator]
+        targets = list(columns.values())
+
+        records = []
+        if df is not None and not df.empty:
+            frame = pd.DataFrame({'日期': pd.to_datetime(df[date_column], errors='coerce').dt.strftime('%Y-%m-%d')})
+            for source, target in columns.items():
+                values = pd.to_numeric(df[source], errors='coerce') if source in df.columns else None
+                frame[target] = values.astype(object).where(values.notna(), None) if values is not None else None
+            frame = frame.dropna(subset=['日期']).drop_duplicates(subset=['日期'], keep='last')
+            records = list(zip(frame['日期'].tolist(), *(frame[target].tolist() for target in targets)))
+
+        insert = f'''
+            INSERT INTO fund_net_value_history (基金代码, 日期, {', '.join(targets)})
+            VALUES (?, ?, {', '.join('?' * len(targets))})
+            ON CONFLICT(基金代码, 日期) DO UPDATE SET
+            {', '.join(f'{target} = excluded.{target}' for target in targets)}, 更新时间 = CURRENT_TIMESTAMP
+        '''
+
+        def append(conn):
+            row = conn.execute(
+                'SELECT 最新日期 FROM fund_net_value_sync WHERE 基金代码 = ? AND 指标 = ?',
+                (fund_code, indicator)
+            ).fetchone()
+            latest = row[0] if row else None
+            new_records = [record for record in records if latest is None or record[0] > latest]
+            if new_records:
+                conn.executemany(insert, [(fund_code, *record) for record in new_records])
+                latest = max(record[0] for record in new_records)
+            conn.execute('''
+                INSERT INTO fund_net_value_sync (基金代码, 指标, 最新日期, 行数, 同步时间)
+                VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(基金代码, 指标) DO UPDATE SET
+                最新日期 = excluded.最新日期, 行数 = 行数 + excluded.行数, 同步时间 = CURRENT_TIMESTAMP
+            ''', (fund_code, indicator, latest, len(new_records)))
+            return len(new_records)
+
+        return execute_transaction(append)
+
     @classmethod
     def clear_expired_cache(cls):
         """
         清理所有过期的缓存数据
         """
-        try:
-            conn = get_db()
+        def clear(conn):
             cursor = conn.cursor()
 
-            # 清理基金基本信息缓存
+            # 清理长期未能刷新的基金基本信息（过期条目由定时任务刷新，不在此删除）
             cursor.execute(f'''
                 DELETE FROM fund_basic_info_cache
-                WHERE datetime(更新时间) < datetime('now', '-{cls.TTL_CONFIG["fund_basic_info"]} minutes')
+                WHERE datetime(更新时间) < datetime('now', '-{cls.BASIC_INFO_RETENTION_DAYS} days')
             ''')
 
-            # 清理实时净值缓存
-            cursor.execute(f'''
-                DELETE FROM fund_daily_nav_cache
-                WHERE datetime(更新时间) < datetime('now', '-{cls.TTL_CONFIG["fund_daily_nav"]} minutes')
-            ''')
-
-            # 清理排行榜缓存
+            # 清理排行榜缓存（硬过期后才删除，软过期的旧值仍可返回）
+            ranking_ttl = cls.TTL_CONFIG["fund_ranking"] + cls.STALE_TTL_CONFIG["fund_ranking"]
             cursor.execute(f'''
                 DELETE FROM fund_ranking_cache
-                WHERE datetime(更新时间) < datetime('now', '-{cls.TTL_CONFIG["fund_ranking"]} minutes')
+                WHERE datetime(更新时间) < datetime('now', '-{ranking_ttl} minutes')
             ''')
 
-            conn.commit()
+        try:
+            execute_transaction(clear)
             print("[缓存] 过期缓存清理完成")
             return True
         except Exception as e:
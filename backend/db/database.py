@@ -3,45 +3,284 @@ SQLite 数据库管理模块
 """
 import sqlite3
 import os
+import time
+import functools
+import re
+import uuid
 from contextlib import contextmanager
-from typing import Optional
+from typing import Optional, Dict, Any, Callable, List, Sequence, Tuple
 import threading
+import logging
+
+logger = logging.getLogger(__name__)
 
 # 数据库文件路径
 DB_DIR = os.path.join(os.path.dirname(__file__))
 DB_PATH = os.path.join(DB_DIR, 'akshare.db')
 
-# 线程本地存储（每个线程独立的数据库连接）
-_thread_local = threading.local()
+# 连接池最大连接数（可通过环境变量 DB_POOL_MAX_SIZE 覆盖）
+POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', '16'))
 
+# 获取连接的最长等待时间（秒）
+POOL_ACQUIRE_TIMEOUT = 30.0
 
-def get_db() -> sqlite3.Connection:
+# 每个连接的预编译语句缓存数量（sqlite3 默认 128）
+STATEMENT_CACHE_SIZE = 512
+
+# 每个连接建立时设置的 PRAGMA
+CONNECTION_PRAGMAS = (
+    ('journal_mode', 'WAL'),        # WAL 模式（读写并发）
+    ('synchronous', 'NORMAL'),      # WAL 下 NORMAL 已保证一致性，减少 fsync
+    ('foreign_keys', 'ON'),         # 外键约束
+    ('temp_store', 'MEMORY'),       # 临时表/排序使用内存
+    ('cache_size', -32000),         # 页缓存 32MB（负数单位为 KB）
+    ('mmap_size', 268435456),       # 内存映射 256MB
+    ('busy_timeout', 30000),        # 锁等待 30 秒
+)
+
+
+class ConnectionPool:
     """
-    获取当前线程的数据库连接（线程安全）
+    有界 SQLite 连接池
+
+    特性:
+    - 连接数上限，超出时等待空闲连接（超时抛出 OperationalError）
+    - 连接按线程租用: 同一线程重复 get_db() 拿到同一个连接
+    - 线程结束后其租用的连接自动回收，避免调度器/临时线程泄漏连接
+    - 取出空闲连接时做健康检查，损坏的连接直接丢弃
+    - 统一设置 PRAGMA 和更大的预编译语句缓存
     """
-    if not hasattr(_thread_local, 'connection'):
-        _thread_local.connection = sqlite3.connect(
-            DB_PATH,
+
+    def __init__(self, db_path: str, max_size: int = POOL_MAX_SIZE,
+                 acquire_timeout: float = POOL_ACQUIRE_TIMEOUT):
+        self.db_path = db_path
+        self.max_size = max(1, max_size)
+        self.acquire_timeout = acquire_timeout
+        self._idle: List[sqlite3.Connection] = []
+        # 线程 ident -> (线程对象, 连接)
+        self._leases: Dict[int, Tuple[threading.Thread, sqlite3.Connection]] = {}
+        self._size = 0
+        self._cond = threading.Condition()
+        self.stats = {
+            'created': 0,
+            'closed': 0,
+            'acquired': 0,
+            'waits': 0,
+            'timeouts': 0,
+            'health_check_failures': 0,
+            'reclaimed': 0,
+            'max_in_use': 0,
+        }
+
+    def _create(self) -> sqlite3.Connection:
+        """创建新连接并设置 PRAGMA"""
+        conn = sqlite3.connect(
+            self.db_path,
             check_same_thread=False,
-            timeout=30.0
+            timeout=30.0,
+            cached_statements=STATEMENT_CACHE_SIZE
         )
         # 返回字典格式的行
-        _thread_local.connection.row_factory = sqlite3.Row
-        # 启用 WAL 模式（提升并发性能）
-        _thread_local.connection.execute('PRAGMA journal_mode=WAL')
-        # 启用外键约束
-        _thread_local.connection.execute('PRAGMA foreign_keys=ON')
+        conn.row_factory = sqlite3.Row
+        for name, value in CONNECTION_PRAGMAS:
+            conn.execute(f'PRAGMA {name}={value}')
+        self.stats['created'] += 1
+        return conn
+
+    @staticmethod
+    def _is_healthy(conn: sqlite3.Connection) -> bool:
+        """健康检查: 连接可用且没有遗留的未结束事务"""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            conn.execute('SELECT 1').fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _discard(self, conn: sqlite3.Connection):
+        """关闭并丢弃连接（需持有锁）"""
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        self._size -= 1
+        self.stats['closed'] += 1
+
+    def _reclaim_dead_leases(self):
+        """回收已结束线程租用的连接（需持有锁）"""
+        for ident, (thread, conn) in list(self._leases.items()):
+            if not thread.is_alive():
+                del self._leases[ident]
+                self._idle.append(conn)
+                self.stats['reclaimed'] += 1
+
+    def acquire(self) -> sqlite3.Connection:
+        """
+        获取当前线程的连接（已租用则直接返回）
+
+        Raises:
+            sqlite3.OperationalError: 等待超时，连接池耗尽
+        """
+        thread = threading.current_thread()
+        ident = threading.get_ident()
+
+        with self._cond:
+            lease = self._leases.get(ident)
+            if lease is not None:
+                if lease[0] is thread:
+                    return lease[1]
+                # 线程 ident 被新线程复用，旧线程的连接归还连接池
+                del self._leases[ident]
+                self._idle.append(lease[1])
+                self.stats['reclaimed'] += 1
+
+            deadline = time.monotonic() + self.acquire_timeout
+            while True:
+                self._reclaim_dead_leases()
+
+                conn = None
+                while self._idle and conn is None:
+                    candidate = self._idle.pop()
+                    if self._is_healthy(candidate):
+                        conn = candidate
+                    else:
+                        self.stats['health_check_failures'] += 1
+                        self._discard(candidate)
+
+                if conn is None and self._size < self.max_size:
+                    conn = self._create()
+                    self._size += 1
+
+                if conn is not None:
+                    self._leases[ident] = (thread, conn)
+                    self.stats['acquired'] += 1
+                    self.stats['max_in_use'] = max(self.stats['max_in_use'], len(self._leases))
+                    return conn
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.stats['timeouts'] += 1
+                    raise sqlite3.OperationalError(
+                        f"数据库连接池耗尽（上限 {self.max_size}，等待 {self.acquire_timeout} 秒）"
+                    )
+                self.stats['waits'] += 1
+                # 定期醒来检查已结束线程的连接
+                self._cond.wait(min(remaining, 1.0))
+
+    def release(self):
+        """归还当前线程租用的连接"""
+        with self._cond:
+            lease = self._leases.pop(threading.get_ident(), None)
+            if lease is None:
+                return
+            conn = lease[1]
+            if conn.in_transaction:
+                try:
+                    conn.rollback()
+                except sqlite3.Error:
+                    self._discard(conn)
+                    self._cond.notify()
+                    return
+            self._idle.append(conn)
+            self._cond.notify()
+
+    def is_leased(self) -> bool:
+        """当前线程是否已租用连接"""
+        with self._cond:
+            lease = self._leases.get(threading.get_ident())
+            return lease is not None and lease[0] is threading.current_thread()
+
+    @contextmanager
+    def connection(self):
+        """
+        临时借用连接的上下文管理器
+
+        当前线程原本没有租用连接时，退出后立即归还；
+        已经租用的（如读线程的长期连接）保持不变
+        """
+        borrowed = not self.is_leased()
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            if borrowed:
+                self.release()
+
+    def close_all(self):
+        """关闭所有空闲连接和已结束线程的连接"""
+        with self._cond:
+            self._reclaim_dead_leases()
+            while self._idle:
+                self._discard(self._idle.pop())
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取连接池使用情况"""
+        with self._cond:
+            in_use = len(self._leases)
+            return {
+                'max_size': self.max_size,
+                'size': self._size,
+                'in_use': in_use,
+                'idle': len(self._idle),
+                'utilization': f"{in_use / self.max_size * 100:.1f}%",
+                'lease_threads': sorted(thread.name for thread, _ in self._leases.values()),
+                **self.stats,
+            }
+
+
+# 全局连接池
+_pool = ConnectionPool(DB_PATH)
+
+
+def get_db() -> sqlite3.Connection:
+    """
+    获取当前线程的数据库连接（线程安全）
 
-    return _thread_local.connection
+    连接从连接池中按线程租用，调用 close_db() 或线程结束后归还
+    """
+    return _pool.acquire()
 
 
 def close_db():
     """
-    关闭当前线程的数据库连接
+    归还当前线程的数据库连接
+    """
+    _pool.release()
+
+
+def db_connection():
+    """
+    临时借用数据库连接（用于线程池等短期任务，退出后自动归还）
+
+    Usage:
+        with db_connection() as conn:
+            conn.execute(...)
+    """
+    return _pool.connection()
+
+
+def release_db_after(func):
+    """
+    装饰器: 函数执行结束后归还当前线程的连接
+
+    用于定时任务、后台线程等短期任务，避免长期占用连接池；
+    调用前线程已租用连接（如读线程）时不归还
     """
-    if hasattr(_thread_local, 'connection'):
-        _thread_local.connection.close()
-        delattr(_thread_local, 'connection')
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        borrowed = not _pool.is_leased()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            if borrowed:
+                _pool.release()
+    return wrapper
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    """获取连接池使用情况"""
+    return _pool.get_stats()
 
 
 @contextmanager
@@ -49,15 +288,24 @@ def get_db_context():
     """
     数据库上下文管理器（自动提交/回滚）
     """
-    conn = get_db()
-    try:
-        yield conn
-        conn.commit()
-    except Exception as e:
-        conn.rollback()
-        raise e
+    with db_connection() as conn:
+        try:
+            yield conn
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            raise e
+
 
+def _add_column_if_missing(cursor: sqlite3.Cursor, table: str, column: str, definition: str):
+    """表中缺少某列时追加该列（用于已有数据库的结构迁移）"""
+    columns = {row[1] for row in cursor.execute(f'PRAGMA table_info("{table}")')}
+    if column not in columns:
+        cursor.execute(f'ALTER TABLE "{table}" ADD COLUMN "{column}" {definition}')
+        print(f"[数据库] 迁移: {table} 新增列 {column}")
 
+
+@release_db_after
 def init_db():
     """
     初始化数据库表结构
@@ -148,10 +396,19 @@ def init_db():
             申购状态 TEXT,
             赎回状态 TEXT,
             分红送配 TEXT,
+            累计收益率 REAL,
+            同类排名 REAL,
+            同类总排名 REAL,
+            同类排名百分比 REAL,
+            每万份收益 REAL,
+            七日年化收益率 REAL,
             更新时间 TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             UNIQUE(基金代码, 日期)
         )
     ''')
+    # 迁移: 旧库补充其他走势指标列（每个指标按日期写入同一行的对应列）
+    for column in ('累计收益率', '同类排名', '同类总排名', '同类排名百分比', '每万份收益', '七日年化收益率'):
+        _add_column_if_missing(cursor, 'fund_net_value_history', column, 'REAL')
 
     # 为历史净值表创建优化索引
     cursor.execute('''
@@ -225,11 +482,20 @@ def init_db():
         ON fund_money_cache(基金代码)
     ''')
 
-    # 创建ETF历史行情缓存表
+    # 迁移: 旧库的ETF历史行情缓存不区分周期和复权类型（不同参数的请求互相覆盖），
+    # 唯一约束无法修改，直接重建（缓存数据，按需重新获取）
+    etf_columns = {row[1] for row in cursor.execute('PRAGMA table_info("fund_etf_hist_cache")')}
+    if etf_columns and '周期' not in etf_columns:
+        cursor.execute('DROP TABLE fund_etf_hist_cache')
+        print("[数据库] 迁移: 重建 fund_etf_hist_cache（按周期、复权类型分别缓存）")
+
+    # 创建ETF历史行情缓存表（按 基金代码 + 周期 + 复权类型 分别缓存）
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS fund_etf_hist_cache (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             基金代码 TEXT NOT NULL,
+            周期 TEXT NOT NULL,
+            复权 TEXT NOT NULL,
             日期 TEXT NOT NULL,
             开盘 REAL,
             收盘 REAL,
@@ -242,7 +508,8 @@ def init_db():
             涨跌额 REAL,
             换手率 REAL,
             更新时间 TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            UNIQUE(基金代码, 日期)
+            计算耗时 REAL,  -- 从上游获取本次数据的耗时（秒），用于提前刷新判断
+            UNIQUE(基金代码, 周期, 复权, 日期)
         )
     ''')
 
@@ -263,7 +530,7 @@ def init_db():
 
     # ========== 新增3个缓存表 (2025-11-16优化) ==========
 
-    # 1. 基金基本信息缓存表 (TTL: 30分钟)
+    # 1. 基金基本信息缓存表 (过期后继续返回，由定时任务限速刷新)
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS fund_basic_info_cache (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -278,9 +545,22 @@ def init_db():
             业绩比较基准 TEXT,
             投资目标 TEXT,
             投资策略 TEXT,
-            更新时间 TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            基金全称 TEXT,
+            管理费率 TEXT,
+            托管费率 TEXT,
+            销售服务费率 TEXT,
+            最高申购费率 TEXT,
+            最高赎回费率 TEXT,
+            跟踪标的 TEXT,
+            更新时间 TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            最后尝试时间 TIMESTAMP
         )
     ''')
+    # 迁移: 旧库补充东方财富基金概况中的全称、费率等列
+    for column in ('基金全称', '管理费率', '托管费率', '销售服务费率', '最高申购费率', '最高赎回费率', '跟踪标的'):
+        _add_column_if_missing(cursor, 'fund_basic_info_cache', column, 'TEXT')
+    # 迁移: 旧库补充最后一次刷新尝试的时间（刷新失败的条目排到队尾）
+    _add_column_if_missing(cursor, 'fund_basic_info_cache', '最后尝试时间', 'TIMESTAMP')
 
     cursor.execute('''
         CREATE INDEX IF NOT EXISTS idx_basic_info_fund_code
@@ -292,7 +572,7 @@ def init_db():
         ON fund_basic_info_cache(更新时间)
     ''')
 
-    # 2. 实时净值缓存表 (TTL: 5分钟)
+    # 2. 开放式基金每日净值表（定时任务全量刷新，见 db/datasets.py FUND_DAILY_NAV）
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS fund_daily_nav_cache (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -306,9 +586,16 @@ def init_db():
             申购状态 TEXT,
             赎回状态 TEXT,
             手续费 TEXT,
+            前一净值日期 TEXT,
+            前一单位净值 REAL,
+            前一累计净值 REAL,
             更新时间 TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
     ''')
+    # 迁移: 旧库补充前一净值日期的净值列
+    _add_column_if_missing(cursor, 'fund_daily_nav_cache', '前一净值日期', 'TEXT')
+    _add_column_if_missing(cursor, 'fund_daily_nav_cache', '前一单位净值', 'REAL')
+    _add_column_if_missing(cursor, 'fund_daily_nav_cache', '前一累计净值', 'REAL')
 
     cursor.execute('''
         CREATE INDEX IF NOT EXISTS idx_daily_nav_fund_code
@@ -325,12 +612,17 @@ def init_db():
         CREATE TABLE IF NOT EXISTS fund_ranking_cache (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             基金类型 TEXT NOT NULL,
-            排行数据 TEXT NOT NULL,  -- JSON格式存储完整排行数据
+            排行数据 TEXT NOT NULL,  -- JSON格式存储完整排行数据（旧格式，新数据写入排行快照）
             总记录数 INTEGER,
             更新时间 TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            排行快照 BLOB,  -- 列式二进制快照（db/frame_codec.py）
+            计算耗时 REAL,  -- 从上游获取本次排行的耗时（秒），用于提前刷新判断
             UNIQUE(基金类型)
         )
     ''')
+    # 迁移: 旧库补充排行快照、计算耗时列
+    _add_column_if_missing(cursor, 'fund_ranking_cache', '排行快照', 'BLOB')
+    _add_column_if_missing(cursor, 'fund_ranking_cache', '计算耗时', 'REAL')
 
     cursor.execute('''
         CREATE INDEX IF NOT EXISTS idx_ranking_fund_type
@@ -489,6 +781,94 @@ def init_db():
         ON fund_market_aum_trend(日期 DESC)
     ''')
 
+    # 9. 数据集行哈希表（入库管道按主键记录每行内容哈希，只写入变化的行）
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS dataset_row_hashes (
+            数据集 TEXT NOT NULL,
+            主键 TEXT NOT NULL,
+            行哈希 INTEGER NOT NULL,
+            PRIMARY KEY (数据集, 主键)
+        ) WITHOUT ROWID
+    ''')
+
+    # 10. 数据集同步状态表（最近一次入库时间和变更统计）
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS dataset_sync_state (
+            数据集 TEXT PRIMARY KEY,
+            最后刷新时间 TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            写入模式 TEXT,
+            行数 INTEGER,
+            新增 INTEGER,
+            更新 INTEGER,
+            删除 INTEGER,
+            未变 INTEGER
+        )
+    ''')
+
+    # 11. 共享键值缓存表（多进程共享的二级缓存，值为 pickle 序列化）
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS cache_kv (
+            命名空间 TEXT NOT NULL,
+            键 TEXT NOT NULL,
+            值 BLOB NOT NULL,
+            过期时间 REAL NOT NULL,
+            版本 INTEGER NOT NULL,
+            PRIMARY KEY (命名空间, 键)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_cache_kv_expire ON cache_kv(过期时间)')
+
+    # 12. 共享缓存变更日志（版本号单调递增，各进程据此让一级缓存失效）
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS cache_kv_changes (
+            版本 INTEGER PRIMARY KEY AUTOINCREMENT,
+            命名空间 TEXT NOT NULL,
+            键 TEXT,
+            变更时间 REAL NOT NULL
+        )
+    ''')
+
+    # 13. 历史净值同步状态（每只基金每个走势指标已入库的最新日期，之后只追加更新的日期）
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS fund_net_value_sync (
+            基金代码 TEXT NOT NULL,
+            指标 TEXT NOT NULL,
+            最新日期 TEXT,
+            行数 INTEGER DEFAULT 0,
+            同步时间 TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (基金代码, 指标)
+        ) WITHOUT ROWID
+    ''')
+
+    # 14. 季度持仓同步状态（每只基金每个年份最近一次从上游获取的时间，全年定稿后不再获取）
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS fund_holdings_sync (
+            基金代码 TEXT NOT NULL,
+            持仓类型 TEXT NOT NULL,
+            年份 INTEGER NOT NULL,
+            同步时间 REAL NOT NULL,
+            已定稿 INTEGER DEFAULT 0,
+            PRIMARY KEY (基金代码, 持仓类型, 年份)
+        ) WITHOUT ROWID
+    ''')
+
+    # 15. 数据表版本（入库有变化时递增，用于生成 HTTP ETag）
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS table_versions (
+            表名 TEXT PRIMARY KEY,
+            版本 INTEGER NOT NULL,
+            更新时间 REAL NOT NULL
+        ) WITHOUT ROWID
+    ''')
+
+    # 清理分块全量刷新遗留的影子表（进程在刷新中途退出、或失败后的清理事务也失败时残留）
+    orphans = [row[0] for row in cursor.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name GLOB '*__shadow_*'"
+    ).fetchall()]
+    for shadow in orphans:
+        cursor.execute(f'DROP TABLE IF EXISTS "{shadow}"')
+        print(f"[数据库] 清理遗留的影子表: {shadow}")
+
     conn.commit()
     print(f"[数据库] 初始化完成: {DB_PATH}")
 
@@ -497,10 +877,10 @@ def execute_query(query: str, params: tuple = ()) -> list:
     """
     执行查询并返回结果
     """
-    conn = get_db()
-    cursor = conn.cursor()
-    cursor.execute(query, params)
-    rows = cursor.fetchall()
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
 
     # 将 Row 对象转换为字典
     return [dict(row) for row in rows]
@@ -508,23 +888,171 @@ def execute_query(query: str, params: tuple = ()) -> list:
 
 def execute_update(query: str, params: tuple = ()) -> int:
     """
-    执行更新/插入/删除操作
+    执行更新/插入/删除操作（经由单写线程）
     返回影响的行数
     """
-    conn = get_db()
-    cursor = conn.cursor()
-    cursor.execute(query, params)
-    conn.commit()
-    return cursor.rowcount
+    from .writer import db_writer
+
+    if db_writer.is_writer_thread():
+        # 已在写线程的事务中，直接执行，由外层统一提交
+        return get_db().execute(query, params).rowcount
+    return db_writer.submit_write(query, params).result()
 
 
 def execute_many(query: str, params_list: list) -> int:
     """
-    批量执行操作（用于批量插入/更新）
+    批量执行操作（用于批量插入/更新，经由单写线程）
     返回影响的行数
     """
-    conn = get_db()
-    cursor = conn.cursor()
-    cursor.executemany(query, params_list)
-    conn.commit()
-    return cursor.rowcount
+    from .writer import db_writer
+
+    if db_writer.is_writer_thread():
+        return get_db().executemany(query, params_list).rowcount
+    return db_writer.submit_many(query, params_list).result()
+
+
+def execute_transaction(fn) -> Any:
+    """
+    在单写线程的一个事务中执行 fn(conn)（经由单写线程）
+    fn 内不要 commit/rollback，正常返回即提交，抛出异常则整体回滚
+
+    Usage:
+        def replace_rows(conn):
+            conn.execute('DELETE FROM fund_dividend')
+            return conn.executemany(insert_query, records).rowcount
+
+        row_count = execute_transaction(replace_rows)
+    """
+    from .writer import db_writer
+
+    if db_writer.is_writer_thread():
+        return fn(get_db())
+    return db_writer.submit_transaction(fn).result()
+
+
+def _create_shadow_table(conn: sqlite3.Connection, table: str, shadow: str):
+    """按原表的建表语句创建（空的）影子表"""
+    row = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?",
+        (table,)
+    ).fetchone()
+    if row is None:
+        raise sqlite3.OperationalError(f"表不存在: {table}")
+
+    shadow_sql = re.sub(
+        r'^\s*CREATE\s+TABLE\s+(IF\s+NOT\s+EXISTS\s+)?["`\[]?\w+["`\]]?',
+        f'CREATE TABLE "{shadow}"',
+        row['sql'],
+        count=1,
+        flags=re.IGNORECASE
+    )
+    conn.execute(f'DROP TABLE IF EXISTS "{shadow}"')
+    conn.execute(shadow_sql)
+
+
+def _insert_rows(conn: sqlite3.Connection, table: str, columns: Sequence[str],
+                 records: list) -> int:
+    """批量写入（INSERT OR REPLACE，重复主键保留最后一条）"""
+    column_list = ', '.join(f'"{column}"' for column in columns)
+    placeholders = ', '.join('?' for _ in columns)
+    return conn.executemany(
+        f'INSERT OR REPLACE INTO "{table}" ({column_list}) VALUES ({placeholders})',
+        records
+    ).rowcount
+
+
+def _promote_shadow_table(conn: sqlite3.Connection, table: str, shadow: str):
+    """删除原表，影子表改名为原表并重建索引"""
+    # 只包含显式创建的索引（UNIQUE 约束的自动索引随建表语句重建）
+    index_sqls = [row['sql'] for row in conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+        (table,)
+    ).fetchall()]
+
+    conn.execute(f'DROP TABLE "{table}"')
+    conn.execute(f'ALTER TABLE "{shadow}" RENAME TO "{table}"')
+    for index_sql in index_sqls:
+        conn.execute(index_sql)
+
+
+def _swap_table_rows(conn: sqlite3.Connection, table: str, columns: Sequence[str],
+                     records: list, finalize: Optional[Callable[[sqlite3.Connection], Any]] = None) -> int:
+    """
+    影子表替换（需在写事务中执行）
+
+    1. 按原表的建表语句创建影子表
+    2. 新数据写入影子表
+    3. 删除原表，影子表改名为原表，重建索引
+    """
+    shadow = f'{table}__shadow'
+    _create_shadow_table(conn, table, shadow)
+    row_count = _insert_rows(conn, shadow, columns, records)
+    _promote_shadow_table(conn, table, shadow)
+    if finalize is not None:
+        finalize(conn)
+    return row_count
+
+
+def replace_table_rows(table: str, columns: Sequence[str], records: list,
+                       chunk_size: Optional[int] = None,
+                       finalize: Optional[Callable[[sqlite3.Connection], Any]] = None) -> int:
+    """
+    用新数据整体替换表内容（全量刷新）
+
+    数据先写入影子表，再在同一个写事务中替换原表：
+    读请求要么看到完整的旧数据，要么看到完整的新数据，不会看到空表或部分数据；
+    批量写入新表也比在原表上 DELETE + INSERT 少了逐行维护索引的开销
+
+    Args:
+        table: 表名
+        columns: 写入的列名（未列出的列使用默认值，如 更新时间）
+        records: 行数据元组列表，顺序与 columns 一致
+        chunk_size: 分块大小。数据量超过时影子表分多个事务写入，
+                    期间其他写操作可以插队，最后一个事务完成替换
+        finalize: 与替换在同一个事务中执行的函数 finalize(conn)（如同步元数据）
+
+    Returns:
+        写入的行数
+    """
+    if not chunk_size or len(records) <= chunk_size:
+        return execute_transaction(lambda conn: _swap_table_rows(conn, table, columns, records, finalize))
+
+    # 每次刷新使用独立的影子表名，避免同一张表的并发刷新互相覆盖
+    shadow = f'{table}__shadow_{uuid.uuid4().hex[:8]}'
+    execute_transaction(lambda conn: _create_shadow_table(conn, table, shadow))
+    try:
+        row_count = 0
+        for start in range(0, len(records), chunk_size):
+            chunk = records[start:start + chunk_size]
+            row_count += execute_transaction(
+                lambda conn, chunk=chunk: _insert_rows(conn, shadow, columns, chunk)
+            )
+
+        def promote(conn):
+            _promote_shadow_table(conn, table, shadow)
+            if finalize is not None:
+                finalize(conn)
+
+        execute_transaction(promote)
+    except Exception:
+        execute_transaction(lambda conn: conn.execute(f'DROP TABLE IF EXISTS "{shadow}"'))
+        raise
+    return row_count
+
+
+def upsert_rows(table: str, columns: Sequence[str], records: list,
+                chunk_size: Optional[int] = None) -> int:
+    """
+    按主键覆盖写入（INSERT OR REPLACE），可分块为多个事务
+
+    Returns:
+        写入的行数
+    """
+    chunk_size = chunk_size or len(records) or 1
+    row_count = 0
+    for start in range(0, len(records), chunk_size):
+        chunk = records[start:start + chunk_size]
+        row_count += execute_transaction(
+            lambda conn, chunk=chunk: _insert_rows(conn, table, columns, chunk)
+        )
+    return row_count
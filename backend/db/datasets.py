@@ -0,0 +1,243 @@
+"""
+入库数据集定义
+每个 DatasetSpec 描述一个 AkShare 数据源如何映射到数据库表，由 db/ingestion.py 统一执行
+"""
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+import akshare as ak
+
+from .ingestion import ColumnSpec, DatasetSpec, column_date
+
+
+def _estimation_time(context: Dict[str, Any]) -> Optional[str]:
+    """估算时间: 估算增长率列名中的日期 + 当前时分"""
+    date_part = column_date(context['columns'].get('估算增长率') or '')
+    if date_part is None:
+        return None
+    return f"{date_part} {datetime.now().strftime('%H:%M')}"
+
+
+# 基金实时估值（交易时段每30分钟，按基金代码覆盖）
+FUND_VALUE_ESTIMATION = DatasetSpec(
+    name='fund_value_estimation',
+    label='基金估值',
+    table='fund_value_estimation',
+    source=ak.fund_value_estimation_em,
+    columns=[
+        ColumnSpec('基金代码', dtype='raw'),
+        ColumnSpec('基金名称', dtype='raw'),
+        # 估算时间每次运行都会变化，不参与行哈希
+        ColumnSpec('估算时间', value=_estimation_time, hashed=False),
+        ColumnSpec('估算值', pattern='估算数据-估算值', default=None),
+        ColumnSpec('估算增长率', pattern='估算数据-估算增长率', default=None),
+        ColumnSpec('单位净值', pattern='公布数据-单位净值', default=None),
+        ColumnSpec('日增长率', pattern='公布数据-日增长率', default=None),
+        ColumnSpec('估算偏差', dtype='raw'),
+    ],
+    primary_key=['基金代码'],
+    refresh='upsert',
+)
+
+def _nav_date(target: str):
+    """净值日期: 取对应净值列名中的日期前缀"""
+    return lambda context: column_date(context['columns'].get(target) or '')
+
+
+# 开放式基金每日净值（交易日晚间净值公布后全量，列名带日期前缀，取最新两个日期）
+FUND_DAILY_NAV = DatasetSpec(
+    name='fund_daily_nav',
+    label='开放式基金净值',
+    table='fund_daily_nav_cache',
+    source=ak.fund_open_fund_daily_em,
+    columns=[
+        ColumnSpec('基金代码'),
+        ColumnSpec('基金简称'),
+        ColumnSpec('净值日期', value=_nav_date('单位净值')),
+        ColumnSpec('单位净值', pattern='单位净值', dtype='float', default=None, required=True),
+        ColumnSpec('累计净值', pattern='累计净值', dtype='float', default=None),
+        ColumnSpec('日增长率'),
+        ColumnSpec('日增长值'),
+        ColumnSpec('申购状态'),
+        ColumnSpec('赎回状态'),
+        ColumnSpec('手续费'),
+        ColumnSpec('前一净值日期', value=_nav_date('前一单位净值')),
+        ColumnSpec('前一单位净值', pattern='单位净值', date_rank=1, dtype='float', default=None),
+        ColumnSpec('前一累计净值', pattern='累计净值', date_rank=1, dtype='float', default=None),
+    ],
+    primary_key=['基金代码'],
+)
+
+# 基金分红（每周全量）
+FUND_DIVIDEND = DatasetSpec(
+    name='fund_dividend',
+    label='基金分红',
+    table='fund_dividend',
+    source=ak.fund_fh_em,
+    columns=[
+        ColumnSpec('基金代码'),
+        ColumnSpec('基金简称'),
+        ColumnSpec('权益登记日'),
+        ColumnSpec('除息日期'),
+        ColumnSpec('分红', dtype='float', default=0.0),
+        ColumnSpec('分红发放日'),
+    ],
+    primary_key=['基金代码', '除息日期'],
+)
+
+# 基金评级（每周全量）
+FUND_RATING = DatasetSpec(
+    name='fund_rating_all',
+    label='基金评级',
+    table='fund_rating_all',
+    source=ak.fund_rating_all,
+    columns=[
+        ColumnSpec('代码'),
+        ColumnSpec('简称'),
+        ColumnSpec('基金经理'),
+        ColumnSpec('基金公司'),
+        ColumnSpec('5星评级家数', dtype='int', default=0),
+        ColumnSpec('上海证券', dtype='float', default=None),
+        ColumnSpec('招商证券', dtype='float', default=None),
+        ColumnSpec('济安金信', dtype='float', default=None),
+        ColumnSpec('晨星评级', dtype='float', default=None),
+        ColumnSpec('手续费', dtype='float', default=0.0),
+        ColumnSpec('类型'),
+    ],
+    primary_key=['代码'],
+)
+
+# 货币基金（每个交易日全量，列名带日期前缀，取最新日期）
+MONEY_FUND = DatasetSpec(
+    name='fund_money_cache',
+    label='货币基金',
+    table='fund_money_cache',
+    source=ak.fund_money_fund_daily_em,
+    columns=[
+        ColumnSpec('基金代码'),
+        ColumnSpec('基金简称'),
+        ColumnSpec('万份收益', pattern='万份收益', dtype='float', default=None, required=True),
+        ColumnSpec('七日年化', pattern=('7日年化', '七日年化'), null_tokens=('', '--', 'None'), required=True),
+        ColumnSpec('单位净值', pattern='单位净值'),
+        ColumnSpec('日涨幅', pattern='日涨幅'),
+        ColumnSpec('成立日期'),
+        ColumnSpec('基金经理'),
+        ColumnSpec('手续费'),
+        ColumnSpec('可购全部'),
+    ],
+    primary_key=['基金代码'],
+)
+
+# 基金申购赎回状态（每个交易日全量）
+FUND_PURCHASE_STATUS = DatasetSpec(
+    name='fund_purchase_status',
+    label='申购赎回状态',
+    table='fund_purchase_status',
+    source=ak.fund_purchase_em,
+    columns=[
+        ColumnSpec('序号', dtype='int', default=0),
+        ColumnSpec('基金代码'),
+        ColumnSpec('基金简称'),
+        ColumnSpec('基金类型'),
+        ColumnSpec('最新净值万份收益', source='最新净值/万份收益'),
+        ColumnSpec('最新净值万份收益报告时间', source='最新净值/万份收益-报告时间'),
+        ColumnSpec('申购状态'),
+        ColumnSpec('赎回状态'),
+        ColumnSpec('下一开放日'),
+        ColumnSpec('购买起点'),
+        ColumnSpec('日累计限定金额'),
+        ColumnSpec('手续费'),
+    ],
+    primary_key=['基金代码'],
+)
+
+# 基金公司规模（每周全量）
+FUND_COMPANY_AUM = DatasetSpec(
+    name='fund_company_aum',
+    label='基金公司规模',
+    table='fund_company_aum',
+    source=ak.fund_aum_em,
+    columns=[
+        ColumnSpec('序号', dtype='int', default=0),
+        ColumnSpec('基金公司'),
+        ColumnSpec('成立时间'),
+        ColumnSpec('全部管理规模', dtype='float', default=0.0),
+        ColumnSpec('全部基金数', dtype='int', default=0),
+        ColumnSpec('全部经理数', dtype='int', default=0),
+        ColumnSpec('更新日期'),
+    ],
+    primary_key=['基金公司'],
+)
+
+# 基金公司历史规模（按年份覆盖，调用参数 year）
+FUND_COMPANY_AUM_HIST = DatasetSpec(
+    name='fund_company_aum_hist',
+    label='基金公司历史规模',
+    table='fund_company_aum_hist',
+    source=ak.fund_aum_hist_em,
+    columns=[
+        ColumnSpec('序号', dtype='int', default=0),
+        ColumnSpec('基金公司'),
+        ColumnSpec('年份', value=lambda context: context['year']),
+        ColumnSpec('总规模', dtype='float', default=0.0),
+        ColumnSpec('股票型', dtype='float', default=0.0),
+        ColumnSpec('混合型', dtype='float', default=0.0),
+        ColumnSpec('债券型', dtype='float', default=0.0),
+        ColumnSpec('指数型', dtype='float', default=0.0),
+        ColumnSpec('QDII', dtype='float', default=0.0),
+        ColumnSpec('货币型', dtype='float', default=0.0),
+    ],
+    primary_key=['基金公司', '年份'],
+    refresh='upsert',
+)
+
+# 基金市场规模趋势（每周全量）
+FUND_MARKET_TREND = DatasetSpec(
+    name='fund_market_aum_trend',
+    label='市场规模趋势',
+    table='fund_market_aum_trend',
+    source=ak.fund_aum_trend_em,
+    columns=[
+        ColumnSpec('日期', source='date'),
+        ColumnSpec('市场总规模', source='value', dtype='float', default=0.0),
+    ],
+    primary_key=['日期'],
+)
+
+# 单只基金雪球风险指标（按需，调用参数 symbol）
+FUND_RISK_INDICATORS = DatasetSpec(
+    name='fund_risk_indicators_xq',
+    label='风险指标',
+    table='fund_risk_indicators_xq',
+    source=ak.fund_individual_analysis_xq,
+    columns=[
+        ColumnSpec('基金代码', value=lambda context: context['symbol']),
+        ColumnSpec('周期', dtype='raw'),
+        ColumnSpec('较同类风险收益比', dtype='int', default=0),
+        ColumnSpec('较同类抗风险波动', dtype='int', default=0),
+        ColumnSpec('年化波动率', dtype='float', default=0.0),
+        ColumnSpec('年化夏普比率', dtype='float', default=0.0),
+        ColumnSpec('最大回撤', dtype='float', default=0.0),
+    ],
+    primary_key=['基金代码', '周期'],
+    refresh='upsert',
+    # 按需写入，接口按 更新时间 判断是否过期，需要每次刷新 更新时间
+    track_changes=False,
+)
+
+
+# 所有数据集（名称 -> 定义）
+DATASETS = {
+    spec.name: spec for spec in (
+        FUND_VALUE_ESTIMATION,
+        FUND_DAILY_NAV,
+        FUND_DIVIDEND,
+        FUND_RATING,
+        MONEY_FUND,
+        FUND_PURCHASE_STATUS,
+        FUND_COMPANY_AUM,
+        FUND_COMPANY_AUM_HIST,
+        FUND_MARKET_TREND,
+        FUND_RISK_INDICATORS,
+    )
+}
@@ -0,0 +1,92 @@
+"""
+缓存过期抖动与概率提前刷新（XFetch）
+同时预热或同时写入的缓存键使用相同的 TTL 会同时过期，集中触发上游请求。这里提供两种分散手段:
+
+- 过期抖动: 按缓存键把 TTL 确定性地缩短 0 ~ EXPIRY_JITTER_RATIO，不同键的过期时间错开，
+  同一个键每次计算结果相同（各进程按数据库中的更新时间判断新鲜度时结论一致）
+- 概率提前刷新: 过期前每次读取都以一定概率触发刷新，越接近过期、计算（从上游获取）越慢，概率越高:
+  age - 计算耗时 * XFETCH_BETA * ln(random()) >= ttl
+  （Vattani 等, "Optimal Probabilistic Cache Stampede Prevention"）
+
+调用方在命中提前刷新时继续返回缓存数据，并通过单飞的后台任务刷新
+"""
+import os
+import math
+import random
+import hashlib
+import threading
+from typing import Any, Callable, Dict, Optional
+
+# 过期抖动比例: TTL 最多缩短的比例
+EXPIRY_JITTER_RATIO = float(os.getenv('CACHE_EXPIRY_JITTER_RATIO', 0.1))
+
+# 提前刷新系数: 越大越早刷新，0 表示关闭提前刷新
+XFETCH_BETA = float(os.getenv('CACHE_XFETCH_BETA', 1.0))
+
+# 没有记录计算耗时（如旧数据）时使用的耗时（秒）
+DEFAULT_COMPUTE_SECONDS = 1.0
+
+
+def jittered_ttl(ttl_seconds: float, key: str, ratio: float = EXPIRY_JITTER_RATIO) -> float:
+    """
+    按缓存键确定性地缩短 TTL
+
+    Args:
+        ttl_seconds: 配置的 TTL（秒）
+        key: 缓存键，如 'fund_ranking:股票型'
+        ratio: 最多缩短的比例
+
+    Returns:
+        ttl_seconds * (1 - ratio * f)，f 由缓存键的哈希决定，在 [0, 1) 内均匀分布
+    """
+    digest = hashlib.md5(key.encode('utf-8')).digest()
+    fraction = int.from_bytes(digest[:4], 'big') / 2 ** 32
+    return ttl_seconds * (1 - ratio * fraction)
+
+
+def should_refresh_early(age: float, ttl_seconds: float, compute_seconds: Optional[float],
+                         beta: float = XFETCH_BETA, rand: Callable[[], float] = random.random) -> bool:
+    """
+    XFetch 判断: 缓存是否应当（提前）刷新
+
+    Args:
+        age: 缓存年龄（秒）
+        ttl_seconds: TTL（秒，通常为 jittered_ttl 的结果）
+        compute_seconds: 上次计算该缓存的耗时（秒），None 时使用 DEFAULT_COMPUTE_SECONDS
+        beta: 提前刷新系数
+        rand: [0, 1) 随机数生成函数
+
+    Returns:
+        已过期，或本次读取抽中提前刷新时返回 True
+    """
+    if age >= ttl_seconds:
+        return True
+    if beta <= 0:
+        return False
+    delta = compute_seconds if compute_seconds and compute_seconds > 0 else DEFAULT_COMPUTE_SECONDS
+    # 1 - rand() 在 (0, 1] 内，对数不会出现 log(0)
+    return age - delta * beta * math.log(1.0 - rand()) >= ttl_seconds
+
+
+class EarlyExpiryStats:
+    """提前刷新统计（按缓存类型计数）"""
+
+    def __init__(self):
+        self.counts: Dict[str, int] = {}
+        self.lock = threading.Lock()
+
+    def record(self, cache_name: str):
+        with self.lock:
+            self.counts[cache_name] = self.counts.get(cache_name, 0) + 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                'jitter_ratio': EXPIRY_JITTER_RATIO,
+                'xfetch_beta': XFETCH_BETA,
+                'early_refreshes': dict(self.counts)
+            }
+
+
+# 全局提前刷新统计实例
+early_expiry_stats = EarlyExpiryStats()
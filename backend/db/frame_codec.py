@@ -0,0 +1,106 @@
+"""
+DataFrame 列式二进制编解码
+用 NumPy 的 npz 格式按列存储 DataFrame: 数值列保存为定长类型数组，文本列拼接为一段 UTF-8 字节，
+读取时不需要逐行解析 JSON，也不需要 pickle
+
+存储结构（npz 内的数组名）:
+- columns: 列名
+- rows: 行数
+- c{i}: 第 i 列的值（数值/布尔/时间列）
+- s{i}: 第 i 列的文本，以 \x00 分隔拼接后的 UTF-8 字节（uint8 数组）
+- j{i}: 第 i 列为混合类型时，每个值的 JSON 文本，同样以 \x00 分隔拼接
+- n{i}: 第 i 列的空值掩码（仅在有空值时存在）
+"""
+import io
+import json
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+# 文本列拼接分隔符（值中含有该字符时改用 JSON 保存）
+_SEPARATOR = '\x00'
+
+
+def _pack_texts(texts: list) -> np.ndarray:
+    """文本列表拼接为 UTF-8 字节数组"""
+    return np.frombuffer(_SEPARATOR.join(texts).encode('utf-8'), dtype=np.uint8)
+
+
+def _unpack_texts(packed: np.ndarray, count: int) -> list:
+    """还原 _pack_texts 拼接的文本列表"""
+    if count == 0:
+        return []
+    return packed.tobytes().decode('utf-8').split(_SEPARATOR)
+
+
+def encode_frame(df: pd.DataFrame) -> bytes:
+    """
+    将 DataFrame 编码为压缩的 npz 字节串
+
+    Args:
+        df: 任意 DataFrame（索引不保存）
+
+    Returns:
+        npz 字节串
+    """
+    arrays: Dict[str, np.ndarray] = {
+        'columns': np.array([str(col) for col in df.columns], dtype=str),
+        'rows': np.array(len(df))
+    }
+
+    for i, col in enumerate(df.columns):
+        series = df.iloc[:, i]
+        if series.dtype.kind in 'biufM':
+            arrays[f'c{i}'] = series.to_numpy()
+            continue
+
+        nulls = series.isna().to_numpy()
+        values = series[~nulls]
+        if nulls.any():
+            arrays[f'n{i}'] = nulls
+
+        if all(isinstance(value, str) and _SEPARATOR not in value for value in values):
+            arrays[f's{i}'] = _pack_texts(series.where(~nulls, '').tolist())
+        else:
+            # 混合类型列（字符串夹杂数字等）按 JSON 文本保存，解码时还原原始类型
+            arrays[f'j{i}'] = _pack_texts([
+                json.dumps(value, ensure_ascii=False, default=str) if not null else ''
+                for value, null in zip(series.tolist(), nulls)
+            ])
+
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, **arrays)
+    return buffer.getvalue()
+
+
+def decode_frame(payload: bytes) -> pd.DataFrame:
+    """
+    将 encode_frame 生成的字节串解码为 DataFrame
+
+    Args:
+        payload: npz 字节串
+
+    Returns:
+        DataFrame（文本列为 object 类型，空值为 None）
+    """
+    with np.load(io.BytesIO(payload), allow_pickle=False) as npz:
+        columns = npz['columns'].tolist()
+        row_count = int(npz['rows'])
+        data = {}
+        for i, col in enumerate(columns):
+            if f's{i}' in npz.files:
+                values = np.array(_unpack_texts(npz[f's{i}'], row_count), dtype=object)
+            elif f'j{i}' in npz.files:
+                values = np.array(
+                    [json.loads(text) if text else None for text in _unpack_texts(npz[f'j{i}'], row_count)],
+                    dtype=object
+                )
+            else:
+                values = npz[f'c{i}']
+            if f'n{i}' in npz.files:
+                values = values.astype(object)
+                values[npz[f'n{i}']] = None
+            data[col] = values
+
+    return pd.DataFrame(data, columns=columns)
@@ -0,0 +1,220 @@
+"""
+基金季度股票持仓缓存
+AkShare fund_portfolio_hold_em 按年份返回该年已披露的各季度持仓，保存到 fund_holdings_cache（持仓类型 'stock'）
+
+按定期报告披露时间判断季度是否定稿:
+- 1季度、3季度: 季度报告在季度结束后15个工作日内披露，当月底后视为定稿
+- 2季度、4季度: 季度报告之后，中期报告（8月底）/ 年度报告（次年3月底）会补充完整持仓，此后视为定稿
+
+已定稿的季度不再重新获取；只有已结束但未定稿的季度在披露期内定期刷新
+"""
+import re
+import time
+import logging
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+
+import akshare as ak
+import pandas as pd
+
+from .database import execute_query, execute_transaction
+
+logger = logging.getLogger(__name__)
+
+# 季度 -> (季度结束日, 定稿日期相对季度所在年的年份偏移, 定稿日期)
+QUARTER_CALENDAR = {
+    1: ('03-31', 0, '04-30'),
+    2: ('06-30', 0, '08-31'),
+    3: ('09-30', 0, '10-31'),
+    4: ('12-31', 1, '03-31'),
+}
+
+# 披露期内未定稿季度的刷新间隔（小时）
+HOLDINGS_REFRESH_HOURS = 6
+
+# 定时任务每次最多刷新的基金年份数（逐个请求上游）
+HOLDINGS_REFRESH_BATCH = 100
+
+# 报告期名称中的年份和季度，如 "2024年4季度股票投资明细"
+_REPORT_PERIOD = re.compile(r'(\d{4})年(\d)季度')
+
+
+def quarter_end(year: int, quarter: int) -> date:
+    """季度结束日"""
+    return date.fromisoformat(f"{year}-{QUARTER_CALENDAR[quarter][0]}")
+
+
+def quarter_final_date(year: int, quarter: int) -> date:
+    """季度持仓定稿日期（最后一份包含该季度持仓的定期报告的披露截止日）"""
+    _, offset, final = QUARTER_CALENDAR[quarter]
+    return date.fromisoformat(f"{year + offset}-{final}")
+
+
+def parse_report_period(label: str) -> Optional[tuple]:
+    """解析报告期名称，返回 (年份, 季度)，无法解析返回 None"""
+    match = _REPORT_PERIOD.search(str(label))
+    return (int(match.group(1)), int(match.group(2))) if match else None
+
+
+def is_refresh_due(year: int, state: Optional[Dict[str, Any]], now: Optional[datetime] = None) -> bool:
+    """
+    判断某基金某年份的持仓是否需要从上游获取
+
+    - 从未获取: 需要
+    - 全年已定稿: 不需要
+    - 上次获取后有季度到达定稿日期: 需要（获取定稿版本）
+    - 有已结束但未定稿的季度，且距上次获取超过 HOLDINGS_REFRESH_HOURS: 需要
+
+    Args:
+        year: 年份
+        state: 同步状态（见 get_sync_state）
+        now: 当前时间，默认 datetime.now()
+    """
+    if state is None:
+        return True
+    if state['已定稿']:
+        return False
+
+    now = now or datetime.now()
+    today = now.date()
+    synced_at = datetime.fromtimestamp(state['同步时间'])
+    for quarter in QUARTER_CALENDAR:
+        final = quarter_final_date(year, quarter)
+        if synced_at.date() <= final < today:
+            return True
+        if quarter_end(year, quarter) < today <= final and \
+                (now - synced_at).total_seconds() >= HOLDINGS_REFRESH_HOURS * 3600:
+            return True
+    return False
+
+
+def get_sync_state(fund_code: str, year: int) -> Optional[Dict[str, Any]]:
+    """
+    获取股票持仓同步状态
+
+    Returns:
+        {'同步时间': Unix时间戳, '已定稿': 0/1}，从未获取返回 None
+    """
+    rows = execute_query('''
+        SELECT 同步时间, 已定稿 FROM fund_holdings_sync
+        WHERE 基金代码 = ? AND 持仓类型 = 'stock' AND 年份 = ?
+    ''', (fund_code, year))
+    return rows[0] if rows else None
+
+
+def load_stock_holdings(fund_code: str, year: int) -> List[Dict[str, Any]]:
+    """
+    读取某年份的股票持仓（字段与 AkShare 返回一致，按季度、序号排序）
+    """
+    return execute_query('''
+        SELECT 序号, 股票代码, 股票名称, 占净值比例, 持股数, 持仓市值, 报告期 AS 季度
+        FROM fund_holdings_cache
+        WHERE 基金代码 = ? AND 持仓类型 = 'stock' AND 报告期 LIKE ?
+        ORDER BY 报告期, 序号
+    ''', (fund_code, f'{year}年%'))
+
+
+def store_stock_holdings(fund_code: str, year: int, df: Optional[pd.DataFrame]) -> int:
+    """
+    保存股票持仓: 按报告期整体替换，上次获取时已定稿且已保存的季度保持不变
+
+    Args:
+        fund_code: 基金代码
+        year: 年份
+        df: fund_portfolio_hold_em 的返回值（为空时只记录同步时间）
+
+    Returns:
+        写入的行数
+    """
+    frame = pd.DataFrame() if df is None else df
+    now = datetime.now()
+    year_final = now.date() > quarter_final_date(year, 4)
+
+    def store(conn):
+        row = conn.execute('''
+            SELECT 同步时间 FROM fund_holdings_sync
+            WHERE 基金代码 = ? AND 持仓类型 = 'stock' AND 年份 = ?
+        ''', (fund_code, year)).fetchone()
+        last_sync = datetime.fromtimestamp(row[0]).date() if row else None
+
+        written = 0
+        for period, group in (frame.groupby('季度', sort=False) if not frame.empty else ()):
+            parsed = parse_report_period(period)
+            if parsed is not None and last_sync is not None and last_sync > quarter_final_date(*parsed):
+                stored = conn.execute('''
+                    SELECT 1 FROM fund_holdings_cache
+                    WHERE 基金代码 = ? AND 持仓类型 = 'stock' AND 报告期 = ? LIMIT 1
+                ''', (fund_code, period)).fetchone()
+                if stored:
+                    continue
+
+            numeric = group[['占净值比例', '持股数', '持仓市值']].apply(pd.to_numeric, errors='coerce')
+            numeric = numeric.astype(object).where(numeric.notna(), None)
+            records = list(zip(
+                [fund_code] * len(group),
+                [str(period)] * len(group),
+                pd.to_numeric(group['序号'], errors='coerce').fillna(0).astype(int).tolist(),
+                group['股票代码'].astype(str).tolist(),
+                group['股票名称'].astype(str).tolist(),
+                numeric['占净值比例'].tolist(),
+                numeric['持股数'].tolist(),
+                numeric['持仓市值'].tolist(),
+            ))
+            conn.execute('''
+                DELETE FROM fund_holdings_cache
+                WHERE 基金代码 = ? AND 持仓类型 = 'stock' AND 报告期 = ?
+            ''', (fund_code, period))
+            conn.executemany('''
+                INSERT INTO fund_holdings_cache
+                (基金代码, 持仓类型, 报告期, 序号, 股票代码, 股票名称, 占净值比例, 持股数, 持仓市值, 更新时间)
+                VALUES (?, 'stock', ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ''', records)
+            written += len(records)
+
+        conn.execute('''
+            INSERT OR REPLACE INTO fund_holdings_sync (基金代码, 持仓类型, 年份, 同步时间, 已定稿)
+            VALUES (?, 'stock', ?, ?, ?)
+        ''', (fund_code, year, time.time(), int(year_final)))
+        return written
+
+    return execute_transaction(store)
+
+
+def sync_stock_holdings(fund_code: str, year: int) -> int:
+    """
+    从 AkShare 获取某年份的股票持仓并保存（在上游线程池或调度器线程中执行）
+
+    Returns:
+        写入的行数
+    """
+    df = ak.fund_portfolio_hold_em(symbol=fund_code, date=str(year))
+    written = store_stock_holdings(fund_code, year, df)
+    logger.info(f"[股票持仓] {fund_code} {year}年 同步完成，写入 {written} 条")
+    return written
+
+
+def refresh_pending_stock_holdings(limit: int = HOLDINGS_REFRESH_BATCH) -> int:
+    """
+    刷新已查看过、尚未定稿且到期的基金年份（供定时任务在披露期内调用）
+
+    Returns:
+        刷新的基金年份数
+    """
+    states = execute_query('''
+        SELECT 基金代码, 年份, 同步时间, 已定稿 FROM fund_holdings_sync
+        WHERE 持仓类型 = 'stock' AND 已定稿 = 0
+        ORDER BY 同步时间
+    ''')
+    now = datetime.now()
+    due = [state for state in states if is_refresh_due(state['年份'], state, now)][:limit]
+
+    refreshed = 0
+    for state in due:
+        try:
+            sync_stock_holdings(state['基金代码'], state['年份'])
+            refreshed += 1
+        except Exception as e:
+            logger.warning(f"[股票持仓] {state['基金代码']} {state['年份']}年 刷新失败: {e}")
+    if due:
+        logger.info(f"[股票持仓] 披露期刷新完成: {refreshed}/{len(due)}")
+    return refreshed
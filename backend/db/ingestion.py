@@ -0,0 +1,433 @@
+"""
+声明式数据入库管道
+数据集用 DatasetSpec 描述（数据源、列映射、类型、主键、刷新方式），
+由同一个引擎完成 拉取 -> 向量化类型转换 -> 分块写入，并记录各阶段耗时；
+每行按主键记录内容哈希，刷新时只写入新增、变化和删除的行
+
+新增数据集只需在 db/datasets.py 中增加一个 DatasetSpec
+"""
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+import logging
+
+import pandas as pd
+
+from .database import execute_query, execute_transaction, replace_table_rows, upsert_rows, _insert_rows
+from .table_versions import bump_table_version, table_versions
+
+logger = logging.getLogger(__name__)
+
+
+# 默认分块大小（每个写事务的行数）
+DEFAULT_CHUNK_SIZE = 5000
+
+# 变化行占比超过该比例时改为整表替换（比逐行覆盖更省）
+FULL_REFRESH_RATIO = 0.5
+
+# 多列主键拼接分隔符
+_KEY_SEPARATOR = '\x1f'
+
+# 列名中的日期前缀（如 "2025-11-15-单位净值"）
+_DATE_PREFIX = re.compile(r'^(\d{4}-\d{2}-\d{2})')
+
+
+class IngestionError(ValueError):
+    """数据格式不符合数据集定义（如缺少必需的列）"""
+
+
+def column_date(column: Any) -> Optional[str]:
+    """提取列名中的日期前缀，没有时返回 None"""
+    match = _DATE_PREFIX.match(str(column))
+    return match.group(1) if match else None
+
+
+class ColumnSpec:
+    """
+    单列定义
+
+    Args:
+        target: 写入的列名
+        source: 源列名（默认与 target 相同）
+        pattern: 动态列匹配子串（可为多个），用于带日期前缀的列，如 '估算数据-估算值'
+        date_rank: 动态列按日期从新到旧排序后取第几个（0 为最新）
+        dtype: 'str' / 'float' / 'int' / 'raw'（保持原值）
+        default: 缺失或无法转换时的值
+        null_tokens: 视为缺失的字符串（如 '--'）
+        value: 常量列，值或函数 value(context)，context 包含调用参数和已解析的列名
+        required: 动态列找不到时是否报错
+        hashed: 是否参与行哈希（每次都会变化的列，如 估算时间，应设为 False）
+    """
+
+    def __init__(self, target: str, source: Optional[str] = None,
+                 pattern: Union[str, Sequence[str], None] = None, date_rank: int = 0,
+                 dtype: str = 'str', default: Any = '', null_tokens: Sequence[str] = (),
+                 value: Any = None, required: bool = False, hashed: bool = True):
+        if dtype not in ('str', 'float', 'int', 'raw'):
+            raise ValueError(f"不支持的列类型: {dtype}")
+        self.target = target
+        self.source = source or target
+        self.patterns: Tuple[str, ...] = (pattern,) if isinstance(pattern, str) else tuple(pattern or ())
+        self.date_rank = date_rank
+        self.dtype = dtype
+        self.default = default
+        self.null_tokens = tuple(null_tokens)
+        self.value = value
+        self.required = required
+        self.hashed = hashed
+
+
+class DatasetSpec:
+    """
+    数据集定义
+
+    Args:
+        name: 数据集名称（用于统计）
+        label: 日志中的中文名称
+        table: 目标表
+        source: 数据源函数，source(**params) 返回 DataFrame
+        columns: 列定义
+        primary_key: 主键列（写入前按主键去重，保留第一条）
+        refresh: 'replace' 影子表整体替换 / 'upsert' 按主键覆盖
+        chunk_size: 分块写入的行数
+        track_changes: 是否按行哈希只写入变化的行（按需写入的小数据集可关闭，
+                       关闭后每次都覆盖写入并刷新 更新时间）
+    """
+
+    def __init__(self, name: str, label: str, table: str, source: Callable[..., pd.DataFrame],
+                 columns: List[ColumnSpec], primary_key: Sequence[str], refresh: str = 'replace',
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, track_changes: bool = True):
+        if refresh not in ('replace', 'upsert'):
+            raise ValueError(f"不支持的刷新方式: {refresh}")
+        self.name = name
+        self.label = label
+        self.table = table
+        self.source = source
+        self.columns = columns
+        self.primary_key = list(primary_key)
+        self.refresh = refresh
+        self.chunk_size = chunk_size
+        self.track_changes = track_changes
+
+    @property
+    def column_names(self) -> List[str]:
+        return [column.target for column in self.columns]
+
+    @property
+    def hashed_columns(self) -> List[str]:
+        return [column.target for column in self.columns if column.hashed]
+
+
+def resolve_columns(spec: DatasetSpec, df_columns: Sequence[Any]) -> Dict[str, Optional[str]]:
+    """
+    解析列定义对应的源列名（每个 DataFrame 只解析一次）
+
+    动态列: 匹配 pattern 的列按日期前缀从新到旧排序，取第 date_rank 个日期，
+    同一日期有多列匹配时取最后一列
+
+    Raises:
+        IngestionError: 必需的动态列不存在
+    """
+    resolved: Dict[str, Optional[str]] = {}
+    for column in spec.columns:
+        if column.value is not None:
+            continue
+        if not column.patterns:
+            resolved[column.target] = column.source if column.source in df_columns else None
+            continue
+
+        candidates = [c for c in df_columns if any(p in str(c) for p in column.patterns)]
+        dates = sorted({column_date(c) or '' for c in candidates}, reverse=True)
+        chosen = None
+        if column.date_rank < len(dates):
+            date = dates[column.date_rank]
+            chosen = [c for c in candidates if (column_date(c) or '') == date][-1]
+        if chosen is None and column.required:
+            raise IngestionError(f"{spec.label}: 未找到匹配 {column.patterns} 的列")
+        resolved[column.target] = chosen
+    return resolved
+
+
+def _coerce(series: pd.Series, column: ColumnSpec) -> list:
+    """按列类型整列转换，返回 Python 原生值列表"""
+    if column.null_tokens:
+        series = series.mask(series.astype(str).str.strip().isin(column.null_tokens))
+
+    if column.dtype in ('float', 'int'):
+        numeric = pd.to_numeric(series, errors='coerce')
+        valid = numeric.notna()
+        if column.dtype == 'int':
+            numeric = numeric.where(valid, 0).astype('int64')
+        return numeric.astype(object).where(valid, column.default).tolist()
+
+    if column.dtype == 'str':
+        return series.astype(str).where(series.notna(), column.default).tolist()
+
+    return series.astype(object).where(series.notna(), column.default).tolist()
+
+
+def transform(spec: DatasetSpec, df: pd.DataFrame, **params) -> pd.DataFrame:
+    """
+    将源 DataFrame 转换为目标表结构（列与 spec.columns 一致，值为 Python 原生类型）
+
+    Args:
+        spec: 数据集定义
+        df: 数据源返回的 DataFrame
+        params: 调用参数（常量列可引用，如 year、symbol）
+    """
+    resolved = resolve_columns(spec, list(df.columns))
+    context = {**params, 'columns': resolved}
+    rows = len(df)
+
+    data: Dict[str, list] = {}
+    for column in spec.columns:
+        if column.value is not None:
+            value = column.value(context) if callable(column.value) else column.value
+            data[column.target] = [value] * rows
+        elif resolved.get(column.target) is None:
+            data[column.target] = _coerce(pd.Series([None] * rows, dtype=object), column)
+        else:
+            data[column.target] = _coerce(df[resolved[column.target]], column)
+
+    frame = pd.DataFrame(data, columns=spec.column_names, dtype=object)
+    if spec.primary_key:
+        frame = frame.drop_duplicates(subset=spec.primary_key, keep='first')
+    return frame
+
+
+def to_records(frame: pd.DataFrame) -> List[tuple]:
+    """转换为写入用的元组列表"""
+    return list(zip(*(frame[column].tolist() for column in frame.columns)))
+
+
+def row_keys(frame: pd.DataFrame, primary_key: Sequence[str]) -> pd.Series:
+    """按主键拼接每行的键（多列主键用不可见分隔符连接）"""
+    keys = frame[primary_key[0]].astype(str)
+    for column in primary_key[1:]:
+        keys = keys + _KEY_SEPARATOR + frame[column].astype(str)
+    return keys
+
+
+def row_hashes(frame: pd.DataFrame, columns: Sequence[str]) -> pd.Series:
+    """计算每行内容哈希（有符号 64 位整数，便于存入 SQLite INTEGER）"""
+    hashes = pd.util.hash_pandas_object(frame[list(columns)], index=False)
+    return pd.Series(hashes.values.view('int64'), index=frame.index)
+
+
+def _table_changed(diff: Dict[str, Any]) -> bool:
+    """本次写入是否改变了表数据（全量写入总是视为有变化）"""
+    return diff['mode'] == 'full' or bool(diff['inserted'] or diff['updated'] or diff['deleted'])
+
+
+def _save_state(conn, spec: DatasetSpec, diff: Dict[str, Any]):
+    """记录数据集同步状态，数据有变化（或全量写入）时递增表版本（需在写事务中执行）"""
+    if _table_changed(diff):
+        bump_table_version(conn, spec.table)
+    conn.execute('''
+        INSERT OR REPLACE INTO dataset_sync_state
+        (数据集, 最后刷新时间, 写入模式, 行数, 新增, 更新, 删除, 未变)
+        VALUES (?, CURRENT_TIMESTAMP, ?, ?, ?, ?, ?, ?)
+    ''', (spec.name, diff['mode'], diff['rows'], diff['inserted'], diff['updated'],
+          diff['deleted'], diff['unchanged']))
+
+
+def _save_hashes(conn, spec: DatasetSpec, keys: list, hashes: list, replace_all: bool):
+    """写入行哈希（需在写事务中执行）"""
+    if replace_all:
+        conn.execute('DELETE FROM dataset_row_hashes WHERE 数据集 = ?', (spec.name,))
+    conn.executemany(
+        'INSERT OR REPLACE INTO dataset_row_hashes (数据集, 主键, 行哈希) VALUES (?, ?, ?)',
+        zip([spec.name] * len(keys), keys, hashes)
+    )
+
+
+def _write_all(spec: DatasetSpec, frame: pd.DataFrame, keys: pd.Series, hashes: pd.Series,
+               diff: Dict[str, Any]) -> int:
+    """全量写入: replace 整表替换 / upsert 全部覆盖，并重建行哈希"""
+    records = to_records(frame)
+
+    def finalize(conn):
+        if spec.track_changes:
+            _save_hashes(conn, spec, keys.tolist(), hashes.tolist(), replace_all=spec.refresh == 'replace')
+        _save_state(conn, spec, diff)
+
+    if spec.refresh == 'replace':
+        return replace_table_rows(spec.table, spec.column_names, records,
+                                  chunk_size=spec.chunk_size, finalize=finalize)
+
+    row_count = upsert_rows(spec.table, spec.column_names, records, chunk_size=spec.chunk_size)
+    execute_transaction(finalize)
+    return row_count
+
+
+def _write_changes(spec: DatasetSpec, frame: pd.DataFrame, keys: pd.Series, hashes: pd.Series,
+                   changed: pd.Series, deleted_keys: List[str], diff: Dict[str, Any]) -> int:
+    """只写入变化的行，数据和行哈希在同一个事务中更新"""
+    records = to_records(frame[changed])
+    changed_keys = keys[changed].tolist()
+    changed_hashes = hashes[changed].tolist()
+    where = ' AND '.join(f'"{column}" = ?' for column in spec.primary_key)
+    deleted_params = [tuple(key.split(_KEY_SEPARATOR)) for key in deleted_keys]
+
+    def apply(conn):
+        row_count = _insert_rows(conn, spec.table, spec.column_names, records) if records else 0
+        if deleted_params:
+            conn.executemany(f'DELETE FROM "{spec.table}" WHERE {where}', deleted_params)
+            conn.executemany(
+                'DELETE FROM dataset_row_hashes WHERE 数据集 = ? AND 主键 = ?',
+                [(spec.name, key) for key in deleted_keys]
+            )
+        _save_hashes(conn, spec, changed_keys, changed_hashes, replace_all=False)
+        _save_state(conn, spec, diff)
+        return row_count
+
+    return execute_transaction(apply)
+
+
+def write(spec: DatasetSpec, frame: pd.DataFrame) -> Dict[str, Any]:
+    """
+    写入转换后的数据
+
+    track_changes 开启时与已存的行哈希比较，只写入新增/变化的行并删除消失的行；
+    以下情况退回全量写入:
+    - 首次入库（没有行哈希）
+    - 表的行数与行哈希数量不一致（表被其他途径修改过）
+    - 变化行占比超过 FULL_REFRESH_RATIO
+
+    Returns:
+        {'mode': 'diff'/'full', 'rows', 'inserted', 'updated', 'deleted', 'unchanged', 'written'}
+    """
+    keys = row_keys(frame, spec.primary_key)
+    hashes = row_hashes(frame, spec.hashed_columns)
+    diff: Dict[str, Any] = {
+        'mode': 'full', 'rows': len(frame),
+        'inserted': len(frame), 'updated': 0, 'deleted': 0, 'unchanged': 0,
+    }
+
+    stored = []
+    if spec.track_changes:
+        stored = execute_query(
+            'SELECT 主键, 行哈希 FROM dataset_row_hashes WHERE 数据集 = ?', (spec.name,)
+        )
+    if not stored:
+        diff['written'] = _write_all(spec, frame, keys, hashes, diff)
+        return _committed(diff)
+
+    old = pd.Series([row['行哈希'] for row in stored], index=[row['主键'] for row in stored])
+    aligned = old.reindex(keys.values)
+    is_new = pd.Series(aligned.isna().values, index=frame.index)
+    is_changed = pd.Series((aligned.notna() & (aligned.values != hashes.values)).values, index=frame.index)
+    deleted_keys = old.index.difference(keys.values).tolist() if spec.refresh == 'replace' else []
+
+    diff.update({
+        'inserted': int(is_new.sum()),
+        'updated': int(is_changed.sum()),
+        'deleted': len(deleted_keys),
+    })
+    diff['unchanged'] = len(frame) - diff['inserted'] - diff['updated']
+    changes = diff['inserted'] + diff['updated'] + diff['deleted']
+
+    # replace 模式下表和行哈希应一一对应；upsert 模式下表中可能还有早于行哈希的旧数据
+    table_rows = execute_query(f'SELECT COUNT(*) AS n FROM "{spec.table}"')[0]['n']
+    out_of_sync = table_rows != len(old) if spec.refresh == 'replace' else table_rows < len(old)
+    if out_of_sync or changes > len(frame) * FULL_REFRESH_RATIO:
+        diff['written'] = _write_all(spec, frame, keys, hashes, diff)
+        return _committed(diff)
+
+    diff['mode'] = 'diff'
+    diff['written'] = _write_changes(spec, frame, keys, hashes, is_new | is_changed, deleted_keys, diff)
+    return _committed(diff)
+
+
+def _committed(diff: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    写事务已提交: 表版本有递增时让本进程的版本缓存过期
+    （在事务内过期的话，提交前的重新读取会把旧版本当作最新版本缓存）
+    """
+    if _table_changed(diff):
+        table_versions.expire()
+    return diff
+
+
+class IngestionStats:
+    """各数据集最近一次运行的统计"""
+
+    def __init__(self):
+        self.runs: Dict[str, Dict[str, Any]] = {}
+        self.lock = threading.Lock()
+
+    def record(self, name: str, result: Dict[str, Any]):
+        with self.lock:
+            self.runs[name] = result
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return dict(self.runs)
+
+
+# 全局统计实例
+ingestion_stats = IngestionStats()
+
+
+def run_dataset(spec: DatasetSpec, df: Optional[pd.DataFrame] = None, **params) -> Dict[str, Any]:
+    """
+    运行一次数据集入库: 拉取 -> 转换 -> 写入
+
+    Args:
+        spec: 数据集定义
+        df: 已拉取的数据（为空时调用 spec.source(**params)）
+        params: 数据源调用参数
+
+    Returns:
+        {'dataset', 'rows', 'source_rows', 'diff': 变更统计（见 write）,
+         'timings': {'fetch', 'transform', 'write', 'total'}, 'finished_at'}
+        数据源返回空数据时 rows 为 0，不写入
+    """
+    timings: Dict[str, float] = {}
+    started = time.perf_counter()
+
+    if df is None:
+        df = spec.source(**params)
+    timings['fetch'] = time.perf_counter() - started
+
+    result: Dict[str, Any] = {
+        'dataset': spec.name,
+        'rows': 0,
+        'source_rows': 0 if df is None else len(df),
+        'timings': timings,
+    }
+
+    if df is None or df.empty:
+        logger.warning(f"[数据入库] {spec.label}: 数据源返回空数据")
+    else:
+        stage_started = time.perf_counter()
+        frame = transform(spec, df, **params)
+        timings['transform'] = time.perf_counter() - stage_started
+
+        stage_started = time.perf_counter()
+        result['diff'] = write(spec, frame)
+        result['rows'] = result['diff']['rows']
+        timings['write'] = time.perf_counter() - stage_started
+
+    timings['total'] = time.perf_counter() - started
+    result['timings'] = {stage: round(seconds, 3) for stage, seconds in timings.items()}
+    result['finished_at'] = datetime.now().isoformat(timespec='seconds')
+    ingestion_stats.record(spec.name, result)
+
+    diff = result.get('diff')
+    diff_text = (
+        f"（{diff['mode']}: 新增 {diff['inserted']}，更新 {diff['updated']}，"
+        f"删除 {diff['deleted']}，未变 {diff['unchanged']}）"
+    ) if diff else ''
+    logger.info(
+        f"[数据入库] {spec.label}: {result['rows']} 条记录{diff_text}，"
+        + "，".join(f"{stage} {seconds:.2f}秒" for stage, seconds in result['timings'].items())
+    )
+    return result
+
+
+def get_ingestion_stats() -> Dict[str, Any]:
+    """获取各数据集最近一次运行的统计"""
+    return ingestion_stats.get_stats()
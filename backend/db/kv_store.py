@@ -0,0 +1,180 @@
+"""
+共享键值缓存存储（SQLite）
+作为多进程共享的二级缓存: 同一主机上的所有 uvicorn worker 读写同一个数据库文件，
+一个 worker 从上游取到的数据，其他 worker 直接复用
+
+- cache_kv: 缓存数据（pickle 序列化），过期时间为 Unix 时间戳，跨进程一致
+- cache_kv_changes: 变更日志，每次写入/删除追加一条，版本号单调递增；
+  各进程据此让本地一级缓存中对应的键失效
+"""
+import pickle
+import time
+import logging
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Tuple
+
+from .database import execute_query, execute_transaction
+from .writer import db_writer
+
+logger = logging.getLogger(__name__)
+
+# 变更日志保留时长（秒），超过后由清理任务删除
+CHANGE_LOG_RETENTION_SECONDS = 3600
+
+
+class SQLiteKVStore:
+    """基于 SQLite 的共享键值缓存存储（按命名空间隔离）"""
+
+    def get(self, namespace: str, key: str) -> Optional[Tuple[Any, float, int]]:
+        """
+        读取缓存
+
+        Args:
+            namespace: 命名空间
+            key: 缓存键
+
+        Returns:
+            (值, 过期时间戳, 版本号)，不存在或已过期返回 None
+        """
+        rows = execute_query(
+            'SELECT 值, 过期时间, 版本 FROM cache_kv WHERE 命名空间 = ? AND 键 = ? AND 过期时间 > ?',
+            (namespace, key, time.time())
+        )
+        if not rows:
+            return None
+        try:
+            value = pickle.loads(rows[0]['值'])
+        except Exception as e:
+            logger.warning(f"[共享缓存] 反序列化失败 {namespace}:{key}: {e}")
+            return None
+        return value, rows[0]['过期时间'], rows[0]['版本']
+
+    @staticmethod
+    def serialize(value: Any) -> bytes:
+        """序列化缓存值（异步调用方应在事件循环之外执行）"""
+        return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def _set_op(namespace: str, key: str, payload: bytes, ttl_seconds: float):
+        expires_at = time.time() + ttl_seconds
+
+        def write(conn):
+            version = _log_change(conn, namespace, key)
+            conn.execute(
+                'INSERT OR REPLACE INTO cache_kv (命名空间, 键, 值, 过期时间, 版本) VALUES (?, ?, ?, ?, ?)',
+                (namespace, key, payload, expires_at, version)
+            )
+            return version
+
+        return write
+
+    @staticmethod
+    def _delete_op(namespace: str, key: Optional[str]):
+        def remove(conn):
+            version = _log_change(conn, namespace, key)
+            if key is None:
+                conn.execute('DELETE FROM cache_kv WHERE 命名空间 = ?', (namespace,))
+            else:
+                conn.execute('DELETE FROM cache_kv WHERE 命名空间 = ? AND 键 = ?', (namespace, key))
+            return version
+
+        return remove
+
+    def set(self, namespace: str, key: str, value: Any, ttl_seconds: float) -> int:
+        """
+        写入缓存（经由单写线程，与变更日志在同一事务中，等待写入完成）
+
+        Returns:
+            本次写入的版本号
+        """
+        return execute_transaction(self._set_op(namespace, key, self.serialize(value), ttl_seconds))
+
+    def submit_set(self, namespace: str, key: str, payload: bytes, ttl_seconds: float) -> Future:
+        """
+        提交写入（不等待），供异步调用方 await asyncio.wrap_future(...)
+
+        Args:
+            payload: serialize() 的结果
+
+        Returns:
+            Future，结果为本次写入的版本号
+        """
+        return db_writer.submit_transaction(self._set_op(namespace, key, payload, ttl_seconds))
+
+    def delete(self, namespace: str, key: Optional[str] = None) -> int:
+        """
+        删除缓存，key 为 None 时删除整个命名空间（等待写入完成）
+
+        Returns:
+            本次删除的版本号
+        """
+        return execute_transaction(self._delete_op(namespace, key))
+
+    def submit_delete(self, namespace: str, key: Optional[str] = None) -> Future:
+        """提交删除（不等待），Future 结果为本次删除的版本号"""
+        return db_writer.submit_transaction(self._delete_op(namespace, key))
+
+    def changes_since(self, version: int) -> Tuple[List[Tuple[str, Optional[str], int]], int]:
+        """
+        获取某版本之后的变更
+
+        Args:
+            version: 已同步到的版本号
+
+        Returns:
+            ([(命名空间, 键, 版本号)], 最新版本号)；键为 None 表示整个命名空间
+        """
+        rows = execute_query(
+            'SELECT 版本, 命名空间, 键 FROM cache_kv_changes WHERE 版本 > ? ORDER BY 版本',
+            (version,)
+        )
+        changes = [(row['命名空间'], row['键'], row['版本']) for row in rows]
+        return changes, (changes[-1][2] if changes else version)
+
+    def current_version(self) -> int:
+        """当前最新版本号（进程启动时从此处开始同步）"""
+        rows = execute_query('SELECT MAX(版本) AS 版本 FROM cache_kv_changes')
+        return rows[0]['版本'] or 0
+
+    def clear_expired(self) -> Dict[str, int]:
+        """
+        删除已过期的缓存和过旧的变更日志
+
+        Returns:
+            {'entries': 删除的缓存条数, 'changes': 删除的日志条数}
+        """
+        now = time.time()
+
+        def clear(conn):
+            entries = conn.execute('DELETE FROM cache_kv WHERE 过期时间 <= ?', (now,)).rowcount
+            changes = conn.execute(
+                'DELETE FROM cache_kv_changes WHERE 变更时间 < ?',
+                (now - CHANGE_LOG_RETENTION_SECONDS,)
+            ).rowcount
+            return {'entries': entries, 'changes': changes}
+
+        return execute_transaction(clear)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """按命名空间统计条目数和数据量"""
+        rows = execute_query('''
+            SELECT 命名空间, COUNT(*) AS 条目数, SUM(LENGTH(值)) AS 字节数
+            FROM cache_kv GROUP BY 命名空间
+        ''')
+        return {
+            row['命名空间']: {'entries': row['条目数'], 'bytes': row['字节数'] or 0}
+            for row in rows
+        }
+
+
+def _log_change(conn, namespace: str, key: Optional[str]) -> int:
+    """追加一条变更日志，返回新版本号（在写事务内调用）"""
+    cursor = conn.execute(
+        'INSERT INTO cache_kv_changes (命名空间, 键, 变更时间) VALUES (?, ?, ?)',
+        (namespace, key, time.time())
+    )
+    return cursor.lastrowid
+
+
+# 全局共享缓存存储
+kv_store = SQLiteKVStore()
@@ -2,12 +2,21 @@
 定时任务调度器
 """
 from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.events import EVENT_JOB_EXECUTED
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.interval import IntervalTrigger
 from datetime import datetime, time
-import akshare as ak
-from .database import get_db, execute_many
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+from .database import release_db_after
 from .cache_helper import CacheHelper
+from .kv_store import kv_store
+from .holdings import refresh_pending_stock_holdings
+from .basic_info import refresh_stale_basic_info
+from .ingestion import DatasetSpec, run_dataset
+from .datasets import (
+    FUND_VALUE_ESTIMATION, FUND_DAILY_NAV, FUND_DIVIDEND, FUND_RATING, MONEY_FUND, FUND_PURCHASE_STATUS,
+    FUND_COMPANY_AUM, FUND_COMPANY_AUM_HIST, FUND_MARKET_TREND, FUND_RISK_INDICATORS
+)
 import logging
 
 # 配置日志
@@ -17,397 +26,105 @@ logger = logging.getLogger(__name__)
 # 全局调度器实例
 scheduler: BackgroundScheduler = None
 
+# 缓存预热任务: 名称 -> (预热函数, 完成后触发预热的任务 id, 定期预热间隔（分钟）)
+_warmers: Dict[str, Tuple[Callable[[], Any], Tuple[str, ...], Optional[int]]] = {}
 
+
+def _run_job(spec: DatasetSpec, **params) -> Optional[Dict[str, Any]]:
+    """
+    运行数据集入库任务，失败时记录日志后重新抛出
+    （调度器据此发出 EVENT_JOB_ERROR，失败的任务不会触发缓存预热）
+
+    Returns:
+        入库结果（见 run_dataset）
+    """
+    try:
+        logger.info(f"[定时任务] 开始更新{spec.label}数据...")
+        return run_dataset(spec, **params)
+    except Exception as e:
+        logger.error(f"[定时任务] {spec.label}数据更新失败: {str(e)}", exc_info=True)
+        raise
+
+
+@release_db_after
 def update_fund_estimation():
     """
     更新基金实时估值数据
     """
+    _run_job(FUND_VALUE_ESTIMATION)
+
+
+@release_db_after
+def update_fund_daily_nav():
+    """
+    更新开放式基金每日净值数据（交易日晚间净值公布期间每小时执行）
+    """
+    _run_job(FUND_DAILY_NAV)
+
+
+@release_db_after
+def refresh_stock_holdings():
+    """
+    刷新已查看过的基金中尚未定稿的季度股票持仓（只处理到期的基金年份，非披露期内没有到期项）
+    """
     try:
-        start_time = datetime.now()
-        logger.info("[定时任务] 开始更新基金估值数据...")
-
-        # 调用 AkShare API 获取全量估值数据
-        df = ak.fund_value_estimation_em()
-
-        if df is None or df.empty:
-            logger.warning("[定时任务] 获取估值数据为空")
-            return
-
-        # 准备批量插入的数据
-        records = []
-        for _, row in df.iterrows():
-            # 提取估算值和单位净值（字段名包含日期，需要动态查找）
-            估算值 = None
-            估算增长率 = None
-            单位净值 = None
-            日增长率 = None
-            估算时间 = None
-
-            for col in row.index:
-                if '估算数据-估算值' in col:
-                    估算值 = str(row[col]) if row[col] is not None else None
-                elif '估算数据-估算增长率' in col:
-                    估算增长率 = str(row[col]) if row[col] is not None else None
-                    # 提取估算时间（从列名中）
-                    if 估算时间 is None:
-                        date_part = col.split('-')[0]  # 如 "2025-11-15"
-                        估算时间 = f"{date_part} {datetime.now().strftime('%H:%M')}"
-                elif '公布数据-单位净值' in col:
-                    单位净值 = str(row[col]) if row[col] is not None else None
-                elif '公布数据-日增长率' in col:
-                    日增长率 = str(row[col]) if row[col] is not None else None
-
-            records.append((
-                row.get('基金代码', ''),
-                row.get('基金名称', ''),
-                估算时间,
-                估算值,
-                估算增长率,
-                单位净值,
-                日增长率,
-                row.get('估算偏差', '')
-            ))
-
-        # 批量更新数据库（使用 REPLACE INTO 自动覆盖）
-        query = '''
-            REPLACE INTO fund_value_estimation
-            (基金代码, 基金名称, 估算时间, 估算值, 估算增长率, 单位净值, 日增长率, 估算偏差, 更新时间)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-        '''
-
-        row_count = execute_many(query, records)
-
-        elapsed = (datetime.now() - start_time).total_seconds()
-        logger.info(f"[定时任务] 估值更新完成: {row_count} 条记录，耗时 {elapsed:.2f}秒")
+        refresh_pending_stock_holdings()
+    except Exception as e:
+        logger.error(f"[定时任务] 季度持仓刷新失败: {str(e)}", exc_info=True)
+
 
+@release_db_after
+def refresh_basic_info():
+    """
+    限速刷新过期的基金基本信息（每次最多 BASIC_INFO_REFRESH_BATCH 只基金）
+    """
+    try:
+        refresh_stale_basic_info()
     except Exception as e:
-        logger.error(f"[定时任务] 估值更新失败: {str(e)}", exc_info=True)
+        logger.error(f"[定时任务] 基金基本信息刷新失败: {str(e)}", exc_info=True)
 
 
+@release_db_after
 def update_fund_dividend():
     """
     更新基金分红数据（每周执行一次）
     """
-    try:
-        start_time = datetime.now()
-        logger.info("[定时任务] 开始更新基金分红数据...")
-
-        # 调用 AkShare API 获取全量分红数据
-        df = ak.fund_fh_em()
-
-        if df is None or df.empty:
-            logger.warning("[定时任务] 获取分红数据为空")
-            return
-
-        logger.info(f"[定时任务] 获取到原始数据 {len(df)} 条分红记录")
-
-        # 去重（按基金代码和除息日期去重，保留第一条）
-        df = df.drop_duplicates(subset=['基金代码', '除息日期'], keep='first')
-        logger.info(f"[定时任务] 去重后数据 {len(df)} 条分红记录")
-
-        # 准备批量插入的数据
-        records = []
-        for _, row in df.iterrows():
-            records.append((
-                str(row.get('基金代码', '')),
-                str(row.get('基金简称', '')),
-                str(row.get('权益登记日', '')),
-                str(row.get('除息日期', '')),
-                float(row.get('分红', 0)),
-                str(row.get('分红发放日', ''))
-            ))
-
-        # 先清空旧数据
-        conn = get_db()
-        cursor = conn.cursor()
-        cursor.execute('DELETE FROM fund_dividend')
-        conn.commit()
-        logger.info("[定时任务] 已清空旧分红数据")
-
-        # 批量插入新数据
-        query = '''
-            INSERT INTO fund_dividend
-            (基金代码, 基金简称, 权益登记日, 除息日期, 分红, 分红发放日, 更新时间)
-            VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-        '''
-
-        row_count = execute_many(query, records)
-
-        elapsed = (datetime.now() - start_time).total_seconds()
-        logger.info(f"[定时任务] 分红数据更新完成: {row_count} 条记录，耗时 {elapsed:.2f}秒")
-
-    except Exception as e:
-        logger.error(f"[定时任务] 分红数据更新失败: {str(e)}", exc_info=True)
+    _run_job(FUND_DIVIDEND)
 
 
+@release_db_after
 def update_fund_rating():
     """
     更新基金评级数据（每周执行一次）
     """
-    try:
-        start_time = datetime.now()
-        logger.info("[定时任务] 开始更新基金评级数据...")
-
-        # 调用 AkShare API 获取全量评级数据
-        df = ak.fund_rating_all()
-
-        if df is None or df.empty:
-            logger.warning("[定时任务] 获取评级数据为空")
-            return
-
-        logger.info(f"[定时任务] 获取到 {len(df)} 条评级记录")
-
-        # 准备批量插入的数据
-        records = []
-        for _, row in df.iterrows():
-            records.append((
-                str(row.get('代码', '')),
-                str(row.get('简称', '')),
-                str(row.get('基金经理', '')),
-                str(row.get('基金公司', '')),
-                int(row.get('5星评级家数', 0)),
-                float(row.get('上海证券')) if row.get('上海证券') is not None else None,
-                float(row.get('招商证券')) if row.get('招商证券') is not None else None,
-                float(row.get('济安金信')) if row.get('济安金信') is not None else None,
-                float(row.get('晨星评级')) if row.get('晨星评级') is not None else None,
-                float(row.get('手续费', 0)),
-                str(row.get('类型', ''))
-            ))
-
-        # 先清空旧数据
-        conn = get_db()
-        cursor = conn.cursor()
-        cursor.execute('DELETE FROM fund_rating_all')
-        conn.commit()
-        logger.info("[定时任务] 已清空旧评级数据")
-
-        # 批量插入新数据
-        query = '''
-            INSERT INTO fund_rating_all
-            (代码, 简称, 基金经理, 基金公司, "5星评级家数", 上海证券, 招商证券, 济安金信, 晨星评级, 手续费, 类型, 更新时间)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-        '''
-
-        row_count = execute_many(query, records)
-
-        elapsed = (datetime.now() - start_time).total_seconds()
-        logger.info(f"[定时任务] 评级数据更新完成: {row_count} 条记录，耗时 {elapsed:.2f}秒")
-
-    except Exception as e:
-        logger.error(f"[定时任务] 评级数据更新失败: {str(e)}", exc_info=True)
+    _run_job(FUND_RATING)
 
 
+@release_db_after
 def update_money_fund():
     """
     更新货币基金数据（每个交易日执行）
     """
-    try:
-        start_time = datetime.now()
-        logger.info("[定时任务] 开始更新货币基金数据...")
-
-        # 调用 AkShare API 获取货币基金数据
-        df = ak.fund_money_fund_daily_em()
-
-        if df is None or df.empty:
-            logger.warning("[定时任务] 获取货币基金数据为空")
-            return
-
-        logger.info(f"[定时任务] 获取到 {len(df)} 条货币基金记录")
-
-        # 解析动态字段名（日期格式：YYYY-MM-DD-字段名）
-        date_columns = [col for col in df.columns if '-' in str(col) and str(col).count('-') >= 3]
-
-        if not date_columns:
-            logger.error("[定时任务] 未找到日期列")
-            return
-
-        # 提取日期部分并获取最新日期
-        dates = sorted(set([str(col)[:10] for col in date_columns if len(str(col)) >= 10]), reverse=True)
-        latest_date = dates[0] if dates else None
-
-        logger.info(f"[定时任务] 使用最新日期: {latest_date}")
-
-        # 构建字段映射
-        field_mapping = {}
-        for col in df.columns:
-            if latest_date and latest_date in str(col):
-                if '万份收益' in str(col):
-                    field_mapping['万份收益'] = col
-                elif '7日年化' in str(col) or '七日年化' in str(col):
-                    field_mapping['七日年化'] = col
-                elif '单位净值' in str(col):
-                    field_mapping['单位净值'] = col
-                elif '日涨幅' in str(col):
-                    field_mapping['日涨幅'] = col
-
-        # 准备批量插入的数据
-        records = []
-        for _, row in df.iterrows():
-            try:
-                # 解析数值
-                wan_fen_shouyi = row.get(field_mapping.get('万份收益', ''), None)
-                qi_ri_nianhua = row.get(field_mapping.get('七日年化', ''), None)
-
-                # 转换万份收益为浮点数
-                try:
-                    wan_fen_shouyi = float(wan_fen_shouyi) if wan_fen_shouyi not in [None, '', '--'] else None
-                except (ValueError, TypeError):
-                    wan_fen_shouyi = None
-
-                # 七日年化保持字符串格式
-                qi_ri_nianhua = str(qi_ri_nianhua) if qi_ri_nianhua not in [None, '', '--', 'None'] else ''
-
-                records.append((
-                    str(row.get('基金代码', '')),
-                    str(row.get('基金简称', '')),
-                    wan_fen_shouyi,
-                    qi_ri_nianhua,
-                    str(row.get(field_mapping.get('单位净值', ''), '')),
-                    str(row.get(field_mapping.get('日涨幅', ''), '')),
-                    str(row.get('成立日期', '')),
-                    str(row.get('基金经理', '')),
-                    str(row.get('手续费', '')),
-                    str(row.get('可购全部', ''))
-                ))
-            except Exception as row_error:
-                logger.warning(f"[定时任务] 处理行数据失败: {row_error}")
-                continue
-
-        # 先清空旧数据
-        conn = get_db()
-        cursor = conn.cursor()
-        cursor.execute('DELETE FROM fund_money_cache')
-        conn.commit()
-        logger.info("[定时任务] 已清空旧货币基金数据")
-
-        # 批量插入新数据
-        if records:
-            cursor.executemany('''
-                INSERT OR REPLACE INTO fund_money_cache
-                (基金代码, 基金简称, 万份收益, 七日年化, 单位净值, 日涨幅,
-                 成立日期, 基金经理, 手续费, 可购全部, 更新时间)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-            ''', records)
-            conn.commit()
-
-            elapsed = (datetime.now() - start_time).total_seconds()
-            logger.info(f"[定时任务] 货币基金数据更新完成: {len(records)} 条记录，耗时 {elapsed:.2f}秒")
-
-    except Exception as e:
-        logger.error(f"[定时任务] 货币基金数据更新失败: {str(e)}", exc_info=True)
+    _run_job(MONEY_FUND)
 
 
+@release_db_after
 def update_fund_purchase_status():
     """
     更新基金申购赎回状态数据（每日更新）
     """
-    try:
-        start_time = datetime.now()
-        logger.info("[定时任务] 开始更新基金申购赎回状态...")
-
-        # 调用 AkShare API 获取全量申购赎回数据
-        df = ak.fund_purchase_em()
-
-        if df is None or df.empty:
-            logger.warning("[定时任务] 获取申购赎回数据为空")
-            return
-
-        logger.info(f"[定时任务] 获取到 {len(df)} 条申购赎回记录")
-
-        # 准备批量插入的数据
-        records = []
-        for _, row in df.iterrows():
-            records.append((
-                int(row.get('序号', 0)),
-                str(row.get('基金代码', '')),
-                str(row.get('基金简称', '')),
-                str(row.get('基金类型', '')),
-                str(row.get('最新净值/万份收益', '')),
-                str(row.get('最新净值/万份收益-报告时间', '')),
-                str(row.get('申购状态', '')),
-                str(row.get('赎回状态', '')),
-                str(row.get('下一开放日', '')),
-                str(row.get('购买起点', '')),
-                str(row.get('日累计限定金额', '')),
-                str(row.get('手续费', ''))
-            ))
-
-        # 先清空旧数据
-        conn = get_db()
-        cursor = conn.cursor()
-        cursor.execute('DELETE FROM fund_purchase_status')
-        conn.commit()
-        logger.info("[定时任务] 已清空旧申购赎回数据")
-
-        # 批量插入新数据
-        query = '''
-            INSERT INTO fund_purchase_status
-            (序号, 基金代码, 基金简称, 基金类型, 最新净值万份收益, 最新净值万份收益报告时间,
-             申购状态, 赎回状态, 下一开放日, 购买起点, 日累计限定金额, 手续费, 更新时间)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-        '''
-
-        row_count = execute_many(query, records)
-
-        elapsed = (datetime.now() - start_time).total_seconds()
-        logger.info(f"[定时任务] 申购赎回数据更新完成: {row_count} 条记录，耗时 {elapsed:.2f}秒")
-
-    except Exception as e:
-        logger.error(f"[定时任务] 申购赎回数据更新失败: {str(e)}", exc_info=True)
+    _run_job(FUND_PURCHASE_STATUS)
 
 
+@release_db_after
 def update_fund_company_aum():
     """
     更新基金公司规模数据（每周更新）
     """
-    try:
-        start_time = datetime.now()
-        logger.info("[定时任务] 开始更新基金公司规模数据...")
-
-        # 调用 AkShare API 获取基金公司规模数据
-        df = ak.fund_aum_em()
-
-        if df is None or df.empty:
-            logger.warning("[定时任务] 获取基金公司规模数据为空")
-            return
-
-        logger.info(f"[定时任务] 获取到 {len(df)} 家基金公司规模数据")
-
-        # 准备批量插入的数据
-        records = []
-        for _, row in df.iterrows():
-            records.append((
-                int(row.get('序号', 0)),
-                str(row.get('基金公司', '')),
-                str(row.get('成立时间', '')),
-                float(row.get('全部管理规模', 0)),
-                int(row.get('全部基金数', 0)),
-                int(row.get('全部经理数', 0)),
-                str(row.get('更新日期', ''))
-            ))
-
-        # 先清空旧数据
-        conn = get_db()
-        cursor = conn.cursor()
-        cursor.execute('DELETE FROM fund_company_aum')
-        conn.commit()
-
-        # 批量插入新数据
-        query = '''
-            INSERT INTO fund_company_aum
-            (序号, 基金公司, 成立时间, 全部管理规模, 全部基金数, 全部经理数, 更新日期, 更新时间)
-            VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-        '''
-
-        row_count = execute_many(query, records)
-
-        elapsed = (datetime.now() - start_time).total_seconds()
-        logger.info(f"[定时任务] 基金公司规模数据更新完成: {row_count} 条记录，耗时 {elapsed:.2f}秒")
-
-    except Exception as e:
-        logger.error(f"[定时任务] 基金公司规模数据更新失败: {str(e)}", exc_info=True)
+    _run_job(FUND_COMPANY_AUM)
 
 
+@release_db_after
 def update_fund_company_aum_hist(year: str = None):
     """
     更新基金公司规模历史数据（年度数据）
@@ -415,101 +132,18 @@ def update_fund_company_aum_hist(year: str = None):
     Args:
         year: 年份，默认为当前年份
     """
-    try:
-        if year is None:
-            year = str(datetime.now().year)
-
-        start_time = datetime.now()
-        logger.info(f"[定时任务] 开始更新 {year} 年基金公司规模历史数据...")
-
-        # 调用 AkShare API
-        df = ak.fund_aum_hist_em(year=year)
-
-        if df is None or df.empty:
-            logger.warning(f"[定时任务] 获取 {year} 年基金公司规模历史数据为空")
-            return
-
-        logger.info(f"[定时任务] 获取到 {len(df)} 家基金公司 {year} 年规模历史数据")
-
-        # 准备批量插入的数据
-        records = []
-        for _, row in df.iterrows():
-            records.append((
-                int(row.get('序号', 0)),
-                str(row.get('基金公司', '')),
-                year,
-                float(row.get('总规模', 0)),
-                float(row.get('股票型', 0)),
-                float(row.get('混合型', 0)),
-                float(row.get('债券型', 0)),
-                float(row.get('指数型', 0)),
-                float(row.get('QDII', 0)),
-                float(row.get('货币型', 0))
-            ))
-
-        # 使用 REPLACE INTO 自动覆盖旧数据
-        query = '''
-            REPLACE INTO fund_company_aum_hist
-            (序号, 基金公司, 年份, 总规模, 股票型, 混合型, 债券型, 指数型, QDII, 货币型, 更新时间)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-        '''
-
-        row_count = execute_many(query, records)
-
-        elapsed = (datetime.now() - start_time).total_seconds()
-        logger.info(f"[定时任务] {year} 年基金公司规模历史数据更新完成: {row_count} 条记录，耗时 {elapsed:.2f}秒")
-
-    except Exception as e:
-        logger.error(f"[定时任务] {year} 年基金公司规模历史数据更新失败: {str(e)}", exc_info=True)
+    _run_job(FUND_COMPANY_AUM_HIST, year=year or str(datetime.now().year))
 
 
+@release_db_after
 def update_fund_market_trend():
     """
     更新基金市场规模趋势数据（季度数据）
     """
-    try:
-        start_time = datetime.now()
-        logger.info("[定时任务] 开始更新基金市场规模趋势数据...")
-
-        # 调用 AkShare API
-        df = ak.fund_aum_trend_em()
-
-        if df is None or df.empty:
-            logger.warning("[定时任务] 获取基金市场规模趋势数据为空")
-            return
-
-        logger.info(f"[定时任务] 获取到 {len(df)} 条市场规模趋势数据")
-
-        # 准备批量插入的数据
-        records = []
-        for _, row in df.iterrows():
-            records.append((
-                str(row.get('date', '')),
-                float(row.get('value', 0))
-            ))
-
-        # 先清空旧数据
-        conn = get_db()
-        cursor = conn.cursor()
-        cursor.execute('DELETE FROM fund_market_aum_trend')
-        conn.commit()
-
-        # 批量插入新数据
-        query = '''
-            INSERT INTO fund_market_aum_trend
-            (日期, 市场总规模, 更新时间)
-            VALUES (?, ?, CURRENT_TIMESTAMP)
-        '''
-
-        row_count = execute_many(query, records)
-
-        elapsed = (datetime.now() - start_time).total_seconds()
-        logger.info(f"[定时任务] 基金市场规模趋势数据更新完成: {row_count} 条记录，耗时 {elapsed:.2f}秒")
-
-    except Exception as e:
-        logger.error(f"[定时任务] 基金市场规模趋势数据更新失败: {str(e)}", exc_info=True)
+    _run_job(FUND_MARKET_TREND)
 
 
+@release_db_after
 def update_fund_risk_indicators_single(fund_code: str) -> bool:
     """
     更新单个基金的雪球风险指标数据（按需调用）
@@ -521,44 +155,13 @@ def update_fund_risk_indicators_single(fund_code: str) -> bool:
         bool: 是否成功
     """
     try:
-        logger.info(f"[风险指标] 开始更新基金 {fund_code} 的风险指标...")
-
-        # 调用 AkShare 雪球API
-        df = ak.fund_individual_analysis_xq(symbol=fund_code)
-
-        if df is None or df.empty:
-            logger.warning(f"[风险指标] 基金 {fund_code} 无风险指标数据")
-            return False
-
-        # 准备批量插入的数据
-        records = []
-        for _, row in df.iterrows():
-            records.append((
-                fund_code,
-                row.get('周期', ''),
-                int(row.get('较同类风险收益比', 0)),
-                int(row.get('较同类抗风险波动', 0)),
-                float(row.get('年化波动率', 0)),
-                float(row.get('年化夏普比率', 0)),
-                float(row.get('最大回撤', 0))
-            ))
-
-        # 批量更新数据库（使用 REPLACE INTO 自动覆盖）
-        query = '''
-            REPLACE INTO fund_risk_indicators_xq
-            (基金代码, 周期, 较同类风险收益比, 较同类抗风险波动, 年化波动率, 年化夏普比率, 最大回撤, 更新时间)
-            VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-        '''
-
-        row_count = execute_many(query, records)
-        logger.info(f"[风险指标] 基金 {fund_code} 风险指标更新完成: {row_count} 条记录")
-        return True
-
-    except Exception as e:
-        logger.error(f"[风险指标] 基金 {fund_code} 风险指标更新失败: {str(e)}", exc_info=True)
+        result = _run_job(FUND_RISK_INDICATORS, symbol=fund_code)
+    except Exception:
         return False
+    return bool(result['rows'])
 
 
+@release_db_after
 def clear_expired_cache_job():
     """
     清理过期缓存任务（每30分钟执行一次）
@@ -566,11 +169,71 @@ def clear_expired_cache_job():
     try:
         logger.info("[定时任务] 开始清理过期缓存...")
         CacheHelper.clear_expired_cache()
-        logger.info("[定时任务] 过期缓存清理完成")
+        removed = kv_store.clear_expired()
+        logger.info(f"[定时任务] 过期缓存清理完成，共享缓存清除 {removed['entries']} 项、变更日志 {removed['changes']} 条")
     except Exception as e:
         logger.error(f"[定时任务] 清理过期缓存失败: {str(e)}", exc_info=True)
 
 
+def register_warmer(name: str, func: Callable[[], Any], after_jobs: Iterable[str] = (),
+                    interval_minutes: Optional[int] = None):
+    """
+    注册缓存预热任务: 调度器启动时执行一次，之后在 after_jobs 中的任务成功完成后再次执行；
+    指定 interval_minutes 时另外每隔该时间执行一次（任务 id 为 refresh_<name>），
+    用于不由定时任务写入、按 TTL 过期的缓存（需在 start_scheduler 之前注册）
+
+    Args:
+        name: 预热任务名称
+        func: 同步预热函数（在调度器线程中执行）
+        after_jobs: 触发预热的定时任务 id，如 'update_money_fund'
+        interval_minutes: 定期预热间隔（分钟），None 表示不定期预热
+    """
+    _warmers[name] = (release_db_after(func), tuple(after_jobs), interval_minutes)
+    triggers = list(after_jobs) + ([f'每{interval_minutes}分钟'] if interval_minutes else [])
+    logger.info(f"[缓存预热] 已注册预热任务 {name}，触发任务: {', '.join(triggers) or '仅启动时'}")
+
+
+def run_warmer(name: str):
+    """
+    执行一个预热任务，失败时记录日志
+    """
+    func = _warmers[name][0]
+    started = datetime.now()
+    try:
+        logger.info(f"[缓存预热] 开始预热 {name}")
+        func()
+        logger.info(f"[缓存预热] {name} 预热完成，耗时 {(datetime.now() - started).total_seconds():.1f} 秒")
+    except Exception as e:
+        logger.error(f"[缓存预热] {name} 预热失败: {str(e)}", exc_info=True)
+
+
+def schedule_warmup(names: Optional[Iterable[str]] = None):
+    """
+    立即在调度器线程中执行预热任务（同名预热任务排队中时不重复添加）
+
+    Args:
+        names: 预热任务名称，默认全部
+    """
+    if scheduler is None:
+        return
+    for name in (names if names is not None else list(_warmers)):
+        scheduler.add_job(
+            run_warmer,
+            args=[name],
+            id=f'warm_{name}',
+            replace_existing=True,
+            misfire_grace_time=None
+        )
+
+
+def _on_job_executed(event):
+    """定时任务成功完成后，触发依赖它的预热任务"""
+    names = [name for name, (_, after_jobs, _) in _warmers.items() if event.job_id in after_jobs]
+    if names:
+        logger.info(f"[缓存预热] 任务 {event.job_id} 已完成，触发预热: {', '.join(names)}")
+        schedule_warmup(names)
+
+
 def start_scheduler():
     """
     启动定时任务调度器
@@ -624,6 +287,30 @@ def start_scheduler():
         replace_existing=True
     )
 
+    # 任务5.1: 每个交易日 08:10 及 16:10-23:10 每小时更新开放式基金净值（净值在晚间陆续公布）
+    scheduler.add_job(
+        update_fund_daily_nav,
+        CronTrigger(day_of_week='mon-fri', hour='8,16-23', minute=10),
+        id='update_fund_daily_nav',
+        replace_existing=True
+    )
+
+    # 任务5.2: 每天 07:30 刷新未定稿的季度股票持仓（披露期内）
+    scheduler.add_job(
+        refresh_stock_holdings,
+        CronTrigger(hour=7, minute=30),
+        id='refresh_stock_holdings',
+        replace_existing=True
+    )
+
+    # 任务5.3: 每5分钟限速刷新过期的基金基本信息
+    scheduler.add_job(
+        refresh_basic_info,
+        IntervalTrigger(minutes=5),
+        id='refresh_basic_info',
+        replace_existing=True
+    )
+
     # 任务6: 每30分钟清理一次过期缓存
     scheduler.add_job(
         clear_expired_cache_job,
@@ -656,18 +343,41 @@ def start_scheduler():
         replace_existing=True
     )
 
+    # 任务10: 按 TTL 过期的缓存定期预热（见 register_warmer 的 interval_minutes）
+    for name, (_, _, interval_minutes) in _warmers.items():
+        if interval_minutes:
+            scheduler.add_job(
+                run_warmer,
+                IntervalTrigger(minutes=interval_minutes),
+                args=[name],
+                id=f'refresh_{name}',
+                replace_existing=True
+            )
+
+    # 任务成功完成后触发对应的缓存预热（失败的任务发出 EVENT_JOB_ERROR，不触发）
+    scheduler.add_listener(_on_job_executed, EVENT_JOB_EXECUTED)
+
     # 启动调度器
     scheduler.start()
     logger.info("[调度器] 定时任务调度器已启动")
     logger.info("[调度器] - 货币基金更新: 每个交易日 09:30")
     logger.info("[调度器] - 估值更新: 每个交易日 09:00-15:00 每30分钟（跳过12:00-12:30）")
     logger.info("[调度器] - 申购赎回状态更新: 每个交易日 08:00")
+    logger.info("[调度器] - 开放式基金净值更新: 每个交易日 08:10、16:10-23:10 每小时")
+    logger.info("[调度器] - 季度持仓刷新: 每天 07:30（仅未定稿的季度）")
+    logger.info("[调度器] - 基金基本信息刷新: 每5分钟（仅过期条目，限速）")
     logger.info("[调度器] - 分红更新: 每周日 03:00")
     logger.info("[调度器] - 评级更新: 每周日 04:00")
     logger.info("[调度器] - 基金公司规模更新: 每周日 05:00")
     logger.info("[调度器] - 市场规模趋势更新: 每周日 05:30")
     logger.info("[调度器] - 公司历史规模更新: 每季度首日 06:00")
     logger.info("[调度器] - 缓存清理: 每30分钟")
+    for name, (_, _, interval_minutes) in _warmers.items():
+        if interval_minutes:
+            logger.info(f"[调度器] - 缓存预热 {name}: 每{interval_minutes}分钟")
+
+    # 启动时预热所有缓存
+    schedule_warmup()
 
 
 def stop_scheduler():
@@ -680,3 +390,28 @@ def stop_scheduler():
         scheduler.shutdown()
         scheduler = None
         logger.info("[调度器] 定时任务调度器已停止")
+
+
+def next_run_time(*job_ids: str) -> Optional[datetime]:
+    """
+    获取若干定时任务中最早的下次运行时间（用于推算接口数据的有效期）
+
+    Args:
+        job_ids: 任务 ID，如 'update_rating'
+
+    Returns:
+        带时区的下次运行时间，调度器未运行或任务都不存在（已暂停）时返回 None
+    """
+    if scheduler is None:
+        return None
+    times = []
+    for job_id in job_ids:
+        job = scheduler.get_job(job_id)
+        if job is None:
+            continue
+        # 调度器启动前添加的任务还没有 next_run_time，按触发器推算
+        run_time = getattr(job, 'next_run_time', None) or \
+            job.trigger.get_next_fire_time(None, datetime.now(scheduler.timezone))
+        if run_time is not None:
+            times.append(run_time)
+    return min(times) if times else None
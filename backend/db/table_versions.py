@@ -0,0 +1,80 @@
+"""
+数据表版本
+入库写入有变化时，在同一个写事务中递增 table_versions 中该表的版本号，
+事务提交后再让本进程的版本缓存过期（提交前重新读取只能读到旧版本）；
+接口据此生成 ETag，版本不变时客户端缓存的响应仍然有效
+
+版本号在进程内缓存，每 TABLE_VERSION_CHECK_SECONDS 秒最多读取一次数据库（一条查询读取所有表），
+其他进程（如运行定时任务的 worker）递增的版本最迟在该间隔后可见
+"""
+import threading
+import time
+from typing import Dict, Tuple
+
+from .database import execute_query
+from .async_db import async_db
+
+# 进程内版本缓存的有效期（秒）
+TABLE_VERSION_CHECK_SECONDS = 1.0
+
+
+def bump_table_version(conn, table: str):
+    """
+    递增数据表版本（需在写事务中执行，事务提交后由调用方执行 table_versions.expire()）
+
+    Args:
+        conn: 写事务所在的数据库连接
+        table: 表名
+    """
+    conn.execute('''
+        INSERT INTO table_versions (表名, 版本, 更新时间) VALUES (?, 1, ?)
+        ON CONFLICT(表名) DO UPDATE SET 版本 = 版本 + 1, 更新时间 = excluded.更新时间
+    ''', (table, time.time()))
+
+
+class TableVersions:
+    """数据表版本的进程内缓存"""
+
+    def __init__(self, check_interval: float = TABLE_VERSION_CHECK_SECONDS):
+        self.check_interval = check_interval
+        # 表名 -> (版本, 更新时间)
+        self.versions: Dict[str, Tuple[int, float]] = {}
+        self.loaded_at = 0.0
+        self.lock = threading.Lock()
+
+    def _due(self) -> bool:
+        return time.monotonic() - self.loaded_at >= self.check_interval
+
+    def expire(self):
+        """让进程内缓存立即过期（本进程的写事务提交后调用）"""
+        self.loaded_at = 0.0
+
+    def reload(self):
+        """从数据库读取所有表的版本"""
+        rows = execute_query('SELECT 表名, 版本, 更新时间 FROM table_versions')
+        with self.lock:
+            self.versions = {row['表名']: (row['版本'], row['更新时间']) for row in rows}
+            self.loaded_at = time.monotonic()
+
+    def get(self, *tables: str) -> Tuple[Tuple[int, float], ...]:
+        """
+        获取若干数据表的版本（缓存过期时先从数据库重新读取）
+
+        Returns:
+            每个表的 (版本, 更新时间)，从未写入过的表为 (0, 0.0)
+        """
+        if self._due():
+            self.reload()
+        with self.lock:
+            return tuple(self.versions.get(table, (0, 0.0)) for table in tables)
+
+    async def aget(self, *tables: str) -> Tuple[Tuple[int, float], ...]:
+        """异步获取数据表版本: 缓存有效时直接返回，否则在数据库读线程中重新读取"""
+        if self._due():
+            await async_db.run(self.reload)
+        with self.lock:
+            return tuple(self.versions.get(table, (0, 0.0)) for table in tables)
+
+
+# 全局数据表版本实例
+table_versions = TableVersions()
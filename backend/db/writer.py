@@ -0,0 +1,248 @@
+"""
+数据库单写线程
+所有写操作进入同一个队列，由专用写线程按批次合并到一个事务中执行，
+避免多个线程同时写 SQLite 产生的锁竞争（database is locked）和读请求的尾延迟
+"""
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+import logging
+
+from .database import get_db
+
+logger = logging.getLogger(__name__)
+
+
+# 单个事务最多合并的写操作数量（可通过环境变量 DB_WRITER_MAX_BATCH 覆盖）
+DEFAULT_MAX_BATCH = 64
+
+# 队列停止标记
+_STOP = object()
+
+
+class WriteOp:
+    """
+    单个写操作
+
+    kind:
+        - 'execute': 单条语句，结果为影响行数
+        - 'many': executemany 批量语句，结果为影响行数
+        - 'transaction': 自定义函数 fn(conn)，结果为函数返回值
+    """
+
+    __slots__ = ('kind', 'query', 'params', 'fn', 'future', 'submitted_at')
+
+    def __init__(self, kind: str, query: Optional[str] = None, params: Any = None,
+                 fn: Optional[Callable[[sqlite3.Connection], Any]] = None):
+        self.kind = kind
+        self.query = query
+        self.params = params
+        self.fn = fn
+        self.future: Future = Future()
+        self.submitted_at = time.monotonic()
+
+    def apply(self, conn: sqlite3.Connection) -> Any:
+        """在当前事务中执行（不提交）"""
+        if self.kind == 'execute':
+            return conn.execute(self.query, self.params).rowcount
+        if self.kind == 'many':
+            return conn.executemany(self.query, self.params).rowcount
+        return self.fn(conn)
+
+
+class DatabaseWriter:
+    """
+    单写线程
+
+    特性:
+    - 写线程懒启动，持有连接池中的一个长期连接
+    - 队列中积压的小写操作合并为一个事务（BEGIN IMMEDIATE ... COMMIT）
+    - 批次失败时逐个重试，只有真正出错的操作返回异常
+    - 每个操作返回 concurrent.futures.Future，调用方可同步等待或转为 asyncio 等待
+    """
+
+    def __init__(self, max_batch: Optional[int] = None):
+        self.max_batch = max_batch or int(os.getenv('DB_WRITER_MAX_BATCH', DEFAULT_MAX_BATCH))
+        self.queue: 'queue.Queue[Any]' = queue.Queue()
+        self.thread: Optional[threading.Thread] = None
+        self.lock = threading.Lock()
+        self.stats = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'batches': 0,
+            'max_batch_size': 0,
+            'batch_retries': 0,
+            'total_wait': 0.0,    # 累计排队等待时间（秒）
+            'max_wait': 0.0,
+        }
+
+    def _ensure_started(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name='db-writer', daemon=True)
+                self.thread.start()
+                logger.info(f"[数据库写线程] 已启动，单批最多合并 {self.max_batch} 个写操作")
+
+    def is_writer_thread(self) -> bool:
+        """当前是否在写线程中（写线程内的写操作直接执行，避免自己等待自己）"""
+        return threading.current_thread() is self.thread
+
+    def _submit(self, op: WriteOp) -> Future:
+        self._ensure_started()
+        with self.lock:
+            self.stats['submitted'] += 1
+        self.queue.put(op)
+        return op.future
+
+    def submit_write(self, query: str, params: tuple = ()) -> Future:
+        """
+        提交单条写语句
+
+        Returns:
+            Future，结果为影响行数
+        """
+        return self._submit(WriteOp('execute', query, tuple(params)))
+
+    def submit_many(self, query: str, params_list: list) -> Future:
+        """
+        提交批量写语句（executemany）
+
+        Returns:
+            Future，结果为影响行数
+        """
+        return self._submit(WriteOp('many', query, list(params_list)))
+
+    def submit_transaction(self, fn: Callable[[sqlite3.Connection], Any]) -> Future:
+        """
+        提交自定义事务函数
+
+        fn(conn) 在写线程的事务中执行，不要在函数内 commit/rollback，
+        函数正常返回后由写线程统一提交，抛出异常则回滚
+
+        Returns:
+            Future，结果为 fn 的返回值
+        """
+        return self._submit(WriteOp('transaction', fn=fn))
+
+    def _run(self):
+        while True:
+            op = self.queue.get()
+            if op is _STOP:
+                break
+
+            batch: List[WriteOp] = [op]
+            stop = False
+            while len(batch) < self.max_batch:
+                try:
+                    next_op = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if next_op is _STOP:
+                    stop = True
+                    break
+                batch.append(next_op)
+
+            self._execute_batch(batch)
+            if stop:
+                break
+
+    def _execute_batch(self, batch: List[WriteOp]):
+        started_at = time.monotonic()
+        with self.lock:
+            self.stats['batches'] += 1
+            self.stats['max_batch_size'] = max(self.stats['max_batch_size'], len(batch))
+            for op in batch:
+                wait = started_at - op.submitted_at
+                self.stats['total_wait'] += wait
+                self.stats['max_wait'] = max(self.stats['max_wait'], wait)
+
+        # 跳过调用方已取消的操作
+        batch = [op for op in batch if op.future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        conn = get_db()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            results = [op.apply(conn) for op in batch]
+            conn.commit()
+        except Exception as e:
+            self._rollback(conn)
+            if len(batch) == 1:
+                self._finish(batch[0], error=e)
+                return
+
+            # 批次失败: 逐个重试，定位出错的操作
+            logger.warning(f"[数据库写线程] 批次执行失败，逐个重试 {len(batch)} 个写操作: {e}")
+            with self.lock:
+                self.stats['batch_retries'] += 1
+            for op in batch:
+                try:
+                    conn.execute('BEGIN IMMEDIATE')
+                    result = op.apply(conn)
+                    conn.commit()
+                except Exception as op_error:
+                    self._rollback(conn)
+                    self._finish(op, error=op_error)
+                else:
+                    self._finish(op, result=result)
+            return
+
+        for op, result in zip(batch, results):
+            self._finish(op, result=result)
+
+    @staticmethod
+    def _rollback(conn: sqlite3.Connection):
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            pass
+
+    def _finish(self, op: WriteOp, result: Any = None, error: Optional[BaseException] = None):
+        with self.lock:
+            self.stats['failed' if error is not None else 'completed'] += 1
+        if error is not None:
+            op.future.set_exception(error)
+        else:
+            op.future.set_result(result)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取写线程统计信息"""
+        with self.lock:
+            batches = self.stats['batches']
+            processed = self.stats['completed'] + self.stats['failed']
+            return {
+                'running': self.thread is not None and self.thread.is_alive(),
+                'queue_depth': self.queue.qsize(),
+                'max_batch': self.max_batch,
+                'submitted': self.stats['submitted'],
+                'completed': self.stats['completed'],
+                'failed': self.stats['failed'],
+                'batches': batches,
+                'avg_batch_size': round(processed / batches, 2) if batches else 0,
+                'max_batch_size': self.stats['max_batch_size'],
+                'batch_retries': self.stats['batch_retries'],
+                'avg_wait_ms': round(self.stats['total_wait'] / processed * 1000, 2) if processed else 0,
+                'max_wait_ms': round(self.stats['max_wait'] * 1000, 2),
+            }
+
+    def shutdown(self, wait: bool = True, timeout: float = 30.0):
+        """停止写线程（已入队的写操作执行完后退出）"""
+        with self.lock:
+            thread = self.thread
+        if thread is None or not thread.is_alive():
+            return
+        self.queue.put(_STOP)
+        if wait:
+            thread.join(timeout)
+        logger.info("[数据库写线程] 已停止")
+
+
+# 全局写线程实例
+db_writer = DatabaseWriter()
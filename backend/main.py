@@ -3,21 +3,38 @@ AkShare 基金平台后端主程序
 整合 AKTools HTTP 服务 + 数据库 + 定时任务
 """
 import uvicorn
-from fastapi import FastAPI, HTTPException, Body
+from fastapi import FastAPI, HTTPException, Body, Request, Response, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from db import init_db, start_scheduler, stop_scheduler, get_db
+from db import init_db, start_scheduler, stop_scheduler, register_warmer, get_db, get_pool_stats, async_db, db_writer
+from db.database import execute_query, execute_transaction
 from db.cache_helper import CacheHelper
+from db.holdings import (
+    get_sync_state as get_holdings_sync_state, is_refresh_due as is_holdings_refresh_due,
+    load_stock_holdings, sync_stock_holdings
+)
+from db.datasets import MONEY_FUND, FUND_DAILY_NAV
+from db.basic_info import sync_fund_basic_info
+from db.early_expiry import jittered_ttl, should_refresh_early, early_expiry_stats
+from db.ingestion import transform, write as write_dataset, run_dataset, get_ingestion_stats
 from utils.export_utils import export_to_csv, export_to_excel
+from utils.api_cache import APICache, api_cache, set_cache_headers
+from utils.tiered_cache import tiered_cache
+from utils.negative_cache import negative_cache, is_no_data_error
+from utils.http_cache import etag_response, cache_control
+from utils.upstream import upstream_executor, run_upstream, run_upstream_shared, run_blocking, get_upstream_stats
 from utils.logger import setup_logging
-from middleware import ErrorHandlerMiddleware, RequestLoggingMiddleware
+from middleware import ErrorHandlerMiddleware, RequestLoggingMiddleware, AKToolsCacheMiddleware, clear_aktools_cache, get_aktools_cache_stats
 import logging
 import atexit
+import asyncio
 import akshare as ak
+import pandas as pd
 from datetime import datetime, timedelta
 from typing import Dict, Any, Optional
 import threading
+import time
 from urllib.parse import quote
 
 # 配置增强版日志系统
@@ -66,66 +83,262 @@ def infer_fund_type(fund_name: str) -> str:
     return '其他'
 
 # ========== 内存缓存系统 ==========
-class FundRankCache:
-    """基金排行数据内存缓存"""
-    def __init__(self, ttl_minutes: int = 10):
-        self.cache: Dict[str, Dict[str, Any]] = {}
+class FundRankCache(APICache):
+    """
+    基金排行数据内存缓存（按分类缓存整份排行快照，LRU 容量控制）
+
+    TTL 按分类抖动，与数据库缓存使用相同的抖动（见 db/early_expiry.py）；
+    过期前按 XFetch 概率提前标记刷新，由调用方后台刷新
+    """
+    def __init__(self, ttl_minutes: int = 10, max_entries: int = 32, max_bytes: int = 512 * 1024 * 1024):
+        # 分类数量很少，单分片保持全局 LRU 顺序
+        super().__init__(max_entries=max_entries, max_bytes=max_bytes, shards=1)
         self.ttl = timedelta(minutes=ttl_minutes)
-        self.lock = threading.Lock()
-
-    def get(self, key: str) -> Optional[Any]:
-        """获取缓存数据"""
-        with self.lock:
-            if key in self.cache:
-                entry = self.cache[key]
-                # 检查是否过期
-                if datetime.now() < entry['expires_at']:
-                    logger.info(f"[缓存命中] key={key}, 剩余时间={(entry['expires_at'] - datetime.now()).total_seconds():.0f}秒")
-                    return entry['data']
-                else:
-                    # 过期则删除
-                    logger.info(f"[缓存过期] key={key}")
-                    del self.cache[key]
-        return None
+        # 分类 -> (放入内存时数据已有的年龄(秒), 上次从上游获取的耗时(秒))
+        self.origins: Dict[str, tuple] = {}
 
-    def set(self, key: str, data: Any):
-        """设置缓存数据"""
-        with self.lock:
-            expires_at = datetime.now() + self.ttl
-            self.cache[key] = {
-                'data': data,
-                'expires_at': expires_at,
-                'created_at': datetime.now()
-            }
-            logger.info(f"[缓存设置] key={key}, 数据量={len(data) if isinstance(data, list) else 'N/A'}, 有效期={self.ttl.total_seconds()/60}分钟")
+    def ttl_seconds(self, key: str) -> float:
+        """该分类抖动后的 TTL（秒）"""
+        return jittered_ttl(self.ttl.total_seconds(), f'fund_ranking:{key}')
 
-    def clear(self):
-        """清空所有缓存"""
-        with self.lock:
-            count = len(self.cache)
-            self.cache.clear()
-            logger.info(f"[缓存清空] 已清除 {count} 个缓存项")
+    def get_entry(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        获取缓存数据及缓存年龄: {'data': 数据, 'age': 数据年龄(秒), 'refresh': 是否应后台刷新}
+        """
+        entry = super().get_entry(key)
+        if entry is not None:
+            base_age, compute_seconds = self.origins.get(key, (0.0, None))
+            entry['age'] += base_age
+            entry['refresh'] = should_refresh_early(entry['age'], self.ttl_seconds(key), compute_seconds)
+            logger.debug(f"[缓存命中] key={key}, 剩余时间={self.ttl_seconds(key) - entry['age']:.0f}秒")
+        return entry
+
+    def set(self, key: str, data: Any, compute_seconds: Optional[float] = None, age: float = 0.0):
+        """
+        设置缓存数据
+
+        Args:
+            key: 分类
+            data: 排行 DataFrame
+            compute_seconds: 从上游获取的耗时（秒）
+            age: 数据已有的年龄（秒），从数据库缓存载入时传入，内存中只保留剩余有效期
+        """
+        ttl = self.ttl_seconds(key) - age
+        if ttl < 1:
+            return
+        self.origins[key] = (age, compute_seconds)
+        super().set(key, data, int(ttl))
+        logger.info(f"[缓存设置] key={key}, 数据量={len(data) if hasattr(data, '__len__') else 'N/A'}, 有效期={ttl / 60:.1f}分钟")
 
     def get_stats(self) -> Dict[str, Any]:
         """获取缓存统计信息"""
-        with self.lock:
-            return {
-                'total_entries': len(self.cache),
-                'entries': [
-                    {
-                        'key': key,
-                        'created_at': entry['created_at'].isoformat(),
-                        'expires_at': entry['expires_at'].isoformat(),
-                        'data_size': len(entry['data']) if isinstance(entry['data'], list) else 0
-                    }
-                    for key, entry in self.cache.items()
-                ]
-            }
+        stats = super().get_stats()
+        entries = self.entries()
+        stats.update({
+            'total_entries': len(entries),
+            'entries': entries
+        })
+        return stats
 
 # 创建全局缓存实例（10分钟TTL）
 fund_rank_cache = FundRankCache(ttl_minutes=10)
 logger.info("[缓存系统] 基金排行缓存已初始化，TTL=10分钟")
 
+
+def _fetch_and_store_fund_ranking(symbol: str):
+    """
+    从AkShare获取排行数据，补充基金类型列并写入内存和数据库缓存
+
+    通过单飞方式调用，同一分类同时只会有一次下载
+    """
+    started = time.perf_counter()
+    rank_df = ak.fund_open_fund_rank_em(symbol=symbol)
+    if rank_df is None or rank_df.empty:
+        return rank_df
+
+    rank_df = rank_df.copy()
+    if symbol == '全部':
+        # 对于"全部"分类，从基金名称智能推断类型
+        rank_df['基金类型'] = rank_df['基金简称'].apply(infer_fund_type)
+    else:
+        # 对于特定分类，使用查询参数作为类型
+        rank_df['基金类型'] = symbol
+
+    compute_seconds = time.perf_counter() - started
+    fund_rank_cache.set(symbol, rank_df, compute_seconds)
+    CacheHelper.set_fund_ranking(symbol, rank_df, compute_seconds)
+    return rank_df
+
+
+def _refresh_fund_ranking_in_background(symbol: str, early: bool = False):
+    """
+    后台刷新排行快照（单飞，同一分类同时只有一次刷新）
+
+    Args:
+        symbol: 基金类型
+        early: 是否为过期前的概率提前刷新
+    """
+    def on_done(future):
+        if future.exception() is not None:
+            logger.warning(f"[排行快照] 后台刷新失败，继续使用旧数据: symbol={symbol}, 错误={future.exception()}")
+        else:
+            logger.info(f"[排行快照] 后台刷新完成: symbol={symbol}")
+
+    if early:
+        early_expiry_stats.record('fund_ranking')
+        logger.info(f"[排行快照] 缓存即将过期，提前后台刷新: symbol={symbol}")
+    else:
+        logger.info(f"[排行快照] 数据库缓存已软过期，返回旧数据并后台刷新: symbol={symbol}")
+    upstream_executor.submit_shared(_fetch_and_store_fund_ranking, symbol, host='eastmoney').add_done_callback(on_done)
+
+
+async def load_fund_ranking(symbol: str, response: Optional[Response] = None):
+    """
+    获取基金排行快照（内存缓存 -> 数据库缓存 -> AkShare）
+
+    数据库缓存软过期后仍直接返回旧数据，并触发一次后台刷新；硬过期后才阻塞等待 AkShare。
+    软过期前按 XFetch 概率提前触发后台刷新，同时预热的分类不会同时过期。
+    返回的 DataFrame 由所有请求共享，调用方不得原地修改
+
+    Args:
+        symbol: 基金类型（全部、股票型、混合型、债券型、指数型、QDII、LOF、FOF）
+        response: 传入时在响应头写入 Age 和 X-Cache（HIT/STALE/MISS）
+
+    Returns:
+        排行 DataFrame，上游无数据时返回 None 或空 DataFrame
+    """
+    entry = fund_rank_cache.get_entry(symbol)
+    if entry is not None:
+        if entry['refresh']:
+            _refresh_fund_ranking_in_background(symbol, early=True)
+        set_cache_headers(response, entry['age'], 'HIT')
+        return entry['data']
+
+    entry = await async_db.run(CacheHelper.get_fund_ranking_entry, symbol)
+    if entry is not None:
+        rank_df = entry['data']
+        if entry['stale']:
+            # 旧数据不放入内存缓存，后台刷新完成后由 _fetch_and_store_fund_ranking 写入
+            _refresh_fund_ranking_in_background(symbol)
+            set_cache_headers(response, entry['age'], 'STALE')
+        else:
+            if entry['refresh']:
+                _refresh_fund_ranking_in_background(symbol, early=True)
+            fund_rank_cache.set(symbol, rank_df, entry['compute_seconds'], entry['age'])
+            set_cache_headers(response, entry['age'], 'HIT')
+            logger.info(f"[排行快照] 使用数据库缓存数据: symbol={symbol}, 数据量={len(rank_df)}")
+        return rank_df
+
+    logger.info(f"[排行快照] 缓存未命中,从AkShare获取数据: symbol={symbol}")
+    rank_df = await upstream_executor.run_shared(_fetch_and_store_fund_ranking, symbol, host='eastmoney')
+    set_cache_headers(response, 0, 'MISS')
+    return rank_df
+
+
+# 基金排行分类（前端排行页的全部分类）
+FUND_RANK_SYMBOLS = ('全部', '股票型', '混合型', '债券型', '指数型', 'QDII', 'LOF', 'FOF')
+
+# 基金排行定期预热间隔（分钟，缓存 TTL 的一半）
+FUND_RANK_WARM_MINUTES = 5
+
+
+def warm_fund_ranking():
+    """
+    预热基金排行: 逐个分类载入内存缓存，数据库快照未过期的直接载入，否则从 AkShare 获取
+    （在调度器线程中执行，逐个分类获取，避免同时向上游发出多次大请求）
+
+    每 FUND_RANK_WARM_MINUTES 分钟执行一次，数据库快照剩余有效期不足一个间隔的分类在过期前重新获取
+    """
+    min_remaining = FUND_RANK_WARM_MINUTES * 60
+    for symbol in FUND_RANK_SYMBOLS:
+        entry = CacheHelper.get_fund_ranking_entry(symbol)
+        if entry is not None and fund_rank_cache.ttl_seconds(symbol) - entry['age'] > min_remaining:
+            if fund_rank_cache.peek(symbol) is None:
+                fund_rank_cache.set(symbol, entry['data'], entry['compute_seconds'], entry['age'])
+            continue
+        try:
+            upstream_executor.submit_shared(_fetch_and_store_fund_ranking, symbol, host='eastmoney').result()
+        except Exception as e:
+            logger.warning(f"[缓存预热] 排行分类 {symbol} 预热失败: {e}")
+
+
+# 货币基金数据缓存时间（与数据库缓存判断一致）
+MONEY_FUND_TTL_SECONDS = CacheHelper.TTL_CONFIG['fund_money'] * 60
+MONEY_FUND_CACHE_KEY = '/api/fund_money'
+
+
+def _load_money_fund_snapshot() -> Optional[Dict[str, Any]]:
+    """
+    读取数据库中的货币基金数据（最近一次同步在10分钟内），并放入内存缓存直到过期
+
+    Returns:
+        接口响应，数据库缓存过期或为空时返回 None
+    """
+    # 入库只改写变化的行，按数据集最近一次同步时间判断是否过期
+    cache_info = execute_query(f'''
+        SELECT 行数 as count, 最后刷新时间 as last_update,
+               (julianday('now') - julianday(最后刷新时间)) * 86400 as age
+        FROM dataset_sync_state
+        WHERE 数据集 = ?
+        AND datetime(最后刷新时间) > datetime('now', '-{CacheHelper.TTL_CONFIG["fund_money"]} minutes')
+    ''', (MONEY_FUND.name,))
+    if not cache_info or not cache_info[0]['count']:
+        return None
+
+    results = execute_query('''
+        SELECT 基金代码, 基金简称, 万份收益, 七日年化, 单位净值, 日涨幅,
+               成立日期, 基金经理, 手续费, 可购全部, 更新时间
+        FROM fund_money_cache
+        ORDER BY 七日年化 DESC
+    ''')
+    snapshot = {
+        "success": True,
+        "data": results,
+        "source": "cache",
+        "last_update": cache_info[0]['last_update']
+    }
+    api_cache.set(MONEY_FUND_CACHE_KEY, snapshot, max(1, int(MONEY_FUND_TTL_SECONDS - cache_info[0]['age'])))
+    return snapshot
+
+
+def warm_money_fund():
+    """
+    预热货币基金列表: 数据库缓存过期时先从 AkShare 更新，再载入内存缓存
+    """
+    if _load_money_fund_snapshot() is None:
+        run_dataset(MONEY_FUND)
+        _load_money_fund_snapshot()
+
+
+# 开放式基金净值超过该时长（分钟）未同步时，启动预热会先从 AkShare 更新（定时任务每小时一次）
+FUND_DAILY_NAV_MAX_AGE_MINUTES = 90
+
+
+def _fund_daily_nav_state() -> Optional[Dict[str, Any]]:
+    """
+    开放式基金净值表的同步状态
+
+    Returns:
+        {'count', 'last_update', 'age_minutes'}，从未同步或表为空时返回 None
+    """
+    rows = execute_query('''
+        SELECT 行数 as count, 最后刷新时间 as last_update,
+               (julianday('now') - julianday(最后刷新时间)) * 1440 as age_minutes
+        FROM dataset_sync_state
+        WHERE 数据集 = ?
+    ''', (FUND_DAILY_NAV.name,))
+    return rows[0] if rows and rows[0]['count'] else None
+
+
+def warm_fund_daily_nav():
+    """
+    预热开放式基金净值: 数据库中没有数据或同步时间过旧时从 AkShare 更新
+    """
+    state = _fund_daily_nav_state()
+    if state is None or state['age_minutes'] > FUND_DAILY_NAV_MAX_AGE_MINUTES:
+        upstream_executor.submit_shared(run_dataset, FUND_DAILY_NAV, host='eastmoney').result()
+
+
 # 导入 AKTools 核心路由
 try:
     from aktools.core.api import app_core
@@ -138,6 +351,9 @@ except ImportError as e:
 # 创建 FastAPI 应用
 app = FastAPI(title="AkShare Fund Platform API", version="1.5.0")
 
+# AKTools 透传接口缓存（放在最内层，缓存命中的响应同样经过 CORS、错误处理和请求日志）
+app.add_middleware(AKToolsCacheMiddleware)
+
 # 配置 CORS
 app.add_middleware(
     CORSMiddleware,
@@ -150,7 +366,7 @@ app.add_middleware(
 # 添加错误处理和请求日志中间件
 app.add_middleware(ErrorHandlerMiddleware)
 app.add_middleware(RequestLoggingMiddleware)
-logger.info("[中间件] 已添加错误处理和请求日志中间件")
+logger.info("[中间件] 已添加 AKTools 缓存、错误处理和请求日志中间件")
 
 # 挂载 AKTools 核心 API 路由
 # AKTools 的路由是 /public/{item_id}，所以挂载到 /api 前缀
@@ -165,7 +381,8 @@ else:
 # ========== 自定义 API 端点 ==========
 
 @app.get("/api/fund_estimation/batch")
-async def get_fund_estimation_batch(symbols: str):
+@cache_control('update_estimation_trading_hours')
+async def get_fund_estimation_batch(symbols: str, response: Response):
     """
     批量获取基金估值数据
     参数: symbols - 基金代码列表，逗号分隔，如 "110011,000001,163406"
@@ -180,9 +397,6 @@ async def get_fund_estimation_batch(symbols: str):
         if len(symbol_list) > 100:
             raise HTTPException(status_code=400, detail="最多支持查询 100 个基金")
 
-        conn = get_db()
-        cursor = conn.cursor()
-
         # 构建查询（使用 IN 子句）
         placeholders = ','.join('?' * len(symbol_list))
         query = f'''
@@ -191,11 +405,7 @@ async def get_fund_estimation_batch(symbols: str):
             WHERE 基金代码 IN ({placeholders})
         '''
 
-        cursor.execute(query, symbol_list)
-        rows = cursor.fetchall()
-
-        # 转换为字典列表
-        results = [dict(row) for row in rows]
+        results = await async_db.fetch_all(query, symbol_list)
         return results
 
     except HTTPException:
@@ -206,29 +416,23 @@ async def get_fund_estimation_batch(symbols: str):
 
 
 @app.get("/api/fund_estimation/{symbol}")
-async def get_fund_estimation(symbol: str):
+@cache_control('update_estimation_trading_hours')
+async def get_fund_estimation(symbol: str, response: Response):
     """
     获取单个基金的实时估值数据
     注意：此路由必须放在 /api/fund_estimation/batch 之后
     """
     try:
-        conn = get_db()
-        cursor = conn.cursor()
-
-        cursor.execute('''
+        result = await async_db.fetch_one('''
             SELECT 基金代码, 基金名称, 估算时间, 估算值, 估算增长率,
                    单位净值, 日增长率, 估算偏差, 更新时间
             FROM fund_value_estimation
             WHERE 基金代码 = ?
         ''', (symbol,))
 
-        row = cursor.fetchone()
-
-        if row is None:
+        if result is None:
             raise HTTPException(status_code=404, detail=f"基金 {symbol} 估值数据不存在")
 
-        # 转换为字典
-        result = dict(row)
         return result
 
     except HTTPException:
@@ -239,23 +443,19 @@ async def get_fund_estimation(symbol: str):
 
 
 @app.get("/api/estimation_stats")
-async def get_estimation_stats():
+@cache_control('update_estimation_trading_hours')
+async def get_estimation_stats(response: Response):
     """
     获取估值数据统计信息
     """
     try:
-        conn = get_db()
-        cursor = conn.cursor()
-
-        cursor.execute('SELECT COUNT(*) as total FROM fund_value_estimation')
-        total = cursor.fetchone()['total']
-
-        cursor.execute('SELECT MAX(更新时间) as last_update FROM fund_value_estimation')
-        last_update = cursor.fetchone()['last_update']
+        stats = await async_db.fetch_one(
+            'SELECT COUNT(*) as total, MAX(更新时间) as last_update FROM fund_value_estimation'
+        )
 
         return {
-            "total_funds": total,
-            "last_update": last_update
+            "total_funds": stats['total'],
+            "last_update": stats['last_update']
         }
 
     except Exception as e:
@@ -263,46 +463,104 @@ async def get_estimation_stats():
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/api/fund_money")
-async def get_money_funds():
+# 基金基本信息批量查询的最大基金数
+BASIC_INFO_BATCH_LIMIT = 20
+
+
+async def load_fund_basic_infos(symbols: list) -> Dict[str, Dict[str, Any]]:
     """
-    获取货币基金实时数据
-    支持数据库缓存（10分钟）
+    获取基金基本信息: 缓存中有的直接返回（过期条目由定时任务刷新），未缓存的并发请求上游并保存
+
+    Args:
+        symbols: 基金代码列表
+
+    Returns:
+        {基金代码: {'data': 基本信息, 'stale': 是否过期, 'source': 'cache'/'upstream'}}，
+        上游也没有数据或获取失败的基金不包含在内
+    """
+    entries = await async_db.run(CacheHelper.get_fund_basic_info_entries, symbols)
+    results = {
+        code: {'data': entry['data'], 'stale': entry['stale'], 'source': 'cache'}
+        for code, entry in entries.items()
+    }
+
+    missing = [code for code in symbols if code not in results]
+    if missing:
+        fetched = await asyncio.gather(
+            *(upstream_executor.run_shared(sync_fund_basic_info, code, host='eastmoney') for code in missing),
+            return_exceptions=True
+        )
+        for code, data in zip(missing, fetched):
+            if isinstance(data, Exception):
+                logger.warning(f"[基本信息] {code} 获取失败: {data}")
+            elif data is not None:
+                results[code] = {'data': data, 'stale': False, 'source': 'upstream'}
+    return results
+
+
+@app.get("/api/fund_basic_info/batch")
+async def get_fund_basic_info_batch(symbols: str):
     """
+    批量获取基金基本信息（基金经理、公司、规模、费率等）
+    参数: symbols - 基金代码列表，逗号分隔，如 "110011,000001"
+    注意：此路由必须放在 /api/fund_basic_info/{symbol} 之前
+    """
+    symbol_list = list(dict.fromkeys(s.strip() for s in symbols.split(',') if s.strip()))
+
+    if not symbol_list:
+        raise HTTPException(status_code=400, detail="参数 symbols 不能为空")
+
+    if len(symbol_list) > BASIC_INFO_BATCH_LIMIT:
+        raise HTTPException(status_code=400, detail=f"最多支持查询 {BASIC_INFO_BATCH_LIMIT} 个基金")
+
     try:
-        logger.info("[货币基金] 查询货币基金数据")
+        results = await load_fund_basic_infos(symbol_list)
+        return {
+            "success": True,
+            "data": [results[code]['data'] for code in symbol_list if code in results],
+            "stale": [code for code in symbol_list if code in results and results[code]['stale']],
+            "missing": [code for code in symbol_list if code not in results]
+        }
+    except Exception as e:
+        logger.error(f"批量获取基金基本信息失败: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
 
-        # 1. 检查数据库缓存
-        conn = get_db()
-        cursor = conn.cursor()
 
-        # 检查缓存是否存在且未过期（10分钟）
-        cursor.execute('''
-            SELECT COUNT(*) as count, MAX(更新时间) as last_update
-            FROM fund_money_cache
-            WHERE datetime(更新时间) > datetime('now', '-10 minutes')
-        ''')
-        cache_info = cursor.fetchone()
+@app.get("/api/fund_basic_info/{symbol}")
+async def get_fund_basic_info(symbol: str):
+    """
+    获取单个基金的基本信息（优先读取缓存，过期条目由定时任务刷新）
+    注意：此路由必须放在 /api/fund_basic_info/batch 之后
+    """
+    try:
+        result = (await load_fund_basic_infos([symbol])).get(symbol)
+    except Exception as e:
+        logger.error(f"获取基金基本信息失败 [{symbol}]: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
 
-        if cache_info['count'] > 0:
-            logger.info(f"[货币基金] 使用缓存数据，共 {cache_info['count']} 条记录")
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"基金 {symbol} 基本信息不存在")
 
-            cursor.execute('''
-                SELECT 基金代码, 基金简称, 万份收益, 七日年化, 单位净值, 日涨幅,
-                       成立日期, 基金经理, 手续费, 可购全部, 更新时间
-                FROM fund_money_cache
-                ORDER BY 七日年化 DESC
-            ''')
+    return {"success": True, **result}
 
-            rows = cursor.fetchall()
-            results = [dict(row) for row in rows]
 
-            return {
-                "success": True,
-                "data": results,
-                "source": "cache",
-                "last_update": cache_info['last_update']
-            }
+@app.get("/api/fund_money")
+@cache_control('update_money_fund', ttl_key='fund_money')
+async def get_money_funds(response: Response):
+    """
+    获取货币基金实时数据
+    支持数据库缓存（10分钟）
+    """
+    try:
+        logger.info("[货币基金] 查询货币基金数据")
+
+        # 1. 内存缓存（预热或上次读取）-> 数据库缓存（10分钟内同步过）
+        snapshot = api_cache.get(MONEY_FUND_CACHE_KEY)
+        if snapshot is None:
+            snapshot = await async_db.run(_load_money_fund_snapshot)
+        if snapshot is not None:
+            logger.info(f"[货币基金] 使用缓存数据，共 {len(snapshot['data'])} 条记录")
+            return snapshot
 
         # 2. 缓存过期或不存在，调用AkShare API
         logger.info("[货币基金] 缓存过期，调用AkShare API")
@@ -314,7 +572,7 @@ async def get_money_funds():
 
         try:
             # 调用实时货币基金API
-            df = ak.fund_money_fund_daily_em()
+            df = await run_upstream_shared(ak.fund_money_fund_daily_em)
 
             if df.empty:
                 logger.warning("[货币基金] API返回空数据")
@@ -327,108 +585,18 @@ async def get_money_funds():
 
             logger.info(f"[货币基金] API返回 {len(df)} 条记录")
 
-            # 解析动态字段名（日期格式：YYYY-MM-DD-字段名）
-            # 获取最新日期的字段
-            date_columns = [col for col in df.columns if '-' in str(col) and str(col).count('-') >= 3]
-
-            if not date_columns:
-                logger.error("[货币基金] 未找到日期列")
-                logger.error(f"[货币基金] 所有列名: {df.columns.tolist()}")
-                raise HTTPException(status_code=500, detail="数据格式错误：未找到日期列")
-
-            # 提取日期部分（前10个字符 YYYY-MM-DD）
-            dates = sorted(set([str(col)[:10] for col in date_columns if len(str(col)) >= 10]), reverse=True)
-            latest_date = dates[0] if dates else None
-
-            logger.info(f"[货币基金] 找到日期: {dates}, 使用最新日期: {latest_date}")
-
-            # 构建字段映射
-            field_mapping = {}
-            for col in df.columns:
-                if latest_date and latest_date in str(col):
-                    if '万份收益' in str(col):
-                        field_mapping['万份收益'] = col
-                    elif '7日年化' in str(col) or '七日年化' in str(col):
-                        field_mapping['七日年化'] = col
-                    elif '单位净值' in str(col):
-                        field_mapping['单位净值'] = col
-                    elif '日涨幅' in str(col):
-                        field_mapping['日涨幅'] = col
-
-            logger.info(f"[货币基金] 字段映射: {field_mapping}")
-
-            # 清空旧缓存
-            cursor.execute('DELETE FROM fund_money_cache')
-            conn.commit()
-            logger.info("[货币基金] 已清空旧缓存")
-
-            # 准备批量插入数据
-            records = []
-            for _, row in df.iterrows():
-                try:
-                    # 解析数值，处理可能的字符串格式
-                    wan_fen_shouyi = row.get(field_mapping.get('万份收益', ''), None)
-                    qi_ri_nianhua = row.get(field_mapping.get('七日年化', ''), None)
-
-                    # 转换万份收益为浮点数
-                    try:
-                        wan_fen_shouyi = float(wan_fen_shouyi) if wan_fen_shouyi not in [None, '', '--'] else None
-                    except (ValueError, TypeError):
-                        wan_fen_shouyi = None
-
-                    # 七日年化保持字符串格式(包含%)
-                    qi_ri_nianhua = str(qi_ri_nianhua) if qi_ri_nianhua not in [None, '', '--', 'None'] else ''
-
-                    records.append((
-                        str(row.get('基金代码', '')),
-                        str(row.get('基金简称', '')),
-                        wan_fen_shouyi,
-                        qi_ri_nianhua,
-                        str(row.get(field_mapping.get('单位净值', ''), '')),
-                        str(row.get(field_mapping.get('日涨幅', ''), '')),
-                        str(row.get('成立日期', '')),
-                        str(row.get('基金经理', '')),
-                        str(row.get('手续费', '')),
-                        str(row.get('可购全部', ''))
-                    ))
-                except Exception as row_error:
-                    logger.warning(f"[货币基金] 处理行数据失败: {row_error}")
-                    continue
-
-            # 批量插入
-            if records:
-                cursor.executemany('''
-                    INSERT OR REPLACE INTO fund_money_cache
-                    (基金代码, 基金简称, 万份收益, 七日年化, 单位净值, 日涨幅,
-                     成立日期, 基金经理, 手续费, 可购全部, 更新时间)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-                ''', records)
-                conn.commit()
-                logger.info(f"[货币基金] 缓存 {len(records)} 条记录")
+            # 按数据集定义解析动态字段名并转换类型（与定时任务共用 MONEY_FUND）
+            frame = transform(MONEY_FUND, df)
 
-            # 转换为结果格式，按七日年化降序排序
-            results = df.to_dict('records')
+            # 与定时任务相同的写入方式: 只写入变化的行（在线程池中执行，不阻塞事件循环）
+            diff = await run_blocking(write_dataset, MONEY_FUND, frame)
+            logger.info(
+                f"[货币基金] 缓存 {len(frame)} 条记录"
+                f"（新增 {diff['inserted']}，更新 {diff['updated']}，删除 {diff['deleted']}）"
+            )
 
-            # 标准化结果（使用解析后的字段名）
-            standardized_results = []
-            for item in results:
-                try:
-                    standardized_item = {
-                        '基金代码': item.get('基金代码', ''),
-                        '基金简称': item.get('基金简称', ''),
-                        '万份收益': item.get(field_mapping.get('万份收益', ''), ''),
-                        '七日年化': item.get(field_mapping.get('七日年化', ''), ''),
-                        '单位净值': item.get(field_mapping.get('单位净值', ''), ''),
-                        '日涨幅': item.get(field_mapping.get('日涨幅', ''), ''),
-                        '成立日期': item.get('成立日期', ''),
-                        '基金经理': item.get('基金经理', ''),
-                        '手续费': item.get('手续费', ''),
-                        '可购全部': item.get('可购全部', '')
-                    }
-                    standardized_results.append(standardized_item)
-                except Exception as e:
-                    logger.warning(f"[货币基金] 标准化数据失败: {e}")
-                    continue
+            # 返回与缓存相同的字段和类型
+            standardized_results = frame.to_dict('records')
 
             # 按七日年化降序排序
             try:
@@ -461,110 +629,108 @@ async def get_money_funds():
 
 
 @app.get("/api/fund_open_fund_daily_em")
-async def get_fund_open_daily():
+@cache_control('update_fund_daily_nav')
+async def get_fund_open_daily(
+    response: Response,
+    fund_code: Optional[str] = None,
+    keyword: Optional[str] = None,
+    purchase_status: Optional[str] = None,
+    sort_by: str = '基金代码',
+    order: str = 'asc',
+    page: int = Query(1, ge=1),
+    page_size: int = Query(50, ge=1, le=500)
+):
     """
-    获取开放式基金实时净值数据(完整列表)
-    提供单位净值、累计净值、日增长值、日增长率等关键信息
-    缓存策略: 1分钟(实时数据)
+    获取开放式基金每日净值（分页）
+    提供最新及前一净值日期的单位净值、累计净值，以及日增长值、日增长率、申购赎回状态
+
+    数据由定时任务写入 fund_daily_nav_cache（交易日晚间每小时），筛选、排序、分页在数据库中完成；
+    表中尚无数据时先从 AkShare 同步一次
     数据源: 东方财富
+
+    Args:
+        fund_code: 基金代码，多个用逗号分隔
+        keyword: 基金代码前缀或基金简称关键字
+        purchase_status: 申购状态，如 开放申购、暂停申购
+        sort_by: 排序列（基金代码、单位净值、累计净值、日增长率、日增长值）
+        order: asc / desc
+        page: 页码（从1开始）
+        page_size: 每页条数（最多500）
     """
     try:
-        logger.info("[开放式基金实时净值] 查询所有开放式基金实时净值数据")
+        logger.info(
+            f"[开放式基金净值] 查询参数 - fund_code: {fund_code}, keyword: {keyword}, "
+            f"sort_by: {sort_by} {order}, page: {page}/{page_size}"
+        )
 
-        # 调用AkShare API
-        try:
-            import akshare as ak
-        except ImportError:
-            raise HTTPException(status_code=500, detail="AkShare 库未安装")
+        state = await async_db.run(_fund_daily_nav_state)
+        if state is None:
+            logger.info("[开放式基金净值] 数据库中暂无数据，从AkShare同步")
+            try:
+                await upstream_executor.run_shared(run_dataset, FUND_DAILY_NAV, host='eastmoney')
+            except Exception as api_error:
+                logger.error(f"[开放式基金净值] AkShare API调用失败: {api_error}", exc_info=True)
+                return {
+                    "success": False,
+                    "data": [],
+                    "total": 0,
+                    "page": page,
+                    "page_size": page_size,
+                    "source": "api",
+                    "error": str(api_error)
+                }
+            state = await async_db.run(_fund_daily_nav_state)
 
+        fund_codes = [code.strip() for code in fund_code.split(',') if code.strip()] if fund_code else None
         try:
-            # 调用fund_open_fund_daily_em API
-            df = ak.fund_open_fund_daily_em()
-
-            if df.empty:
-                logger.warning("[开放式基金实时净值] API返回空数据")
-                return []
-
-            logger.info(f"[开放式基金实时净值] 成功获取 {len(df)} 条数据")
-
-            # 解析动态日期字段
-            # 字段格式: YYYY-MM-DD-单位净值, YYYY-MM-DD-累计净值
-            date_columns = [col for col in df.columns if '-' in str(col) and str(col).count('-') >= 3]
-
-            # 提取日期并找到最新的两个日期
-            dates = sorted(set([str(col)[:10] for col in date_columns if len(str(col)) >= 10]), reverse=True)
-            latest_date = dates[0] if len(dates) > 0 else None
-            previous_date = dates[1] if len(dates) > 1 else None
+            rows, total = await async_db.run(
+                CacheHelper.query_fund_daily_nav,
+                fund_codes=fund_codes,
+                keyword=keyword,
+                purchase_status=purchase_status,
+                sort_by=sort_by,
+                order=order,
+                page=page,
+                page_size=page_size
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        logger.info(f"[开放式基金净值] 返回 {len(rows)}/{total} 条数据")
 
-            logger.info(f"[开放式基金实时净值] 检测到日期: {dates[:5]}..., 最新: {latest_date}, 前一日: {previous_date}")
-
-            # 保留原始字段名(带日期前缀),前端需要动态解析日期字段
-            results = []
-            for _, row in df.iterrows():
-                try:
-                    item = {
-                        '基金代码': str(row.get('基金代码', '')),
-                        '基金简称': str(row.get('基金简称', '')),
-                        '日增长值': str(row.get('日增长值', '')),
-                        '日增长率': str(row.get('日增长率', '')),
-                        '申购状态': str(row.get('申购状态', '')),
-                        '赎回状态': str(row.get('赎回状态', '')),
-                        '手续费': str(row.get('手续费', ''))
-                    }
-
-                    # 添加带日期前缀的字段(保持原始格式)
-                    if latest_date:
-                        item[f'{latest_date}-单位净值'] = str(row.get(f'{latest_date}-单位净值', ''))
-                        item[f'{latest_date}-累计净值'] = str(row.get(f'{latest_date}-累计净值', ''))
-
-                    if previous_date:
-                        item[f'{previous_date}-单位净值'] = str(row.get(f'{previous_date}-单位净值', ''))
-                        item[f'{previous_date}-累计净值'] = str(row.get(f'{previous_date}-累计净值', ''))
-
-                    results.append(item)
-                except Exception as row_error:
-                    logger.warning(f"[开放式基金实时净值] 处理行数据失败: {row_error}")
-                    continue
-
-            logger.info(f"[开放式基金实时净值] 成功处理 {len(results)} 条数据")
-
-            # 直接返回数组,与其他API保持一致
-            return results
-
-        except Exception as api_error:
-            logger.error(f"[开放式基金实时净值] AkShare API调用失败: {api_error}", exc_info=True)
-            # 返回空数组
-            return []
+        return {
+            "success": True,
+            "data": rows,
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            "source": "cache",
+            "last_update": state['last_update'] if state else None
+        }
 
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"[开放式基金实时净值] 请求失败: {str(e)}", exc_info=True)
+        logger.error(f"[开放式基金净值] 请求失败: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/api/fund_dividend/{symbol}")
-async def get_fund_dividend(symbol: str):
+@cache_control('update_dividend')
+@etag_response('fund_dividend')
+async def get_fund_dividend(symbol: str, request: Request, response: Response):
     """
     获取单个基金的分红记录
     """
     try:
-        conn = get_db()
-        cursor = conn.cursor()
-
-        cursor.execute('''
+        results = await async_db.fetch_all('''
             SELECT 基金代码, 基金简称, 权益登记日, 除息日期, 分红, 分红发放日
             FROM fund_dividend
             WHERE 基金代码 = ?
             ORDER BY 除息日期 DESC
         ''', (symbol,))
 
-        rows = cursor.fetchall()
-
-        if not rows:
-            # 返回空数组而非404，因为某些基金可能没有分红记录
-            return []
-
-        # 转换为字典列表
-        results = [dict(row) for row in rows]
+        # 某些基金可能没有分红记录，此时返回空数组而非404
         return results
 
     except Exception as e:
@@ -573,27 +739,23 @@ async def get_fund_dividend(symbol: str):
 
 
 @app.get("/api/dividend_stats")
-async def get_dividend_stats():
+@cache_control('update_dividend')
+@etag_response('fund_dividend')
+async def get_dividend_stats(request: Request, response: Response):
     """
     获取分红数据统计信息
     """
     try:
-        conn = get_db()
-        cursor = conn.cursor()
-
-        cursor.execute('SELECT COUNT(*) as total FROM fund_dividend')
-        total = cursor.fetchone()['total']
-
-        cursor.execute('SELECT COUNT(DISTINCT 基金代码) as fund_count FROM fund_dividend')
-        fund_count = cursor.fetchone()['fund_count']
-
-        cursor.execute('SELECT MAX(更新时间) as last_update FROM fund_dividend')
-        last_update = cursor.fetchone()['last_update']
+        stats = await async_db.fetch_one('''
+            SELECT COUNT(*) as total, COUNT(DISTINCT 基金代码) as fund_count,
+                   MAX(更新时间) as last_update
+            FROM fund_dividend
+        ''')
 
         return {
-            "total_records": total,
-            "fund_count": fund_count,
-            "last_update": last_update
+            "total_records": stats['total'],
+            "fund_count": stats['fund_count'],
+            "last_update": stats['last_update']
         }
 
     except Exception as e:
@@ -613,11 +775,8 @@ async def get_fund_bond_holdings(symbol: str, quarter: str = None):
         logger.info(f"[债券持仓] 查询基金 {symbol} 的债券持仓数据")
 
         # 首先尝试从缓存读取
-        conn = get_db()
-        cursor = conn.cursor()
-
         if quarter:
-            cursor.execute('''
+            results = await async_db.fetch_all('''
                 SELECT 序号, 股票代码 as 债券代码, 股票名称 as 债券名称,
                        占净值比例, 持仓市值, 报告期 as 季度
                 FROM fund_holdings_cache
@@ -625,7 +784,7 @@ async def get_fund_bond_holdings(symbol: str, quarter: str = None):
                 ORDER BY 序号 ASC
             ''', (symbol, f'%{quarter}%'))
         else:
-            cursor.execute('''
+            results = await async_db.fetch_all('''
                 SELECT 序号, 股票代码 as 债券代码, 股票名称 as 债券名称,
                        占净值比例, 持仓市值, 报告期 as 季度
                 FROM fund_holdings_cache
@@ -633,11 +792,8 @@ async def get_fund_bond_holdings(symbol: str, quarter: str = None):
                 ORDER BY 报告期 DESC, 序号 ASC
             ''', (symbol,))
 
-        cached_rows = cursor.fetchall()
-
-        if cached_rows:
-            logger.info(f"[债券持仓] 从缓存获取 {len(cached_rows)} 条记录")
-            results = [dict(row) for row in cached_rows]
+        if results:
+            logger.info(f"[债券持仓] 从缓存获取 {len(results)} 条记录")
 
             # 提取可用季度
             quarters = list(set(row['季度'] for row in results))
@@ -650,14 +806,24 @@ async def get_fund_bond_holdings(symbol: str, quarter: str = None):
                 "source": "cache"
             }
 
+        empty_result = {
+            "success": True,
+            "data": [],
+            "quarters": [],
+            "source": "cache"
+        }
+        if await negative_cache.is_empty('fund_bond_holdings', symbol):
+            return empty_result
+
         # 缓存未命中，从AkShare API获取
         logger.info(f"[债券持仓] 缓存未命中，从AkShare获取数据")
 
         try:
-            df = ak.fund_portfolio_bond_hold_em(symbol=symbol)
+            df = await run_upstream(ak.fund_portfolio_bond_hold_em, symbol=symbol)
 
             if df is None or df.empty:
                 logger.info(f"[债券持仓] 基金 {symbol} 没有债券持仓数据")
+                await negative_cache.remember('fund_bond_holdings', symbol)
                 return {
                     "success": True,
                     "data": [],
@@ -680,19 +846,19 @@ async def get_fund_bond_holdings(symbol: str, quarter: str = None):
                     float(row.get('持仓市值', 0))
                 ))
 
-            # 先删除旧缓存
-            cursor.execute('''
-                DELETE FROM fund_holdings_cache
-                WHERE 基金代码 = ? AND 持仓类型 = 'bond'
-            ''', (symbol,))
+            # 先删除旧缓存再批量插入新数据（交给单写线程，在同一个事务中完成）
+            def store_bond_holdings(conn):
+                conn.execute('''
+                    DELETE FROM fund_holdings_cache
+                    WHERE 基金代码 = ? AND 持仓类型 = 'bond'
+                ''', (symbol,))
+                conn.executemany('''
+                    INSERT INTO fund_holdings_cache
+                    (基金代码, 持仓类型, 报告期, 序号, 股票代码, 股票名称, 占净值比例, 持股数, 持仓市值, 更新时间)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                ''', records)
 
-            # 批量插入新数据
-            cursor.executemany('''
-                INSERT INTO fund_holdings_cache
-                (基金代码, 持仓类型, 报告期, 序号, 股票代码, 股票名称, 占净值比例, 持股数, 持仓市值, 更新时间)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-            ''', records)
-            conn.commit()
+            await async_db.transaction(store_bond_holdings)
 
             logger.info(f"[债券持仓] 缓存 {len(records)} 条债券持仓记录")
 
@@ -715,8 +881,12 @@ async def get_fund_bond_holdings(symbol: str, quarter: str = None):
             }
 
         except Exception as api_error:
+            if is_no_data_error(api_error):
+                logger.info(f"[债券持仓] 基金 {symbol} 没有债券持仓数据: {api_error}")
+                await negative_cache.remember('fund_bond_holdings', symbol)
+                return {**empty_result, "source": "api"}
             logger.warning(f"[债券持仓] AkShare API调用失败: {api_error}")
-            # API失败时返回空结果
+            # API失败时返回空结果（临时失败，不记录为无数据）
             return {
                 "success": True,
                 "data": [],
@@ -730,6 +900,90 @@ async def get_fund_bond_holdings(symbol: str, quarter: str = None):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# 基金对比单次请求的总时限（秒），超时的数据源返回空结果
+COMPARE_DEADLINE_SECONDS = 15
+
+
+async def _compare_overview(symbol: str) -> Dict[str, Any]:
+    """基金对比: 获取基金概况（基础信息，读取基金基本信息缓存）"""
+    result = (await load_fund_basic_infos([symbol])).get(symbol)
+    if result is None:
+        return {}
+    info = result['data']
+    return {
+        "基金全称": info.get('基金全称') or '',
+        "基金简称": info.get('基金简称') or '',
+        "基金类型": info.get('基金类型') or '',
+        "成立日期": info.get('成立日期') or '',
+        "基金经理人": info.get('基金经理') or '',
+        "基金管理人": info.get('基金公司') or '',
+        "资产规模": info.get('最新规模') or '',
+        "管理费率": info.get('管理费率') or '',
+        "托管费率": info.get('托管费率') or ''
+    }
+
+
+def _compare_returns(rank_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """基金对比: 从排行数据中提取收益率"""
+    return {
+        "单位净值": rank_dict.get('单位净值-单位净值', ''),
+        "累计净值": rank_dict.get('累计净值', ''),
+        "日增长率": rank_dict.get('日增长率', ''),
+        "近1周": rank_dict.get('近1周', ''),
+        "近1月": rank_dict.get('近1月', ''),
+        "近3月": rank_dict.get('近3月', ''),
+        "近6月": rank_dict.get('近6月', ''),
+        "近1年": rank_dict.get('近1年', ''),
+        "近2年": rank_dict.get('近2年', ''),
+        "近3年": rank_dict.get('近3年', ''),
+        "今年来": rank_dict.get('今年来', ''),
+        "成立来": rank_dict.get('成立来', '')
+    }
+
+
+async def _compare_risk(symbol: str) -> Dict[str, Any]:
+    """基金对比: 获取风险指标（雪球，取近1年）"""
+    analysis_df = await run_upstream(ak.fund_individual_analysis_xq, symbol=symbol)
+    if analysis_df is None or analysis_df.empty:
+        return {}
+    analysis_1y = analysis_df[analysis_df['周期'] == '近1年']
+    if analysis_1y.empty:
+        return {}
+    analysis_dict = analysis_1y.iloc[0].to_dict()
+    return {
+        "年化波动率": analysis_dict.get('年化波动率', ''),
+        "年化夏普比率": analysis_dict.get('年化夏普比率', ''),
+        "最大回撤": analysis_dict.get('最大回撤', '')
+    }
+
+
+def _compare_db_stats(symbol: str) -> Dict[str, Dict[str, Any]]:
+    """基金对比: 从数据库获取评级和分红统计"""
+    conn = get_db()
+    cursor = conn.cursor()
+    result = {"评级": {}, "分红统计": {}}
+
+    cursor.execute('''
+        SELECT 上海证券, 招商证券, 济安金信, 晨星评级, "5星评级家数"
+        FROM fund_rating_all
+        WHERE 代码 = ?
+    ''', (symbol,))
+    rating_row = cursor.fetchone()
+    if rating_row:
+        result["评级"] = dict(rating_row)
+
+    cursor.execute('''
+        SELECT COUNT(*) as 分红次数, SUM(分红) as 累计分红
+        FROM fund_dividend
+        WHERE 基金代码 = ?
+    ''', (symbol,))
+    dividend_row = cursor.fetchone()
+    if dividend_row:
+        result["分红统计"] = dict(dividend_row)
+
+    return result
+
+
 @app.post("/api/fund_compare")
 async def compare_funds(request: dict):
     """
@@ -737,6 +991,9 @@ async def compare_funds(request: dict):
     接收参数: {"symbols": ["110011", "163406", "000001"]}
     返回: 多个基金的综合对比数据
     支持1-10个基金查询
+
+    排行快照整个请求只取一次（优先共享缓存），各基金的数据源并发获取，
+    总耗时受 COMPARE_DEADLINE_SECONDS 限制，超时的数据源返回空结果
     """
     try:
         symbols = request.get('symbols', [])
@@ -750,113 +1007,48 @@ async def compare_funds(request: dict):
         if len(symbols) > 10:
             raise HTTPException(status_code=400, detail="最多支持查询10个基金")
 
-        # 导入 akshare
-        try:
-            import akshare as ak
-        except ImportError:
-            raise HTTPException(status_code=500, detail="AkShare 库未安装")
+        # 并发发起所有数据源请求
+        rank_task = asyncio.create_task(load_fund_ranking("全部"))
+        overview_tasks = {symbol: asyncio.create_task(_compare_overview(symbol)) for symbol in symbols}
+        risk_tasks = {symbol: asyncio.create_task(_compare_risk(symbol)) for symbol in symbols}
+        db_tasks = {symbol: asyncio.create_task(async_db.run(_compare_db_stats, symbol)) for symbol in symbols}
+
+        all_tasks = [rank_task, *overview_tasks.values(), *risk_tasks.values(), *db_tasks.values()]
+        done, pending = await asyncio.wait(all_tasks, timeout=COMPARE_DEADLINE_SECONDS)
+        for task in pending:
+            task.cancel()
+        if pending:
+            logger.warning(f"[基金对比] {len(pending)} 个数据源超过 {COMPARE_DEADLINE_SECONDS} 秒未返回，已跳过")
+
+        def task_result(task: asyncio.Task, label: str, symbol: str = ''):
+            if task not in done:
+                return None
+            if task.exception() is not None:
+                logger.warning(f"获取{label}失败 [{symbol}]: {task.exception()}")
+                return None
+            return task.result()
+
+        # 排行快照只在整个请求中筛选一次
+        rank_by_code = {}
+        rank_df = task_result(rank_task, "排行数据")
+        if rank_df is not None and not rank_df.empty:
+            fund_rank = rank_df[rank_df['基金代码'].isin(symbols)]
+            rank_by_code = {
+                row['基金代码']: row
+                for row in fund_rank.drop_duplicates(subset=['基金代码']).to_dict('records')
+            }
 
         results = []
-
         for symbol in symbols:
-            fund_data = {
+            db_stats = task_result(db_tasks[symbol], "评级和分红统计", symbol) or {}
+            results.append({
                 "基金代码": symbol,
-                "基础信息": {},
-                "收益率": {},
-                "风险指标": {},
-                "评级": {},
-                "分红统计": {}
-            }
-
-            # 1. 获取基金概况（基础信息）
-            try:
-                overview_df = ak.fund_overview_em(symbol=symbol)
-                if not overview_df.empty:
-                    overview_dict = overview_df.to_dict('records')[0]
-                    fund_data["基础信息"] = {
-                        "基金全称": overview_dict.get('基金全称', ''),
-                        "基金简称": overview_dict.get('基金简称', ''),
-                        "基金类型": overview_dict.get('基金类型', ''),
-                        "成立日期": overview_dict.get('成立日期/规模', ''),
-                        "基金经理人": overview_dict.get('基金经理人', ''),
-                        "基金管理人": overview_dict.get('基金管理人', ''),
-                        "资产规模": overview_dict.get('资产规模', ''),
-                        "管理费率": overview_dict.get('管理费率', ''),
-                        "托管费率": overview_dict.get('托管费率', '')
-                    }
-            except Exception as e:
-                logger.warning(f"获取基金概况失败 [{symbol}]: {e}")
-
-            # 2. 获取排行数据（收益率）
-            try:
-                rank_df = ak.fund_open_fund_rank_em(symbol="全部")
-                fund_rank = rank_df[rank_df['基金代码'] == symbol]
-                if not fund_rank.empty:
-                    rank_dict = fund_rank.iloc[0].to_dict()
-                    fund_data["收益率"] = {
-                        "单位净值": rank_dict.get('单位净值-单位净值', ''),
-                        "累计净值": rank_dict.get('累计净值', ''),
-                        "日增长率": rank_dict.get('日增长率', ''),
-                        "近1周": rank_dict.get('近1周', ''),
-                        "近1月": rank_dict.get('近1月', ''),
-                        "近3月": rank_dict.get('近3月', ''),
-                        "近6月": rank_dict.get('近6月', ''),
-                        "近1年": rank_dict.get('近1年', ''),
-                        "近2年": rank_dict.get('近2年', ''),
-                        "近3年": rank_dict.get('近3年', ''),
-                        "今年来": rank_dict.get('今年来', ''),
-                        "成立来": rank_dict.get('成立来', '')
-                    }
-            except Exception as e:
-                logger.warning(f"获取排行数据失败 [{symbol}]: {e}")
-
-            # 3. 获取风险指标（雪球）
-            try:
-                analysis_df = ak.fund_individual_analysis_xq(symbol=symbol)
-                if not analysis_df.empty:
-                    # 取近1年的数据
-                    analysis_1y = analysis_df[analysis_df['周期'] == '近1年']
-                    if not analysis_1y.empty:
-                        analysis_dict = analysis_1y.iloc[0].to_dict()
-                        fund_data["风险指标"] = {
-                            "年化波动率": analysis_dict.get('年化波动率', ''),
-                            "年化夏普比率": analysis_dict.get('年化夏普比率', ''),
-                            "最大回撤": analysis_dict.get('最大回撤', '')
-                        }
-            except Exception as e:
-                logger.warning(f"获取风险指标失败 [{symbol}]: {e}")
-
-            # 4. 获取评级（从数据库）
-            try:
-                conn = get_db()
-                cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT 上海证券, 招商证券, 济安金信, 晨星评级, "5星评级家数"
-                    FROM fund_rating_all
-                    WHERE 代码 = ?
-                ''', (symbol,))
-                rating_row = cursor.fetchone()
-                if rating_row:
-                    fund_data["评级"] = dict(rating_row)
-            except Exception as e:
-                logger.warning(f"获取评级失败 [{symbol}]: {e}")
-
-            # 5. 获取分红统计（从数据库）
-            try:
-                conn = get_db()
-                cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT COUNT(*) as 分红次数, SUM(分红) as 累计分红
-                    FROM fund_dividend
-                    WHERE 基金代码 = ?
-                ''', (symbol,))
-                dividend_row = cursor.fetchone()
-                if dividend_row:
-                    fund_data["分红统计"] = dict(dividend_row)
-            except Exception as e:
-                logger.warning(f"获取分红统计失败 [{symbol}]: {e}")
-
-            results.append(fund_data)
+                "基础信息": task_result(overview_tasks[symbol], "基金概况", symbol) or {},
+                "收益率": _compare_returns(rank_by_code[symbol]) if symbol in rank_by_code else {},
+                "风险指标": task_result(risk_tasks[symbol], "风险指标", symbol) or {},
+                "评级": db_stats.get("评级", {}),
+                "分红统计": db_stats.get("分红统计", {})
+            })
 
         return {
             "success": True,
@@ -887,7 +1079,12 @@ async def startup_event():
     except Exception as e:
         logger.error(f"[启动] 数据库初始化失败: {str(e)}", exc_info=True)
 
-    # 启动定时任务调度器
+    # 注册缓存预热任务（启动时执行一次，相关数据更新后再次执行）
+    register_warmer('fund_ranking', warm_fund_ranking, interval_minutes=FUND_RANK_WARM_MINUTES)
+    register_warmer('money_fund', warm_money_fund, after_jobs=('update_money_fund',))
+    register_warmer('fund_daily_nav', warm_fund_daily_nav)
+
+    # 启动定时任务调度器（随后在后台预热缓存）
     try:
         start_scheduler()
         logger.info("[启动] 定时任务调度器已启动")
@@ -911,6 +1108,24 @@ async def shutdown_event():
     except Exception as e:
         logger.error(f"[关闭] 停止定时任务失败: {str(e)}", exc_info=True)
 
+    # 关闭上游线程池
+    try:
+        upstream_executor.shutdown()
+    except Exception as e:
+        logger.error(f"[关闭] 关闭上游线程池失败: {str(e)}", exc_info=True)
+
+    # 关闭数据库读线程池
+    try:
+        async_db.shutdown()
+    except Exception as e:
+        logger.error(f"[关闭] 关闭数据库读线程池失败: {str(e)}", exc_info=True)
+
+    # 停止数据库写线程（等待已入队的写操作完成）
+    try:
+        db_writer.shutdown()
+    except Exception as e:
+        logger.error(f"[关闭] 停止数据库写线程失败: {str(e)}", exc_info=True)
+
     logger.info("========== 系统已关闭 ==========")
 
 
@@ -926,20 +1141,12 @@ async def get_data_status():
     获取所有数据的状态信息
     """
     try:
-        conn = get_db()
-        cursor = conn.cursor()
-
-        # 估值数据统计
-        cursor.execute('SELECT COUNT(*) as count, MAX(更新时间) as last_update FROM fund_value_estimation')
-        estimation_stats = cursor.fetchone()
-
-        # 分红数据统计
-        cursor.execute('SELECT COUNT(*) as count, COUNT(DISTINCT 基金代码) as fund_count, MAX(更新时间) as last_update FROM fund_dividend')
-        dividend_stats = cursor.fetchone()
-
-        # 评级数据统计
-        cursor.execute('SELECT COUNT(*) as count, MAX(更新时间) as last_update FROM fund_rating_all')
-        rating_stats = cursor.fetchone()
+        # 估值、分红、评级数据统计（并发查询）
+        estimation_stats, dividend_stats, rating_stats = await asyncio.gather(
+            async_db.fetch_one('SELECT COUNT(*) as count, MAX(更新时间) as last_update FROM fund_value_estimation'),
+            async_db.fetch_one('SELECT COUNT(*) as count, COUNT(DISTINCT 基金代码) as fund_count, MAX(更新时间) as last_update FROM fund_dividend'),
+            async_db.fetch_one('SELECT COUNT(*) as count, MAX(更新时间) as last_update FROM fund_rating_all')
+        )
 
         return {
             "success": True,
@@ -991,7 +1198,8 @@ async def get_scheduler_status():
             "success": True,
             "data": {
                 "running": scheduler.running,
-                "jobs": jobs_info
+                "jobs": jobs_info,
+                "ingestion": get_ingestion_stats()
             }
         }
     except Exception as e:
@@ -1078,6 +1286,9 @@ async def get_cache_status():
     """
     try:
         stats = fund_rank_cache.get_stats()
+        stats['early_expiry'] = early_expiry_stats.get_stats()
+        stats['aktools'] = get_aktools_cache_stats()
+        stats['tiered'] = await async_db.run(tiered_cache.get_stats)
         return {
             "success": True,
             "data": stats
@@ -1087,6 +1298,39 @@ async def get_cache_status():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/admin/upstream_status")
+async def get_upstream_status():
+    """
+    获取上游线程池统计信息（排队深度、等待时间、执行耗时）
+    """
+    try:
+        return {
+            "success": True,
+            "data": get_upstream_stats()
+        }
+    except Exception as e:
+        logger.error(f"获取上游线程池状态失败: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/admin/db_pool_status")
+async def get_db_pool_status():
+    """
+    获取数据库连接池和写线程使用情况（连接数、占用率、写队列深度、批次大小）
+    """
+    try:
+        return {
+            "success": True,
+            "data": {
+                **get_pool_stats(),
+                "writer": db_writer.get_stats()
+            }
+        }
+    except Exception as e:
+        logger.error(f"获取数据库连接池状态失败: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.post("/api/admin/clear_cache")
 async def clear_cache():
     """
@@ -1094,6 +1338,7 @@ async def clear_cache():
     """
     try:
         fund_rank_cache.clear()
+        await clear_aktools_cache()
         return {
             "success": True,
             "message": "缓存已清空"
@@ -1119,7 +1364,7 @@ class FundRankFilterRequest(BaseModel):
 
 
 @app.post("/api/fund_rank_filtered")
-async def get_fund_rank_filtered(request: FundRankFilterRequest):
+async def get_fund_rank_filtered(request: FundRankFilterRequest, response: Response):
     """
     获取基金排行数据并根据条件筛选（带缓存）
 
@@ -1144,37 +1389,13 @@ async def get_fund_rank_filtered(request: FundRankFilterRequest):
         return_1y_min = request.return_1y_min
         return_1y_max = request.return_1y_max
         fee_max = request.fee_max
-        import pandas as pd
-        from db.database import get_db
 
         # DEBUG: 打印接收到的参数
         logger.info(f"[API DEBUG] 接收到的参数 - symbol: '{symbol}', type: {type(symbol)}")
         logger.info(f"[API DEBUG] request对象: {request}")
 
-        # 尝试从数据库缓存获取
-        cached_data = CacheHelper.get_fund_ranking(symbol)
-
-        if cached_data is not None:
-            # 使用数据库缓存数据
-            rank_df = pd.DataFrame(cached_data)
-            logger.info(f"[API] 使用数据库缓存数据: symbol={symbol}, 数据量={len(rank_df)}")
-        else:
-            # 从AkShare API获取
-            logger.info(f"[API] 缓存未命中,从AkShare获取数据: symbol={symbol}")
-            rank_df = ak.fund_open_fund_rank_em(symbol=symbol)
-            logger.info(f"[API DEBUG] AkShare返回数据量: {len(rank_df) if rank_df is not None else 0}")
-
-            if rank_df is not None and not rank_df.empty:
-                # 添加基金类型列
-                if symbol == '全部':
-                    # 对于"全部"分类，从基金名称智能推断类型
-                    rank_df['基金类型'] = rank_df['基金简称'].apply(infer_fund_type)
-                else:
-                    # 对于特定分类，使用查询参数作为类型
-                    rank_df['基金类型'] = symbol
-                # 存入数据库缓存（转为字典列表格式）
-                cache_data = rank_df.to_dict('records')
-                CacheHelper.set_fund_ranking(symbol, cache_data)
+        # 获取排行快照（内存缓存 -> 数据库缓存 -> AkShare）
+        rank_df = await load_fund_ranking(symbol, response)
 
         if rank_df is None or rank_df.empty:
             return {"success": True, "data": [], "total": 0, "filtered": 0}
@@ -1184,82 +1405,41 @@ async def get_fund_rank_filtered(request: FundRankFilterRequest):
         # 获取评级数据（如果需要按评级筛选）
         rating_dict = {}
         if rating_min is not None:
-            conn = get_db()
-            cursor = conn.cursor()
-            cursor.execute('SELECT 代码, 晨星评级 FROM fund_rating_all WHERE 晨星评级 IS NOT NULL')
-            rows = cursor.fetchall()
+            rows = await async_db.fetch_all('SELECT 代码, 晨星评级 FROM fund_rating_all WHERE 晨星评级 IS NOT NULL')
             rating_dict = {row['代码']: row['晨星评级'] for row in rows if row['晨星评级'] is not None}
 
-        # 应用筛选条件
-        filtered_indices = []
-
-        for idx, row in rank_df.iterrows():
-            # 评级筛选
-            if rating_min is not None:
-                fund_code = str(row.get('基金代码', ''))
-                fund_rating = rating_dict.get(fund_code)
-                if fund_rating is None or fund_rating < rating_min:
-                    continue
-
-            # 收益率筛选（需要将字符串转换为浮点数）
-            def get_float_value(val):
-                if val is None or val == '' or val == '-' or val == '---':
-                    return None
-                try:
-                    return float(val)
-                except:
-                    return None
-
-            # 近1月收益率筛选
-            if return_1m_min is not None or return_1m_max is not None:
-                val = get_float_value(row.get('近1月'))
-                if val is None:
-                    continue
-                if return_1m_min is not None and val < return_1m_min:
-                    continue
-                if return_1m_max is not None and val > return_1m_max:
-                    continue
-
-            # 近3月收益率筛选
-            if return_3m_min is not None or return_3m_max is not None:
-                val = get_float_value(row.get('近3月'))
-                if val is None:
-                    continue
-                if return_3m_min is not None and val < return_3m_min:
-                    continue
-                if return_3m_max is not None and val > return_3m_max:
-                    continue
-
-            # 近6月收益率筛选
-            if return_6m_min is not None or return_6m_max is not None:
-                val = get_float_value(row.get('近6月'))
-                if val is None:
-                    continue
-                if return_6m_min is not None and val < return_6m_min:
-                    continue
-                if return_6m_max is not None and val > return_6m_max:
-                    continue
-
-            # 近1年收益率筛选
-            if return_1y_min is not None or return_1y_max is not None:
-                val = get_float_value(row.get('近1年'))
-                if val is None:
-                    continue
-                if return_1y_min is not None and val < return_1y_min:
-                    continue
-                if return_1y_max is not None and val > return_1y_max:
-                    continue
-
-            # 手续费筛选（从评级表获取）
-            if fee_max is not None:
-                # 这里可以从评级表获取手续费信息
-                # 由于排行榜数据不包含手续费，暂时跳过此筛选
-                pass
-
-            filtered_indices.append(idx)
+        # 应用筛选条件: 逐列构建布尔掩码，一次切片
+        mask = pd.Series(True, index=rank_df.index)
+        codes = rank_df['基金代码'].astype(str) if '基金代码' in rank_df.columns else None
+
+        # 评级筛选（无评级的基金不满足条件）
+        if rating_min is not None:
+            ratings = codes.map(rating_dict) if codes is not None else pd.Series(float('nan'), index=rank_df.index)
+            mask &= pd.to_numeric(ratings, errors='coerce') >= rating_min
+
+        # 收益率筛选（'', '-', '---' 等非数值视为无数据，不满足条件）
+        for column, low, high in (
+            ('近1月', return_1m_min, return_1m_max),
+            ('近3月', return_3m_min, return_3m_max),
+            ('近6月', return_6m_min, return_6m_max),
+            ('近1年', return_1y_min, return_1y_max),
+        ):
+            if low is None and high is None:
+                continue
+            if column not in rank_df.columns:
+                mask &= False
+                continue
+            values = pd.to_numeric(rank_df[column], errors='coerce')
+            mask &= values.notna()
+            if low is not None:
+                mask &= values >= low
+            if high is not None:
+                mask &= values <= high
+
+        # 手续费筛选: 排行榜数据不包含手续费，暂时跳过 fee_max
 
         # 筛选后的数据
-        filtered_df = rank_df.loc[filtered_indices]
+        filtered_df = rank_df[mask]
         filtered_count = len(filtered_df)
 
         # 转换为JSON格式前,需要替换NaN和Inf值
@@ -1280,6 +1460,59 @@ async def get_fund_rank_filtered(request: FundRankFilterRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _fetch_and_store_etf_hist(symbol: str, period: str, adjust: str):
+    """
+    从AkShare获取ETF历史行情并整体替换该ETF在该周期、复权类型下的缓存（单飞调用，在东方财富线程池中执行）
+
+    Returns:
+        AkShare 返回的 DataFrame，无数据时不写入缓存
+    """
+    started = time.perf_counter()
+    df = ak.fund_etf_hist_em(symbol=symbol, period=period, adjust=adjust)
+    if df is None or df.empty:
+        return df
+    compute_seconds = time.perf_counter() - started
+
+    # 准备批量插入数据
+    records = []
+    for _, row in df.iterrows():
+        records.append((
+            symbol,
+            period,
+            adjust,
+            str(row['日期']),
+            float(row['开盘']) if row['开盘'] is not None else None,
+            float(row['收盘']) if row['收盘'] is not None else None,
+            float(row['最高']) if row['最高'] is not None else None,
+            float(row['最低']) if row['最低'] is not None else None,
+            int(row['成交量']) if row['成交量'] is not None else None,
+            float(row['成交额']) if row['成交额'] is not None else None,
+            float(row['振幅']) if row['振幅'] is not None else None,
+            float(row['涨跌幅']) if row['涨跌幅'] is not None else None,
+            float(row['涨跌额']) if row['涨跌额'] is not None else None,
+            float(row['换手率']) if row['换手率'] is not None else None,
+            compute_seconds
+        ))
+
+    # 清空旧数据并批量插入新数据（交给单写线程，在同一个事务中完成）
+    insert_query = '''
+        INSERT INTO fund_etf_hist_cache
+        (基金代码, 周期, 复权, 日期, 开盘, 收盘, 最高, 最低, 成交量, 成交额, 振幅, 涨跌幅, 涨跌额, 换手率, 更新时间, 计算耗时)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, ?)
+    '''
+
+    def store_etf_hist(conn):
+        conn.execute(
+            'DELETE FROM fund_etf_hist_cache WHERE 基金代码 = ? AND 周期 = ? AND 复权 = ?',
+            (symbol, period, adjust)
+        )
+        return conn.executemany(insert_query, records).rowcount
+
+    row_count = execute_transaction(store_etf_hist)
+    logger.info(f"[ETF历史行情] 数据已缓存: symbol={symbol}, period={period}, adjust={adjust}, 插入 {row_count} 条")
+    return df
+
+
 @app.get("/api/fund_etf_hist/{symbol}")
 def get_fund_etf_hist(
     symbol: str,
@@ -1313,39 +1546,54 @@ def get_fund_etf_hist(
         - 日K线: 缓存60分钟（每天数据更新一次）
         - 周K线: 缓存120分钟
         - 月K线: 缓存180分钟
+        - 按 代码 + 周期 + 复权类型 分别缓存，有效期按该组合缩短 0~10% 的抖动，过期前按 XFetch 概率提前后台刷新
         - 查询缓存，如果有缓存数据且未过期，直接返回
         - 否则调用AkShare API，存入缓存
     """
     try:
         logger.info(f"[ETF历史行情] 请求: symbol={symbol}, period={period}, adjust={adjust}")
 
-        conn = get_db()
-        cursor = conn.cursor()
-
-        # 确定缓存有效期（分钟）
+        # 确定缓存有效期（分钟），按代码、周期和复权类型加入抖动，同时缓存的ETF不会同时过期
         cache_ttl_map = {
             'daily': 60,    # 日K线缓存60分钟
             'weekly': 120,  # 周K线缓存120分钟
             'monthly': 180  # 月K线缓存180分钟
         }
         cache_ttl = cache_ttl_map.get(period, 60)
+        ttl_seconds = jittered_ttl(cache_ttl * 60, f'fund_etf_hist:{symbol}:{period}:{adjust}')
 
-        # 检查缓存（根据symbol, period, adjust查询）
+        # 检查缓存（根据 symbol + period + adjust 查询，与后台刷新写入的缓存一致）
         # 注意：不考虑start_date/end_date，因为数据库存的是全量数据，前端筛选即可
-        # 使用UTC时间比较（CURRENT_TIMESTAMP是UTC）
-        cursor.execute('''
-            SELECT 日期, 开盘, 收盘, 最高, 最低, 成交量, 成交额, 振幅, 涨跌幅, 涨跌额, 换手率, 更新时间
-            FROM fund_etf_hist_cache
-            WHERE 基金代码 = ?
-            AND datetime(更新时间, '+' || ? || ' minutes') > datetime('now')
-            ORDER BY 日期 ASC
-        ''', (symbol, cache_ttl))
-
-        cached_rows = cursor.fetchall()
+        # 同步端点运行在 FastAPI 线程池中，借用连接后立即归还
+        cache_key = (symbol, period, adjust)
+        meta = execute_query(
+            'SELECT 更新时间, 计算耗时 FROM fund_etf_hist_cache WHERE 基金代码 = ? AND 周期 = ? AND 复权 = ? LIMIT 1',
+            cache_key
+        )
+        age = CacheHelper.cache_age_seconds(meta[0]['更新时间']) if meta else None
+        cached_rows = []
+        if age is not None and age < ttl_seconds:
+            cached_rows = execute_query('''
+                SELECT 日期, 开盘, 收盘, 最高, 最低, 成交量, 成交额, 振幅, 涨跌幅, 涨跌额, 换手率, 更新时间
+                FROM fund_etf_hist_cache
+                WHERE 基金代码 = ? AND 周期 = ? AND 复权 = ?
+                ORDER BY 日期 ASC
+            ''', cache_key)
 
         if cached_rows:
-            # 缓存命中
-            data = [dict(row) for row in cached_rows]
+            # 缓存命中，过期前按 XFetch 概率提前后台刷新（单飞）
+            if should_refresh_early(age, ttl_seconds, meta[0]['计算耗时']):
+                def on_done(future):
+                    if future.exception() is not None:
+                        logger.warning(f"[ETF历史行情] 后台刷新失败: symbol={symbol}, 错误={future.exception()}")
+
+                early_expiry_stats.record('fund_etf_hist')
+                logger.info(f"[ETF历史行情] 缓存即将过期，提前后台刷新: symbol={symbol}")
+                upstream_executor.submit_shared(
+                    _fetch_and_store_etf_hist, symbol, period, adjust, host='eastmoney'
+                ).add_done_callback(on_done)
+
+            data = cached_rows
 
             # 根据前端请求的日期范围筛选
             if start_date:
@@ -1368,11 +1616,10 @@ def get_fund_etf_hist(
         # 缓存未命中，调用AkShare API
         logger.info(f"[ETF历史行情] 缓存未命中，调用AkShare API: symbol={symbol}")
 
-        df = ak.fund_etf_hist_em(
-            symbol=symbol,
-            period=period,
-            adjust=adjust
-        )
+        # 同步端点运行在 FastAPI 线程池中，这里仍通过东方财富线程池限制并发
+        df = upstream_executor.submit_shared(
+            _fetch_and_store_etf_hist, symbol, period, adjust, host='eastmoney'
+        ).result()
 
         if df is None or df.empty:
             logger.warning(f"[ETF历史行情] API返回空数据: symbol={symbol}")
@@ -1385,38 +1632,6 @@ def get_fund_etf_hist(
                 "symbol": symbol
             }
 
-        # 准备批量插入数据
-        records = []
-        for _, row in df.iterrows():
-            records.append((
-                symbol,
-                str(row['日期']),
-                float(row['开盘']) if row['开盘'] is not None else None,
-                float(row['收盘']) if row['收盘'] is not None else None,
-                float(row['最高']) if row['最高'] is not None else None,
-                float(row['最低']) if row['最低'] is not None else None,
-                int(row['成交量']) if row['成交量'] is not None else None,
-                float(row['成交额']) if row['成交额'] is not None else None,
-                float(row['振幅']) if row['振幅'] is not None else None,
-                float(row['涨跌幅']) if row['涨跌幅'] is not None else None,
-                float(row['涨跌额']) if row['涨跌额'] is not None else None,
-                float(row['换手率']) if row['换手率'] is not None else None
-            ))
-
-        # 清空旧数据
-        cursor.execute('DELETE FROM fund_etf_hist_cache WHERE 基金代码 = ?', (symbol,))
-        conn.commit()
-
-        # 批量插入新数据
-        from db.database import execute_many
-        insert_query = '''
-            INSERT INTO fund_etf_hist_cache
-            (基金代码, 日期, 开盘, 收盘, 最高, 最低, 成交量, 成交额, 振幅, 涨跌幅, 涨跌额, 换手率, 更新时间)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-        '''
-        row_count = execute_many(insert_query, records)
-        logger.info(f"[ETF历史行情] 数据已缓存: symbol={symbol}, 插入 {row_count} 条")
-
         # 转换为返回格式
         result_data = df.to_dict('records')
 
@@ -1444,7 +1659,9 @@ def get_fund_etf_hist(
 
 
 @app.get("/api/fund_rating/{symbol}")
-async def get_fund_rating(symbol: str):
+@cache_control('update_rating')
+@etag_response('fund_rating_all')
+async def get_fund_rating(symbol: str, request: Request, response: Response):
     """
     获取基金评级信息
 
@@ -1454,8 +1671,6 @@ async def get_fund_rating(symbol: str):
     返回基金的各项评级信息(上海证券、招商证券、济安金信、晨星评级等)
     """
     try:
-        from db.database import execute_query
-
         logger.info(f"[基金评级] 查询基金: {symbol}")
 
         # 从数据库查询评级数据
@@ -1469,7 +1684,7 @@ async def get_fund_rating(symbol: str):
             WHERE 代码 = ?
         '''
 
-        results = execute_query(query, (symbol,))
+        results = await async_db.fetch_all(query, (symbol,))
 
         if not results:
             logger.warning(f"[基金评级] 未找到基金: {symbol}")
@@ -1515,7 +1730,7 @@ async def get_fund_dividend_rank(
         logger.info(f"[分红排行] 查询参数 - limit: {limit}, sort_by: {sort_by}")
 
         # 从AkShare获取分红排行数据
-        df = ak.fund_fh_rank_em()
+        df = await run_upstream_shared(ak.fund_fh_rank_em)
 
         # 根据排序字段排序
         if sort_by == "累计次数":
@@ -1547,7 +1762,9 @@ async def get_fund_dividend_rank(
 
 
 @app.get("/api/fund_dividend/{symbol}")
-async def get_fund_dividend_history(symbol: str):
+@cache_control('update_dividend')
+@etag_response('fund_dividend')
+async def get_fund_dividend_history(symbol: str, request: Request, response: Response):
     """
     获取指定基金的历史分红记录
 
@@ -1557,8 +1774,6 @@ async def get_fund_dividend_history(symbol: str):
     返回该基金所有历史分红记录,按除息日期倒序排列
     """
     try:
-        from db.database import execute_query
-
         logger.info(f"[基金分红] 查询基金: {symbol}")
 
         # 从数据库查询分红记录
@@ -1571,7 +1786,7 @@ async def get_fund_dividend_history(symbol: str):
             ORDER BY 除息日期 DESC
         '''
 
-        results = execute_query(query, (symbol,))
+        results = await async_db.fetch_all(query, (symbol,))
 
         if not results:
             logger.warning(f"[基金分红] 未找到基金分红记录: {symbol}")
@@ -1628,11 +1843,8 @@ async def get_fund_risk_indicators(symbol: str, force_update: bool = False):
         from datetime import datetime, timedelta
         from db.scheduler import update_fund_risk_indicators_single
 
-        conn = get_db()
-        cursor = conn.cursor()
-
         # 检查是否有缓存数据且未过期（TTL: 7天）
-        cursor.execute('''
+        results = await async_db.fetch_all('''
             SELECT * FROM fund_risk_indicators_xq
             WHERE 基金代码 = ?
             AND datetime(更新时间) > datetime('now', '-7 days')
@@ -1645,12 +1857,10 @@ async def get_fund_risk_indicators(symbol: str, force_update: bool = False):
                 END
         ''', (symbol,))
 
-        results = [dict(row) for row in cursor.fetchall()]
-
         # 如果没有数据或force_update=True，则更新数据
         if not results or force_update:
             logger.info(f"[风险指标] 正在更新基金 {symbol} 的风险指标数据...")
-            success = update_fund_risk_indicators_single(symbol)
+            success = await upstream_executor.run(update_fund_risk_indicators_single, symbol, host='xueqiu')
 
             if not success:
                 return {
@@ -1661,7 +1871,7 @@ async def get_fund_risk_indicators(symbol: str, force_update: bool = False):
                 }
 
             # 重新查询数据
-            cursor.execute('''
+            results = await async_db.fetch_all('''
                 SELECT * FROM fund_risk_indicators_xq
                 WHERE 基金代码 = ?
                 ORDER BY
@@ -1672,8 +1882,6 @@ async def get_fund_risk_indicators(symbol: str, force_update: bool = False):
                         ELSE 4
                     END
             ''', (symbol,))
-
-            results = [dict(row) for row in cursor.fetchall()]
             source = "xueqiu"
         else:
             source = "database"
@@ -1711,19 +1919,42 @@ async def get_fund_portfolio_hold(
     - date: 季度日期 (格式: YYYYMMDD，例如: 20231231)
 
     返回基金的前10大重仓股票明细（东方财富数据源）
+
+    缓存策略: 按年份保存到 fund_holdings_cache（持仓类型 'stock'），已定稿的季度不再获取，
+    已结束但未定稿的季度在披露期内每6小时最多刷新一次（见 db/holdings.py）
     """
     try:
-        import akshare as ak
-
         logger.info(f"[基金持仓] 查询参数 - symbol: {symbol}, date: {date}")
 
-        # 从AkShare获取持仓数据
-        df = ak.fund_portfolio_hold_em(symbol=symbol, date=date)
+        if not (len(date) >= 4 and date[:4].isdigit()):
+            # 未指定年份（取上游最新年份）时不缓存
+            df = await run_upstream(ak.fund_portfolio_hold_em, symbol=symbol, date=date)
+            data = df.to_dict('records')
+            return {
+                "success": True,
+                "count": len(data),
+                "data": data,
+                "fund_code": symbol,
+                "date": date,
+                "source": "eastmoney"
+            }
 
-        # 转换为字典列表
-        data = df.to_dict('records')
+        # 上游按年份返回该年各季度持仓
+        year = int(date[:4])
+        source = "cache"
+        state = await async_db.run(get_holdings_sync_state, symbol, year)
+        if is_holdings_refresh_due(year, state):
+            try:
+                await upstream_executor.run_shared(sync_stock_holdings, symbol, year, host='eastmoney')
+                source = "eastmoney"
+            except Exception as sync_error:
+                if state is None:
+                    raise
+                logger.warning(f"[基金持仓] {symbol} {year}年 刷新失败，使用已保存数据: {sync_error}")
 
-        logger.info(f"[基金持仓] 成功获取 {len(data)} 条持仓数据")
+        data = await async_db.run(load_stock_holdings, symbol, year)
+
+        logger.info(f"[基金持仓] 返回 {len(data)} 条持仓数据 (来源: {source})")
 
         return {
             "success": True,
@@ -1731,7 +1962,7 @@ async def get_fund_portfolio_hold(
             "data": data,
             "fund_code": symbol,
             "date": date,
-            "source": "eastmoney"
+            "source": source
         }
 
     except Exception as e:
@@ -1753,13 +1984,31 @@ async def get_fund_portfolio_change(
 
     返回基金的持仓变动明细（东方财富数据源）
     """
+    empty_result = {
+        "success": True,
+        "count": 0,
+        "data": [],
+        "fund_code": symbol,
+        "date": date,
+        "source": "eastmoney",
+        "message": "该基金暂无持仓变动数据"
+    }
+
     try:
         import akshare as ak
 
         logger.info(f"[持仓变动] 查询参数 - symbol: {symbol}, date: {date}")
 
+        if await negative_cache.is_empty('fund_portfolio_change', symbol, date):
+            return empty_result
+
         # 从AkShare获取持仓变动数据
-        df = ak.fund_portfolio_change_em(symbol=symbol, date=date)
+        df = await run_upstream(ak.fund_portfolio_change_em, symbol=symbol, date=date)
+
+        if df is None or df.empty:
+            logger.warning(f"[持仓变动] 基金 {symbol} 在 {date} 暂无持仓变动数据")
+            await negative_cache.remember('fund_portfolio_change', symbol, date)
+            return empty_result
 
         # 转换为字典列表
         data = df.to_dict('records')
@@ -1775,38 +2024,32 @@ async def get_fund_portfolio_change(
             "source": "eastmoney"
         }
 
-    except KeyError as e:
-        # akshare库在没有数据时可能抛出KeyError（如'序号'列不存在）
-        logger.warning(f"[持仓变动] 该基金暂无持仓变动数据: {str(e)}")
-        return {
-            "success": True,
-            "count": 0,
-            "data": [],
-            "fund_code": symbol,
-            "date": date,
-            "source": "eastmoney",
-            "message": "该基金暂无持仓变动数据"
-        }
     except Exception as e:
         error_msg = str(e)
-        # 检查是否是数据不存在的常见错误
-        if "no data" in error_msg.lower() or "empty" in error_msg.lower():
+        # akshare库在没有数据时可能抛出KeyError（如'序号'列不存在）
+        if is_no_data_error(e):
             logger.warning(f"[持仓变动] 该基金暂无持仓变动数据: {error_msg}")
-            return {
-                "success": True,
-                "count": 0,
-                "data": [],
-                "fund_code": symbol,
-                "date": date,
-                "source": "eastmoney",
-                "message": "该基金暂无持仓变动数据"
-            }
+            await negative_cache.remember('fund_portfolio_change', symbol, date)
+            return empty_result
         logger.error(f"[持仓变动] 失败: {error_msg}", exc_info=True)
         raise HTTPException(status_code=500, detail=error_msg)
 
 
+def _sync_net_value_history(symbol: str, indicator: str) -> int:
+    """
+    从 AkShare 获取历史走势并追加入库（在上游线程池中执行）
+
+    Returns:
+        新写入的行数
+    """
+    df = ak.fund_open_fund_info_em(symbol=symbol, indicator=indicator)
+    return CacheHelper.append_net_value_history(symbol, indicator, df)
+
+
 @app.get("/api/fund_net_value_history/{symbol}")
+@cache_control(ttl_key='fund_net_value_history')
 async def get_fund_net_value_history(
+    response: Response,
     symbol: str,
     indicator: str = "单位净值走势"
 ):
@@ -1840,15 +2083,42 @@ async def get_fund_net_value_history(
     }
 
     数据来源: 东方财富网 - fund_open_fund_info_em API
-    缓存策略: 10分钟
+    缓存策略: 数据保存在 fund_net_value_history，之后只追加比已入库最新日期更新的数据；
+    已有当日数据或1小时内同步过时直接从数据库读取（分红送配详情、拆分详情不缓存）
     """
     try:
         logger.info(f"[历史净值] 查询参数 - symbol: {symbol}, indicator: {indicator}")
 
-        # 调用AkShare API
-        df = ak.fund_open_fund_info_em(symbol=symbol, indicator=indicator)
+        if indicator not in CacheHelper.NET_VALUE_INDICATORS:
+            # 非日期序列的指标（分红送配详情、拆分详情）不入库，直接请求上游
+            df = await run_upstream(ak.fund_open_fund_info_em, symbol=symbol, indicator=indicator)
+            data = [] if df is None or df.empty else df.to_dict('records')
+            return {
+                "success": True,
+                "symbol": symbol,
+                "indicator": indicator,
+                "total": len(data),
+                "data": data,
+                "source": "eastmoney"
+            }
 
-        if df is None or df.empty:
+        source = "cache"
+        state = await async_db.run(CacheHelper.get_net_value_sync_state, symbol, indicator)
+        if CacheHelper.is_net_value_sync_due(state):
+            try:
+                added = await upstream_executor.run_shared(
+                    _sync_net_value_history, symbol, indicator, host='eastmoney'
+                )
+                source = "eastmoney"
+                logger.info(f"[历史净值] {symbol} {indicator} 同步完成，新增 {added} 条")
+            except Exception as sync_error:
+                if state is None:
+                    raise
+                logger.warning(f"[历史净值] {symbol} {indicator} 同步失败，使用已入库数据: {sync_error}")
+
+        data = await async_db.run(CacheHelper.get_net_value_history, symbol, indicator)
+
+        if not data:
             logger.warning(f"[历史净值] 基金 {symbol} 没有{indicator}数据")
             return {
                 "success": True,
@@ -1856,17 +2126,11 @@ async def get_fund_net_value_history(
                 "indicator": indicator,
                 "total": 0,
                 "data": [],
-                "source": "eastmoney",
+                "source": source,
                 "message": f"该基金暂无{indicator}数据"
             }
 
-        # 反转数据顺序(从新到旧)
-        df = df.iloc[::-1].reset_index(drop=True)
-
-        # 转换为字典列表
-        data = df.to_dict('records')
-
-        logger.info(f"[历史净值] 成功获取 {len(data)} 条{indicator}数据(已按日期降序排列)")
+        logger.info(f"[历史净值] 返回 {len(data)} 条{indicator}数据(按日期降序, 来源: {source})")
 
         return {
             "success": True,
@@ -1874,7 +2138,7 @@ async def get_fund_net_value_history(
             "indicator": indicator,
             "total": len(data),
             "data": data,
-            "source": "eastmoney"
+            "source": source
         }
 
     except Exception as e:
@@ -1901,21 +2165,27 @@ async def get_fund_industry_allocation(symbol: str):
 
     数据来源: 东方财富网
     """
+    empty_result = {
+        "success": True,
+        "count": 0,
+        "data": [],
+        "fund_code": symbol,
+        "source": "eastmoney",
+        "message": "该基金暂无行业配置数据"
+    }
+
     try:
         logger.info(f"[行业配置] 查询参数 - symbol: {symbol}")
 
-        df = ak.fund_portfolio_industry_allocation_em(symbol=symbol)
+        if await negative_cache.is_empty('fund_industry_allocation', symbol):
+            return empty_result
+
+        df = await run_upstream(ak.fund_portfolio_industry_allocation_em, symbol=symbol)
 
         if df is None or df.empty:
             logger.warning(f"[行业配置] 基金 {symbol} 暂无行业配置数据")
-            return {
-                "success": True,
-                "count": 0,
-                "data": [],
-                "fund_code": symbol,
-                "source": "eastmoney",
-                "message": "该基金暂无行业配置数据"
-            }
+            await negative_cache.remember('fund_industry_allocation', symbol)
+            return empty_result
 
         data = df.to_dict('records')
         logger.info(f"[行业配置] 成功获取 {len(data)} 条行业配置数据")
@@ -1928,44 +2198,13 @@ async def get_fund_industry_allocation(symbol: str):
             "source": "eastmoney"
         }
 
-    except KeyError as e:
-        # akshare库在没有数据时可能抛出KeyError
-        logger.warning(f"[行业配置] 该基金暂无行业配置数据: {str(e)}")
-        return {
-            "success": True,
-            "count": 0,
-            "data": [],
-            "fund_code": symbol,
-            "source": "eastmoney",
-            "message": "该基金暂无行业配置数据"
-        }
-    except ValueError as e:
-        # akshare库在数据格式不匹配时可能抛出ValueError（如列数不匹配）
-        error_msg = str(e)
-        if "length mismatch" in error_msg.lower() or "length of values" in error_msg.lower():
-            logger.warning(f"[行业配置] 该基金暂无行业配置数据（数据格式问题）: {error_msg}")
-            return {
-                "success": True,
-                "count": 0,
-                "data": [],
-                "fund_code": symbol,
-                "source": "eastmoney",
-                "message": "该基金暂无行业配置数据"
-            }
-        logger.error(f"[行业配置] 失败: {error_msg}", exc_info=True)
-        raise HTTPException(status_code=500, detail=error_msg)
     except Exception as e:
         error_msg = str(e)
-        if "no data" in error_msg.lower() or "empty" in error_msg.lower():
+        # akshare库在没有数据时可能抛出KeyError，或在列数不匹配时抛出ValueError
+        if is_no_data_error(e):
             logger.warning(f"[行业配置] 该基金暂无行业配置数据: {error_msg}")
-            return {
-                "success": True,
-                "count": 0,
-                "data": [],
-                "fund_code": symbol,
-                "source": "eastmoney",
-                "message": "该基金暂无行业配置数据"
-            }
+            await negative_cache.remember('fund_industry_allocation', symbol)
+            return empty_result
         logger.error(f"[行业配置] 失败: {error_msg}", exc_info=True)
         raise HTTPException(status_code=500, detail=error_msg)
 
@@ -1973,7 +2212,9 @@ async def get_fund_industry_allocation(symbol: str):
 # ========== 基金申购赎回状态 API ==========
 
 @app.get("/api/fund_purchase_status")
+@cache_control('update_purchase_status')
 async def get_fund_purchase_status(
+    response: Response,
     purchase_status: Optional[str] = None,
     redeem_status: Optional[str] = None,
     fund_type: Optional[str] = None,
@@ -1991,9 +2232,6 @@ async def get_fund_purchase_status(
     - offset: 偏移量（分页用，默认0）
     """
     try:
-        conn = get_db()
-        cursor = conn.cursor()
-
         # 构建查询条件
         conditions = []
         params = []
@@ -2014,8 +2252,6 @@ async def get_fund_purchase_status(
 
         # 查询总数
         count_query = f"SELECT COUNT(*) as total FROM fund_purchase_status WHERE {where_clause}"
-        cursor.execute(count_query, params)
-        total = cursor.fetchone()['total']
 
         # 查询数据
         query = f"""
@@ -2029,11 +2265,12 @@ async def get_fund_purchase_status(
             ORDER BY 序号 ASC
             LIMIT ? OFFSET ?
         """
-        params.extend([limit, offset])
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
-
-        data = [dict(row) for row in rows]
+        # 总数和分页数据并发查询
+        count_row, data = await asyncio.gather(
+            async_db.fetch_one(count_query, params),
+            async_db.fetch_all(query, params + [limit, offset])
+        )
+        total = count_row['total']
 
         logger.info(f"[申购赎回状态] 查询成功: {len(data)} 条记录")
         return {
@@ -2054,7 +2291,8 @@ async def get_fund_purchase_status(
 
 
 @app.get("/api/fund_purchase_status/{symbol}")
-async def get_fund_purchase_status_by_code(symbol: str):
+@cache_control('update_purchase_status')
+async def get_fund_purchase_status_by_code(symbol: str, response: Response):
     """
     根据基金代码查询申购赎回状态
 
@@ -2062,9 +2300,6 @@ async def get_fund_purchase_status_by_code(symbol: str):
     - symbol: 基金代码（如：110011）
     """
     try:
-        conn = get_db()
-        cursor = conn.cursor()
-
         query = """
             SELECT
                 序号, 基金代码, 基金简称, 基金类型,
@@ -2074,10 +2309,9 @@ async def get_fund_purchase_status_by_code(symbol: str):
             FROM fund_purchase_status
             WHERE 基金代码 = ?
         """
-        cursor.execute(query, (symbol,))
-        row = cursor.fetchone()
+        data = await async_db.fetch_one(query, (symbol,))
 
-        if not row:
+        if not data:
             logger.warning(f"[申购赎回状态] 基金 {symbol} 未找到")
             return {
                 "success": False,
@@ -2086,7 +2320,6 @@ async def get_fund_purchase_status_by_code(symbol: str):
                 "message": "该基金暂无申购赎回状态数据"
             }
 
-        data = dict(row)
         logger.info(f"[申购赎回状态] 基金 {symbol} 查询成功")
         return {
             "success": True,
@@ -2103,54 +2336,47 @@ async def get_fund_purchase_status_by_code(symbol: str):
 
 
 @app.get("/api/fund_purchase_status_stats")
-async def get_fund_purchase_status_stats():
+@cache_control('update_purchase_status')
+async def get_fund_purchase_status_stats(response: Response):
     """
     获取申购赎回状态统计信息
     """
     try:
-        conn = get_db()
-        cursor = conn.cursor()
-
-        # 统计各种申购状态的数量
-        cursor.execute("""
-            SELECT
-                申购状态,
-                COUNT(*) as count
-            FROM fund_purchase_status
-            GROUP BY 申购状态
-            ORDER BY count DESC
-        """)
-        purchase_stats = [dict(row) for row in cursor.fetchall()]
-
-        # 统计各种赎回状态的数量
-        cursor.execute("""
-            SELECT
-                赎回状态,
-                COUNT(*) as count
-            FROM fund_purchase_status
-            GROUP BY 赎回状态
-            ORDER BY count DESC
-        """)
-        redeem_stats = [dict(row) for row in cursor.fetchall()]
-
-        # 统计基金类型分布
-        cursor.execute("""
-            SELECT
-                基金类型,
-                COUNT(*) as count
-            FROM fund_purchase_status
-            GROUP BY 基金类型
-            ORDER BY count DESC
-        """)
-        type_stats = [dict(row) for row in cursor.fetchall()]
-
-        # 获取最新更新时间
-        cursor.execute("SELECT MAX(更新时间) as latest_update FROM fund_purchase_status")
-        latest_update = cursor.fetchone()['latest_update']
-
-        # 获取总记录数
-        cursor.execute("SELECT COUNT(*) as total FROM fund_purchase_status")
-        total = cursor.fetchone()['total']
+        purchase_stats, redeem_stats, type_stats, summary = await asyncio.gather(
+            # 统计各种申购状态的数量
+            async_db.fetch_all("""
+                SELECT
+                    申购状态,
+                    COUNT(*) as count
+                FROM fund_purchase_status
+                GROUP BY 申购状态
+                ORDER BY count DESC
+            """),
+            # 统计各种赎回状态的数量
+            async_db.fetch_all("""
+                SELECT
+                    赎回状态,
+                    COUNT(*) as count
+                FROM fund_purchase_status
+                GROUP BY 赎回状态
+                ORDER BY count DESC
+            """),
+            # 统计基金类型分布
+            async_db.fetch_all("""
+                SELECT
+                    基金类型,
+                    COUNT(*) as count
+                FROM fund_purchase_status
+                GROUP BY 基金类型
+                ORDER BY count DESC
+            """),
+            # 获取总记录数和最新更新时间
+            async_db.fetch_one(
+                "SELECT COUNT(*) as total, MAX(更新时间) as latest_update FROM fund_purchase_status"
+            )
+        )
+        total = summary['total']
+        latest_update = summary['latest_update']
 
         logger.info("[申购赎回状态] 统计查询成功")
         return {
@@ -2174,7 +2400,11 @@ async def get_fund_purchase_status_stats():
 # ========== 基金公司规模数据 API ==========
 
 @app.get("/api/fund_company_aum")
+@cache_control('update_company_aum')
+@etag_response('fund_company_aum')
 async def get_fund_company_aum(
+    request: Request,
+    response: Response,
     limit: int = 100,
     offset: int = 0,
     min_scale: Optional[float] = None,
@@ -2190,9 +2420,6 @@ async def get_fund_company_aum(
         sort_by: 排序字段 (全部管理规模/全部基金数/全部经理数，默认: 全部管理规模)
     """
     try:
-        conn = get_db()
-        cursor = conn.cursor()
-
         # 构建WHERE子句
         where_clauses = []
         params = []
@@ -2210,8 +2437,6 @@ async def get_fund_company_aum(
 
         # 获取总记录数
         count_query = f"SELECT COUNT(*) as total FROM fund_company_aum WHERE {where_clause}"
-        cursor.execute(count_query, params)
-        total = cursor.fetchone()['total']
 
         # 查询数据
         query = f"""
@@ -2220,8 +2445,12 @@ async def get_fund_company_aum(
             ORDER BY {sort_by} DESC
             LIMIT ? OFFSET ?
         """
-        cursor.execute(query, params + [limit, offset])
-        rows = [dict(row) for row in cursor.fetchall()]
+        # 总数和分页数据并发查询
+        count_row, rows = await asyncio.gather(
+            async_db.fetch_one(count_query, params),
+            async_db.fetch_all(query, params + [limit, offset])
+        )
+        total = count_row['total']
 
         logger.info(f"[基金公司规模] 查询成功: {len(rows)} 条记录")
         return {
@@ -2242,19 +2471,17 @@ async def get_fund_company_aum(
 
 
 @app.get("/api/fund_company_aum/{company_name}")
-async def get_fund_company_aum_by_name(company_name: str):
+@cache_control('update_company_aum')
+@etag_response('fund_company_aum')
+async def get_fund_company_aum_by_name(company_name: str, request: Request, response: Response):
     """
     根据基金公司名称查询规模数据
     """
     try:
-        conn = get_db()
-        cursor = conn.cursor()
-
-        cursor.execute(
+        row = await async_db.fetch_one(
             "SELECT * FROM fund_company_aum WHERE 基金公司 = ?",
             (company_name,)
         )
-        row = cursor.fetchone()
 
         if not row:
             logger.warning(f"[基金公司规模] 未找到公司: {company_name}")
@@ -2268,7 +2495,7 @@ async def get_fund_company_aum_by_name(company_name: str):
         logger.info(f"[基金公司规模] 查询成功: {company_name}")
         return {
             "success": True,
-            "data": dict(row),
+            "data": row,
             "company_name": company_name,
             "source": "database",
             "message": "成功获取基金公司规模数据"
@@ -2281,15 +2508,14 @@ async def get_fund_company_aum_by_name(company_name: str):
 
 
 @app.get("/api/fund_company_aum_hist/{company_name}")
-async def get_fund_company_aum_hist(company_name: str):
+@cache_control('update_company_aum_hist')
+@etag_response('fund_company_aum_hist')
+async def get_fund_company_aum_hist(company_name: str, request: Request, response: Response):
     """
     获取基金公司规模历史数据（年度趋势）
     """
     try:
-        conn = get_db()
-        cursor = conn.cursor()
-
-        cursor.execute(
+        rows = await async_db.fetch_all(
             """
             SELECT * FROM fund_company_aum_hist
             WHERE 基金公司 = ?
@@ -2297,7 +2523,6 @@ async def get_fund_company_aum_hist(company_name: str):
             """,
             (company_name,)
         )
-        rows = [dict(row) for row in cursor.fetchall()]
 
         if not rows:
             logger.warning(f"[基金公司历史规模] 未找到公司: {company_name}")
@@ -2325,19 +2550,17 @@ async def get_fund_company_aum_hist(company_name: str):
 
 
 @app.get("/api/fund_market_trend")
-async def get_fund_market_trend():
+@cache_control('update_market_trend')
+@etag_response('fund_market_aum_trend')
+async def get_fund_market_trend(request: Request, response: Response):
     """
     获取基金市场规模趋势数据（季度数据）
     """
     try:
-        conn = get_db()
-        cursor = conn.cursor()
-
-        cursor.execute("""
+        rows = await async_db.fetch_all("""
             SELECT * FROM fund_market_aum_trend
             ORDER BY 日期 DESC
         """)
-        rows = [dict(row) for row in cursor.fetchall()]
 
         if not rows:
             logger.warning("[市场规模趋势] 数据为空")
@@ -2370,48 +2593,44 @@ async def get_fund_market_trend():
 
 
 @app.get("/api/fund_company_stats")
-async def get_fund_company_stats():
+@cache_control('update_company_aum')
+@etag_response('fund_company_aum')
+async def get_fund_company_stats(request: Request, response: Response):
     """
     获取基金公司数据统计信息
     """
     try:
-        conn = get_db()
-        cursor = conn.cursor()
-
-        # 统计基金公司总数
-        cursor.execute("SELECT COUNT(*) as total FROM fund_company_aum")
-        total_companies = cursor.fetchone()['total']
-
-        # 统计各规模段公司数量
-        cursor.execute("""
-            SELECT
-                CASE
-                    WHEN 全部管理规模 >= 5000 THEN '超大型(>5000亿)'
-                    WHEN 全部管理规模 >= 2000 THEN '大型(2000-5000亿)'
-                    WHEN 全部管理规模 >= 1000 THEN '中大型(1000-2000亿)'
-                    WHEN 全部管理规模 >= 500 THEN '中型(500-1000亿)'
-                    WHEN 全部管理规模 >= 200 THEN '中小型(200-500亿)'
-                    ELSE '小型(<200亿)'
-                END as scale_level,
-                COUNT(*) as count
-            FROM fund_company_aum
-            GROUP BY scale_level
-            ORDER BY MIN(全部管理规模) DESC
-        """)
-        scale_distribution = [dict(row) for row in cursor.fetchall()]
-
-        # TOP 10 基金公司
-        cursor.execute("""
-            SELECT 基金公司, 全部管理规模, 全部基金数, 全部经理数
-            FROM fund_company_aum
-            ORDER BY 全部管理规模 DESC
-            LIMIT 10
-        """)
-        top_companies = [dict(row) for row in cursor.fetchall()]
-
-        # 获取最新更新时间
-        cursor.execute("SELECT MAX(更新时间) as latest_update FROM fund_company_aum")
-        latest_update = cursor.fetchone()['latest_update']
+        scale_distribution, top_companies, summary = await asyncio.gather(
+            # 统计各规模段公司数量
+            async_db.fetch_all("""
+                SELECT
+                    CASE
+                        WHEN 全部管理规模 >= 5000 THEN '超大型(>5000亿)'
+                        WHEN 全部管理规模 >= 2000 THEN '大型(2000-5000亿)'
+                        WHEN 全部管理规模 >= 1000 THEN '中大型(1000-2000亿)'
+                        WHEN 全部管理规模 >= 500 THEN '中型(500-1000亿)'
+                        WHEN 全部管理规模 >= 200 THEN '中小型(200-500亿)'
+                        ELSE '小型(<200亿)'
+                    END as scale_level,
+                    COUNT(*) as count
+                FROM fund_company_aum
+                GROUP BY scale_level
+                ORDER BY MIN(全部管理规模) DESC
+            """),
+            # TOP 10 基金公司
+            async_db.fetch_all("""
+                SELECT 基金公司, 全部管理规模, 全部基金数, 全部经理数
+                FROM fund_company_aum
+                ORDER BY 全部管理规模 DESC
+                LIMIT 10
+            """),
+            # 统计基金公司总数和最新更新时间
+            async_db.fetch_one(
+                "SELECT COUNT(*) as total, MAX(更新时间) as latest_update FROM fund_company_aum"
+            )
+        )
+        total_companies = summary['total']
+        latest_update = summary['latest_update']
 
         logger.info("[基金公司统计] 查询成功")
         return {
@@ -2454,8 +2673,10 @@ async def export_fund_ranking(
     try:
         logger.info(f"[导出排行数据] 开始导出, 格式={format}, 筛选条件={filters}")
 
-        # 从AkShare获取基金排行数据
-        df = ak.fund_open_fund_rank_em(symbol="全部")
+        # 获取基金排行快照（共享缓存）
+        df = await load_fund_ranking("全部")
+        if df is None or df.empty:
+            raise HTTPException(status_code=404, detail="没有找到符合条件的数据")
 
         # 转换为列表字典
         data = df.to_dict('records')
@@ -2515,7 +2736,7 @@ async def export_company_ranking(format: str):
         logger.info(f"[导出公司排行] 开始导出, 格式={format}")
 
         # 从AkShare获取基金公司规模数据
-        df = ak.fund_scale_open_sina()
+        df = await run_upstream_shared(ak.fund_scale_open_sina)
 
         # 转换为列表字典
         data = df.to_dict('records')
@@ -2563,7 +2784,7 @@ async def export_dividend_rank(format: str):
         logger.info(f"[导出分红排行] 开始导出, 格式={format}")
 
         # 从AkShare获取基金分红排行数据
-        df = ak.fund_fh_rank_em()
+        df = await run_upstream_shared(ak.fund_fh_rank_em)
 
         # 转换为列表字典
         data = df.to_dict('records')
@@ -1,7 +1,11 @@
 """
 中间件模块
-提供错误处理、请求日志等功能
+提供错误处理、请求日志、AKTools 接口缓存等功能
 """
 from .error_handler import ErrorHandlerMiddleware, RequestLoggingMiddleware, ErrorResponse
+from .aktools_cache import AKToolsCacheMiddleware, clear_aktools_cache, get_aktools_cache_stats
 
-__all__ = ['ErrorHandlerMiddleware', 'RequestLoggingMiddleware', 'ErrorResponse']
+__all__ = [
+    'ErrorHandlerMiddleware', 'RequestLoggingMiddleware', 'ErrorResponse',
+    'AKToolsCacheMiddleware', 'clear_aktools_cache', 'get_aktools_cache_stats'
+]
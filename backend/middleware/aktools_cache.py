@@ -0,0 +1,243 @@
+"""
+AKTools 透传接口缓存中间件
+为挂载在 /api/public/{item_id} 的 AKTools 路由提供服务端读穿缓存:
+- 缓存键: 接口名 + 排序归一化后的查询参数
+- 按接口名前缀配置不同的缓存时间
+- 超过最大体积的响应不缓存
+- 并发的相同请求合并为一次上游调用
+- 响应存入两级缓存（utils/tiered_cache.py），多个 worker 共享同一份上游结果
+"""
+import asyncio
+import logging
+import os
+import threading
+from urllib.parse import urlencode
+from typing import Any, Dict, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from utils.tiered_cache import tiered_cache
+
+logger = logging.getLogger(__name__)
+
+# AKTools 路由前缀（main.py 挂载到 /api）
+AKTOOLS_PATH_PREFIX = '/api/public/'
+
+# 两级缓存中的命名空间
+AKTOOLS_NAMESPACE = 'aktools'
+
+# 各接口缓存时间（秒），按接口名前缀匹配，先匹配先生效；0 表示不缓存
+AKTOOLS_CACHE_TTL_RULES: Tuple[Tuple[str, int], ...] = (
+    ('fund_name_em', 6 * 3600),                  # 基金列表（每日更新）
+    ('fund_individual_basic_info', 6 * 3600),    # 基金基本信息（雪球）
+    ('fund_overview_em', 6 * 3600),              # 基金概况
+    ('fund_individual_detail_hold', 3600),       # 资产配置（季度披露）
+    ('fund_individual_analysis', 3600),          # 风险指标
+    ('fund_portfolio_hold_em', 3600),            # 股票持仓（季度披露）
+    ('fund_open_fund_info_em', 1800),            # 净值走势（每日更新）
+    ('fund_etf_fund_info_em', 1800),             # 场内基金净值走势
+    ('fund_open_fund_rank_em', 600),             # 开放式基金排行
+    ('fund_money_rank_em', 600),                 # 货币基金排行
+    ('fund_open_fund_daily_em', 300),            # 开放式基金每日净值
+    ('fund_etf_fund_daily_em', 300),             # 场内基金每日净值
+    ('fund_value_estimation', 60),               # 盘中估值
+    ('movie_boxoffice_realtime', 60),            # 实时票房
+    ('movie_boxoffice', 3600),                   # 日/周/月/年票房
+    ('air_quality', 1800),                       # 空气质量
+    ('air_city_table', 1800),
+    ('news_cctv', 3600),                         # 新闻联播
+)
+
+# 未匹配规则的接口默认缓存时间（秒）
+AKTOOLS_CACHE_DEFAULT_TTL = int(os.getenv('AKTOOLS_CACHE_DEFAULT_TTL', 300))
+
+# 单个响应最大缓存体积（字节），超过则只透传不缓存
+AKTOOLS_CACHE_MAX_BYTES = int(os.getenv('AKTOOLS_CACHE_MAX_BYTES', 5 * 1024 * 1024))
+
+# 缓存响应时保留的响应头（content-length 由 Response 重新计算）
+_SKIPPED_HEADERS = {'content-length'}
+
+
+def get_item_ttl(item_id: str) -> int:
+    """
+    获取接口的缓存时间
+
+    Args:
+        item_id: AKTools 接口名（如 fund_name_em）
+
+    Returns:
+        缓存时间（秒），0 表示不缓存
+    """
+    for prefix, ttl in AKTOOLS_CACHE_TTL_RULES:
+        if item_id.startswith(prefix):
+            return ttl
+    return AKTOOLS_CACHE_DEFAULT_TTL
+
+
+def make_cache_key(item_id: str, query_items) -> str:
+    """
+    生成缓存键: 接口名 + 排序后的查询参数（参数顺序不同视为同一请求）
+
+    Args:
+        item_id: AKTools 接口名
+        query_items: 查询参数 (key, value) 列表
+
+    Returns:
+        缓存键
+    """
+    query = urlencode(sorted((key, value.strip()) for key, value in query_items))
+    return f"aktools:{item_id}?{query}" if query else f"aktools:{item_id}"
+
+
+class AKToolsCacheStats:
+    """AKTools 缓存统计（命中、合并、透传）"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.bypassed = 0
+        self.oversized = 0
+        self.upstream_errors = 0
+
+    def record(self, field: str):
+        """计数加一"""
+        with self.lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取统计信息"""
+        with self.lock:
+            served = self.hits + self.misses + self.coalesced
+            saved = self.hits + self.coalesced
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'bypassed': self.bypassed,
+                'oversized': self.oversized,
+                'upstream_errors': self.upstream_errors,
+                'upstream_saved_rate': f"{(saved / served * 100) if served else 0:.2f}%",
+            }
+
+
+# 全局统计实例
+aktools_cache_stats = AKToolsCacheStats()
+
+# 写入共享缓存的后台任务（保留引用，避免任务被提前回收）
+_store_tasks = set()
+
+
+class AKToolsCacheMiddleware(BaseHTTPMiddleware):
+    """
+    AKTools 透传接口读穿缓存中间件
+
+    仅缓存 GET 请求的 200 响应；响应头 X-Cache 标记 HIT / MISS / COALESCED / BYPASS
+    """
+
+    def __init__(self, app, max_bytes: int = AKTOOLS_CACHE_MAX_BYTES):
+        super().__init__(app)
+        self.max_bytes = max_bytes
+        # 正在请求上游的缓存键 -> 等待结果的 Future（仅在事件循环线程访问）
+        self.inflight: Dict[str, asyncio.Future] = {}
+
+    async def dispatch(self, request: Request, call_next):
+        path = request.url.path
+        if request.method != 'GET' or not path.startswith(AKTOOLS_PATH_PREFIX):
+            return await call_next(request)
+
+        item_id = path[len(AKTOOLS_PATH_PREFIX):].strip('/')
+        ttl = get_item_ttl(item_id)
+        if not item_id or ttl <= 0:
+            aktools_cache_stats.record('bypassed')
+            response = await call_next(request)
+            response.headers['X-Cache'] = 'BYPASS'
+            return response
+
+        key = make_cache_key(item_id, request.query_params.multi_items())
+
+        pending = self.inflight.get(key)
+        if pending is None:
+            cached = await tiered_cache.aget(AKTOOLS_NAMESPACE, key)
+            if cached is not None:
+                aktools_cache_stats.record('hits')
+                return self._build_response(cached, 'HIT')
+            pending = self.inflight.get(key)
+
+        # 已有相同请求在访问上游，等待其结果
+        if pending is not None:
+            aktools_cache_stats.record('coalesced')
+            logger.debug(f"[AKTools缓存] 合并请求 {key}")
+            entry = await asyncio.shield(pending)
+            return self._build_response(entry, 'COALESCED')
+
+        future = asyncio.get_running_loop().create_future()
+        # 没有等待者时也取走异常，避免 "exception was never retrieved" 警告
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self.inflight[key] = future
+        try:
+            response = await call_next(request)
+            entry = await self._read_entry(response)
+            future.set_result(entry)
+        except BaseException as e:
+            aktools_cache_stats.record('upstream_errors')
+            future.set_exception(e if isinstance(e, Exception) else RuntimeError('上游请求已取消'))
+            raise
+        finally:
+            self.inflight.pop(key, None)
+
+        aktools_cache_stats.record('misses')
+        if entry['status_code'] == 200:
+            if len(entry['body']) <= self.max_bytes:
+                # 写入共享缓存不阻塞当前响应
+                task = asyncio.create_task(tiered_cache.aset(AKTOOLS_NAMESPACE, key, entry, ttl))
+                _store_tasks.add(task)
+                task.add_done_callback(_store_tasks.discard)
+            else:
+                aktools_cache_stats.record('oversized')
+                logger.info(f"[AKTools缓存] 响应过大不缓存 {key}, 大小={len(entry['body'])}字节")
+        return self._build_response(entry, 'MISS')
+
+    @staticmethod
+    async def _read_entry(response) -> Dict[str, Any]:
+        """读取流式响应体，转换为可缓存/可共享的条目"""
+        body = b''.join([chunk async for chunk in response.body_iterator])
+        headers = {
+            name: value for name, value in response.headers.items()
+            if name.lower() not in _SKIPPED_HEADERS
+        }
+        return {
+            'status_code': response.status_code,
+            'headers': headers,
+            'body': body,
+            'media_type': getattr(response, 'media_type', None),
+        }
+
+    @staticmethod
+    def _build_response(entry: Dict[str, Any], cache_status: str) -> Response:
+        """由缓存条目构造响应"""
+        response = Response(
+            content=entry['body'],
+            status_code=entry['status_code'],
+            headers=entry['headers'],
+            media_type=entry['media_type'],
+        )
+        response.headers['X-Cache'] = cache_status
+        return response
+
+
+async def clear_aktools_cache():
+    """清空 AKTools 响应缓存（包括其他 worker 的进程内缓存）"""
+    await tiered_cache.adelete(AKTOOLS_NAMESPACE)
+
+
+def get_aktools_cache_stats() -> Dict[str, Any]:
+    """获取 AKTools 缓存统计信息"""
+    return {
+        **aktools_cache_stats.get_stats(),
+        'max_bytes': AKTOOLS_CACHE_MAX_BYTES,
+        'default_ttl': AKTOOLS_CACHE_DEFAULT_TTL,
+    }
@@ -0,0 +1,100 @@
+"""
+基金估值入库性能基准脚本
+对比逐行 iterrows 旧实现与入库管道（db/ingestion.py）的按列向量化转换
+
+用法:
+    python scripts/bench_fund_estimation.py [--rows 20000] [--repeat 5]
+"""
+import sys
+import os
+import argparse
+import random
+import time
+from datetime import datetime
+
+# 添加父目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import pandas as pd
+
+from db.datasets import FUND_VALUE_ESTIMATION
+from db.ingestion import transform, to_records
+
+
+def make_frame(rows: int) -> pd.DataFrame:
+    """构造与 ak.fund_value_estimation_em() 列结构一致的合成数据"""
+    rng = random.Random(42)
+    est_date, pub_date = '2025-11-15', '2025-11-14'
+    return pd.DataFrame({
+        '序号': range(1, rows + 1),
+        '基金代码': [f'{i:06d}' for i in range(rows)],
+        '基金名称': [f'测试基金{i}' for i in range(rows)],
+        f'{est_date}-估算数据-估算值': [f'{rng.uniform(0.5, 5):.4f}' for _ in range(rows)],
+        f'{est_date}-估算数据-估算增长率': [f'{rng.uniform(-5, 5):.2f}%' for _ in range(rows)],
+        f'{est_date}-公布数据-单位净值': [f'{rng.uniform(0.5, 5):.4f}' for _ in range(rows)],
+        f'{est_date}-公布数据-日增长率': [f'{rng.uniform(-5, 5):.2f}%' for _ in range(rows)],
+        '估算偏差': [f'{rng.uniform(-1, 1):.2f}%' for _ in range(rows)],
+        f'{pub_date}-单位净值': [f'{rng.uniform(0.5, 5):.4f}' for _ in range(rows)],
+    })
+
+
+def build_records_iterrows(df: pd.DataFrame) -> list:
+    """旧实现: 逐行 iterrows，每行重新扫描所有列名"""
+    records = []
+    for _, row in df.iterrows():
+        估算值 = 估算增长率 = 单位净值 = 日增长率 = 估算时间 = None
+        for col in row.index:
+            if '估算数据-估算值' in col:
+                估算值 = str(row[col]) if row[col] is not None else None
+            elif '估算数据-估算增长率' in col:
+                估算增长率 = str(row[col]) if row[col] is not None else None
+                if 估算时间 is None:
+                    date_part = col.split('-')[0]
+                    估算时间 = f"{date_part} {datetime.now().strftime('%H:%M')}"
+            elif '公布数据-单位净值' in col:
+                单位净值 = str(row[col]) if row[col] is not None else None
+            elif '公布数据-日增长率' in col:
+                日增长率 = str(row[col]) if row[col] is not None else None
+        records.append((
+            row.get('基金代码', ''), row.get('基金名称', ''), 估算时间,
+            估算值, 估算增长率, 单位净值, 日增长率, row.get('估算偏差', '')
+        ))
+    return records
+
+
+def build_estimation_records(df: pd.DataFrame) -> list:
+    """新实现: 入库管道的列解析 + 向量化类型转换"""
+    return to_records(transform(FUND_VALUE_ESTIMATION, df))
+
+
+def best_of(func, df: pd.DataFrame, repeat: int) -> float:
+    """多次执行取最短耗时（秒）"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(df)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='基金估值入库性能基准')
+    parser.add_argument('--rows', type=int, default=20000, help='合成数据行数')
+    parser.add_argument('--repeat', type=int, default=5, help='重复次数（取最优）')
+    args = parser.parse_args()
+
+    df = make_frame(args.rows)
+
+    # 校验两种实现结果一致（估算时间除外: 旧实现只取到年份）
+    legacy = build_records_iterrows(df)
+    vectorized = build_estimation_records(df)
+    assert len(legacy) == len(vectorized)
+    assert all(a[:2] + a[3:] == b[:2] + b[3:] for a, b in zip(legacy, vectorized))
+
+    legacy_time = best_of(build_records_iterrows, df, args.repeat)
+    vectorized_time = best_of(build_estimation_records, df, args.repeat)
+
+    print(f"行数: {args.rows}，重复 {args.repeat} 次取最优")
+    print(f"iterrows 逐行实现: {legacy_time * 1000:.1f} ms")
+    print(f"按列向量化实现:    {vectorized_time * 1000:.1f} ms")
+    print(f"加速比: {legacy_time / vectorized_time:.1f}x")
@@ -1,40 +1,285 @@
 """
 统一API缓存装饰器模块
 提供简单易用的内存缓存装饰器，支持灵活的TTL配置和缓存键生成
+
+过期模型（stale-while-revalidate）:
+- 软过期（ttl_seconds）之前: 新鲜命中
+- 软过期之后、硬过期（ttl_seconds + stale_seconds）之前: 立即返回旧值，同时由一个后台任务刷新
+- 硬过期之后: 缓存未命中，请求阻塞等待重新获取
+
+容量控制: 按条目数和估算字节数设上限，超出时按 LRU（最久未访问）淘汰
+并发: 按缓存键分片，每个分片独立加锁；过期时间使用单调时钟并由最小堆跟踪
 """
+import asyncio
 import functools
+import heapq
+import os
+import sys
 import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, Callable
+from typing import Optional, Dict, Any, Callable, List, Tuple
 import logging
 import hashlib
 import json
 
+from starlette.responses import Response
+
 logger = logging.getLogger(__name__)
 
+# 全局缓存默认容量（可通过环境变量调整）
+API_CACHE_MAX_ENTRIES = int(os.getenv('API_CACHE_MAX_ENTRIES', 2000))
+API_CACHE_MAX_BYTES = int(os.getenv('API_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+API_CACHE_SHARDS = int(os.getenv('API_CACHE_SHARDS', 16))
+
+# 估算容器大小时的采样数和递归深度
+_SIZE_SAMPLE = 32
+_SIZE_MAX_DEPTH = 4
+
+
+def estimate_size(data: Any, _depth: int = 0) -> int:
+    """
+    估算对象占用的内存字节数（近似值，用于缓存容量控制）
+
+    - bytes/str: 实际大小
+    - pandas DataFrame/Series: memory_usage(deep=True)
+    - numpy 数组: nbytes
+    - list/tuple/set/dict: 采样前若干元素按平均值外推
+
+    Args:
+        data: 任意对象
+
+    Returns:
+        估算字节数
+    """
+    if data is None or isinstance(data, (bool, int, float)):
+        return sys.getsizeof(data)
+    if isinstance(data, (bytes, bytearray, str)):
+        return sys.getsizeof(data)
+    if hasattr(data, 'memory_usage'):
+        # pandas DataFrame / Series
+        usage = data.memory_usage(deep=True)
+        return int(usage.sum()) if hasattr(usage, 'sum') else int(usage)
+    if hasattr(data, 'nbytes'):
+        # numpy 数组
+        return int(data.nbytes)
+    if _depth >= _SIZE_MAX_DEPTH:
+        return sys.getsizeof(data)
+
+    if isinstance(data, dict):
+        items = data.items()
+        sample = [estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1)
+                  for k, v in _take(items, _SIZE_SAMPLE)]
+    elif isinstance(data, (list, tuple, set, frozenset)):
+        sample = [estimate_size(item, _depth + 1) for item in _take(data, _SIZE_SAMPLE)]
+    else:
+        return sys.getsizeof(data)
+
+    if not sample:
+        return sys.getsizeof(data)
+    return sys.getsizeof(data) + sum(sample) * len(data) // len(sample)
+
+
+def _take(iterable, count: int) -> list:
+    """取可迭代对象的前 count 个元素"""
+    result = []
+    for item in iterable:
+        if len(result) >= count:
+            break
+        result.append(item)
+    return result
+
+
+# 各分片累加的统计字段
+_STAT_FIELDS = ('hits', 'stale_hits', 'misses', 'sets', 'evictions', 'lru_evictions', 'oversized', 'refreshes')
+
+
+class _CacheShard:
+    """
+    缓存分片: 独立的锁、LRU 顺序、过期堆和统计计数
+
+    过期时间使用单调时钟（time.monotonic），不受系统时间调整影响；
+    过期堆按过期时间排序，清理时只弹出已过期的条目（覆盖写入留下的旧堆项惰性丢弃）
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        # 按访问顺序排列，队首为最久未访问的条目
+        self.cache: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        # (硬过期时间, 序号, 缓存键)
+        self.expiry_heap: List[Tuple[float, int, str]] = []
+        self.seq = 0
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+        # 正在后台刷新的缓存键
+        self.refreshing = set()
+        self.stats = dict.fromkeys(_STAT_FIELDS, 0)
+
+    def get_entry(self, key: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            entry = self.cache.get(key)
+            if entry is not None:
+                now = time.monotonic()
+                if now < entry['expires_at']:
+                    stale = now >= entry['fresh_until']
+                    self.stats['stale_hits' if stale else 'hits'] += 1
+                    self.cache.move_to_end(key)
+                    return {
+                        'data': entry['data'],
+                        'age': now - entry['created_at'],
+                        'stale': stale
+                    }
+                # 过期则删除
+                self._remove(key)
+                self.stats['evictions'] += 1
+
+            self.stats['misses'] += 1
+            return None
+
+    def set(self, key: str, data: Any, size: int, ttl_seconds: int, stale_seconds: int) -> bool:
+        with self.lock:
+            if key in self.cache:
+                self._remove(key)
+            if size > self.max_bytes:
+                self.stats['oversized'] += 1
+                return False
+
+            now = time.monotonic()
+            expires_at = now + ttl_seconds + stale_seconds
+            self.cache[key] = {
+                'data': data,
+                'fresh_until': now + ttl_seconds,
+                'expires_at': expires_at,
+                'created_at': now,
+                'created_wall': datetime.now(),
+                'size': size
+            }
+            self.seq += 1
+            heapq.heappush(self.expiry_heap, (expires_at, self.seq, key))
+            self.total_bytes += size
+            self.stats['sets'] += 1
+
+            if len(self.cache) > self.max_entries or self.total_bytes > self.max_bytes:
+                self._evict_overflow()
+            elif len(self.expiry_heap) > 2 * len(self.cache) + 64:
+                self._compact_heap()
+            return True
+
+    def _remove(self, key: str):
+        """删除条目并扣减字节数（调用方持有锁，堆中的旧项惰性丢弃）"""
+        entry = self.cache.pop(key)
+        self.total_bytes -= entry['size']
+
+    def _pop_expired(self, now: float) -> int:
+        """弹出所有已过期的条目，只访问过期部分（调用方持有锁）"""
+        removed = 0
+        heap = self.expiry_heap
+        while heap and heap[0][0] <= now:
+            expires_at, _, key = heapq.heappop(heap)
+            entry = self.cache.get(key)
+            # 条目已被覆盖写入或删除时，堆项已失效
+            if entry is not None and entry['expires_at'] == expires_at:
+                self._remove(key)
+                removed += 1
+        self.stats['evictions'] += removed
+        return removed
+
+    def _compact_heap(self):
+        """重建过期堆，丢弃失效堆项（调用方持有锁）"""
+        self.expiry_heap = [
+            (entry['expires_at'], i, key)
+            for i, (key, entry) in enumerate(self.cache.items())
+        ]
+        heapq.heapify(self.expiry_heap)
+        self.seq = len(self.expiry_heap)
+
+    def _evict_overflow(self):
+        """超出条目数或字节上限时淘汰: 先清理已过期条目，仍超出再按 LRU 淘汰（调用方持有锁）"""
+        self._pop_expired(time.monotonic())
+
+        while self.cache and (len(self.cache) > self.max_entries or self.total_bytes > self.max_bytes):
+            key = next(iter(self.cache))
+            self._remove(key)
+            self.stats['lru_evictions'] += 1
+            logger.debug(f"[缓存淘汰] key={key[:50]}... (LRU)")
+
+        if len(self.expiry_heap) > 2 * len(self.cache) + 64:
+            self._compact_heap()
+
+    def peek(self, key: str) -> Optional[Any]:
+        with self.lock:
+            entry = self.cache.get(key)
+            if entry is None or time.monotonic() >= entry['expires_at']:
+                return None
+            return entry['data']
+
+    def delete(self, key: str) -> bool:
+        with self.lock:
+            if key not in self.cache:
+                return False
+            self._remove(key)
+            self.stats['evictions'] += 1
+            return True
+
+    def delete_prefix(self, prefix: str) -> int:
+        with self.lock:
+            keys = [key for key in self.cache if key.startswith(prefix)]
+            for key in keys:
+                self._remove(key)
+            self.stats['evictions'] += len(keys)
+            return len(keys)
+
+    def clear(self) -> int:
+        with self.lock:
+            count = len(self.cache)
+            self.cache.clear()
+            self.expiry_heap.clear()
+            self.total_bytes = 0
+            self.stats['evictions'] += count
+            return count
+
+    def clear_expired(self) -> int:
+        with self.lock:
+            return self._pop_expired(time.monotonic())
+
 
 class APICache:
     """
     统一的API内存缓存类
 
     特性:
-    - 线程安全
-    - 自动过期清理
+    - 线程安全，按缓存键分片加锁，并发读取不争用同一把锁
+    - 过期时间使用单调时钟，过期清理只访问已过期的条目（最小堆）
     - 支持自定义TTL
     - 支持自定义缓存键
+    - 支持软/硬过期（过期后一段时间内仍可返回旧值并后台刷新）
+    - 条目数和估算字节数有上限（平均分配到各分片），超出时按分片内 LRU 淘汰
     - 提供缓存统计信息
     """
 
-    def __init__(self):
-        """初始化缓存"""
-        self.cache: Dict[str, Dict[str, Any]] = {}
-        self.lock = threading.Lock()
-        self.stats = {
-            'hits': 0,
-            'misses': 0,
-            'sets': 0,
-            'evictions': 0
-        }
+    def __init__(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None,
+                 shards: Optional[int] = None):
+        """
+        初始化缓存
+
+        Args:
+            max_entries: 最大条目数，默认 API_CACHE_MAX_ENTRIES
+            max_bytes: 估算总字节数上限，默认 API_CACHE_MAX_BYTES；单个超过分片上限的条目不缓存
+            shards: 分片数，默认 API_CACHE_SHARDS；条目很少的缓存可设为 1 以保持全局 LRU
+        """
+        self.max_entries = max_entries or API_CACHE_MAX_ENTRIES
+        self.max_bytes = max_bytes or API_CACHE_MAX_BYTES
+        shard_count = max(1, min(shards or API_CACHE_SHARDS, self.max_entries))
+        self.shards = [
+            _CacheShard(max(1, self.max_entries // shard_count), max(1, self.max_bytes // shard_count))
+            for _ in range(shard_count)
+        ]
+
+    def _shard(self, key: str) -> _CacheShard:
+        """缓存键所在的分片"""
+        return self.shards[hash(key) % len(self.shards)]
 
     def get(self, key: str) -> Optional[Any]:
         """
@@ -44,53 +289,113 @@ class APICache:
             key: 缓存键
 
         Returns:
-            缓存的数据，如果不存在或已过期则返回None
+            缓存的数据，如果不存在或已硬过期则返回None（软过期的旧值照常返回）
         """
-        with self.lock:
-            if key in self.cache:
-                entry = self.cache[key]
-                if datetime.now() < entry['expires_at']:
-                    self.stats['hits'] += 1
-                    remaining = (entry['expires_at'] - datetime.now()).total_seconds()
-                    logger.debug(f"[缓存命中] key={key[:50]}..., 剩余{remaining:.0f}秒")
-                    return entry['data']
-                else:
-                    # 过期则删除
-                    del self.cache[key]
-                    self.stats['evictions'] += 1
-                    logger.debug(f"[缓存过期] key={key[:50]}...")
+        entry = self.get_entry(key)
+        return entry['data'] if entry is not None else None
 
-            self.stats['misses'] += 1
-            return None
+    def get_entry(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        获取缓存条目及其新鲜度
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            {'data': 数据, 'age': 已缓存秒数, 'stale': 是否已软过期}，不存在或已硬过期则返回None
+        """
+        return self._shard(key).get_entry(key)
 
-    def set(self, key: str, data: Any, ttl_seconds: int):
+    def set(self, key: str, data: Any, ttl_seconds: int, stale_seconds: int = 0):
         """
         设置缓存数据
 
         Args:
             key: 缓存键
             data: 要缓存的数据
-            ttl_seconds: 过期时间（秒）
+            ttl_seconds: 软过期时间（秒）
+            stale_seconds: 软过期后仍可返回旧值的时长（秒），默认0即到期立即失效
         """
-        with self.lock:
-            expires_at = datetime.now() + timedelta(seconds=ttl_seconds)
-            self.cache[key] = {
-                'data': data,
-                'expires_at': expires_at,
-                'created_at': datetime.now()
-            }
-            self.stats['sets'] += 1
+        # 在锁外估算大小，避免大对象阻塞其他读写
+        size = estimate_size(data) + sys.getsizeof(key)
+        if self._shard(key).set(key, data, size, ttl_seconds, stale_seconds):
+            logger.debug(f"[缓存设置] key={key[:50]}..., 大小={size}字节, TTL={ttl_seconds}秒, 旧值可用{stale_seconds}秒")
+        else:
+            logger.warning(f"[缓存设置] key={key[:50]}... 估算大小 {size} 字节超过缓存上限，不缓存")
+
+    def peek(self, key: str) -> Optional[Any]:
+        """
+        读取缓存数据但不计入命中统计、不调整 LRU 顺序
 
-            data_size = len(data) if isinstance(data, (list, dict)) else 'N/A'
-            logger.debug(f"[缓存设置] key={key[:50]}..., 数据量={data_size}, TTL={ttl_seconds}秒")
+        Returns:
+            缓存的数据，不存在或已硬过期返回None
+        """
+        return self._shard(key).peek(key)
+
+    def delete(self, key: str) -> bool:
+        """
+        删除缓存项
+
+        Returns:
+            是否存在并已删除
+        """
+        return self._shard(key).delete(key)
+
+    def delete_prefix(self, prefix: str) -> int:
+        """
+        删除所有以 prefix 开头的缓存项
+
+        Returns:
+            删除的项数
+        """
+        return sum(shard.delete_prefix(prefix) for shard in self.shards)
+
+    def begin_refresh(self, key: str) -> bool:
+        """
+        标记缓存键开始后台刷新
+
+        Returns:
+            True 表示由调用方负责刷新；False 表示已有刷新在进行
+        """
+        shard = self._shard(key)
+        with shard.lock:
+            if key in shard.refreshing:
+                return False
+            shard.refreshing.add(key)
+            shard.stats['refreshes'] += 1
+            return True
+
+    def end_refresh(self, key: str):
+        """标记缓存键后台刷新结束"""
+        shard = self._shard(key)
+        with shard.lock:
+            shard.refreshing.discard(key)
 
     def clear(self):
         """清空所有缓存"""
-        with self.lock:
-            count = len(self.cache)
-            self.cache.clear()
-            self.stats['evictions'] += count
-            logger.info(f"[缓存清空] 已清除 {count} 个缓存项")
+        count = sum(shard.clear() for shard in self.shards)
+        logger.info(f"[缓存清空] 已清除 {count} 个缓存项")
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """
+        列出所有缓存条目的元信息（不含数据本身）
+
+        Returns:
+            [{'key', 'created_at', 'expires_at', 'data_size', 'bytes'}]
+        """
+        result = []
+        for shard in self.shards:
+            with shard.lock:
+                for key, entry in shard.cache.items():
+                    lifetime = timedelta(seconds=entry['expires_at'] - entry['created_at'])
+                    result.append({
+                        'key': key,
+                        'created_at': entry['created_wall'].isoformat(),
+                        'expires_at': (entry['created_wall'] + lifetime).isoformat(),
+                        'data_size': len(entry['data']) if hasattr(entry['data'], '__len__') else 0,
+                        'bytes': entry['size']
+                    })
+        return result
 
     def get_stats(self) -> Dict[str, Any]:
         """
@@ -99,57 +404,79 @@ class APICache:
         Returns:
             包含缓存统计的字典
         """
-        with self.lock:
-            total_requests = self.stats['hits'] + self.stats['misses']
-            hit_rate = (self.stats['hits'] / total_requests * 100) if total_requests > 0 else 0
-
-            return {
-                'cache_size': len(self.cache),
-                'hits': self.stats['hits'],
-                'misses': self.stats['misses'],
-                'sets': self.stats['sets'],
-                'evictions': self.stats['evictions'],
-                'hit_rate': f"{hit_rate:.2f}%",
-                'total_requests': total_requests
-            }
+        stats = dict.fromkeys(_STAT_FIELDS, 0)
+        cache_size = total_bytes = refreshing = 0
+        for shard in self.shards:
+            with shard.lock:
+                for field in _STAT_FIELDS:
+                    stats[field] += shard.stats[field]
+                cache_size += len(shard.cache)
+                total_bytes += shard.total_bytes
+                refreshing += len(shard.refreshing)
+
+        served = stats['hits'] + stats['stale_hits']
+        total_requests = served + stats['misses']
+        hit_rate = (served / total_requests * 100) if total_requests > 0 else 0
+
+        return {
+            'cache_size': cache_size,
+            'max_entries': self.max_entries,
+            'total_bytes': total_bytes,
+            'max_bytes': self.max_bytes,
+            'shards': len(self.shards),
+            **stats,
+            'refreshing': refreshing,
+            'hit_rate': f"{hit_rate:.2f}%",
+            'total_requests': total_requests
+        }
 
     def clear_expired(self):
         """
-        清理所有过期的缓存项
+        清理所有过期的缓存项（每个分片只弹出过期堆中已到期的部分）
 
         Returns:
             清理的项数
         """
-        with self.lock:
-            now = datetime.now()
-            expired_keys = [
-                key for key, entry in self.cache.items()
-                if now >= entry['expires_at']
-            ]
+        count = sum(shard.clear_expired() for shard in self.shards)
+        if count:
+            logger.info(f"[缓存清理] 已清除 {count} 个过期项")
+        return count
 
-            for key in expired_keys:
-                del self.cache[key]
 
-            self.stats['evictions'] += len(expired_keys)
+# 全局缓存实例
+api_cache = APICache()
 
-            if expired_keys:
-                logger.info(f"[缓存清理] 已清除 {len(expired_keys)} 个过期项")
+# 进行中的后台刷新任务（保留引用，避免任务被提前回收）
+_refresh_tasks = set()
 
-            return len(expired_keys)
 
+def set_cache_headers(response: Optional[Response], age: float, cache_status: str):
+    """
+    在响应上标记缓存年龄（Age）和命中状态（X-Cache）
 
-# 全局缓存实例
-api_cache = APICache()
+    Args:
+        response: 响应对象，为 None 时忽略
+        age: 缓存年龄（秒）
+        cache_status: HIT / STALE / MISS
+    """
+    if response is None:
+        return
+    response.headers['Age'] = str(int(age))
+    response.headers['X-Cache'] = cache_status
 
 
-def cache_response(ttl_seconds: int = 300, key_prefix: str = "", use_args: bool = True):
+def cache_response(ttl_seconds: int = 300, key_prefix: str = "", use_args: bool = True,
+                   stale_seconds: int = 0):
     """
     API响应缓存装饰器
 
     Args:
-        ttl_seconds: 缓存过期时间（秒），默认5分钟
+        ttl_seconds: 缓存软过期时间（秒），默认5分钟
         key_prefix: 缓存键前缀，建议使用API端点路径
         use_args: 是否将函数参数包含在缓存键中，默认True
+        stale_seconds: 软过期后仍返回旧值的时长（秒），期间由一个后台任务刷新；默认0即不返回旧值
+
+    被装饰的接口如果声明了 response: Response 参数，会在响应头写入 Age 和 X-Cache（HIT/STALE/MISS）
 
     Usage:
         @cache_response(ttl_seconds=600, key_prefix="/api/fund_info")
@@ -167,16 +494,34 @@ def cache_response(ttl_seconds: int = 300, key_prefix: str = "", use_args: bool
         @cache_response(ttl_seconds=1800, key_prefix="/api/stats", use_args=False)
         async def get_stats():
             return await calculate_stats()
+
+        # 缓存10分钟，之后1小时内先返回旧值并后台刷新
+        @cache_response(ttl_seconds=600, key_prefix="/api/rank", stale_seconds=3600)
+        async def get_rank(symbol: str, response: Response):
+            return await fetch_rank(symbol)
     """
     def decorator(func: Callable):
+        async def refresh(cache_key: str, args: tuple, kwargs: Dict[str, Any]):
+            """后台刷新软过期的缓存项"""
+            try:
+                result = await func(*args, **kwargs)
+                api_cache.set(cache_key, result, ttl_seconds, stale_seconds)
+                logger.debug(f"[缓存刷新] key={cache_key[:50]}... 后台刷新完成")
+            except Exception as e:
+                logger.warning(f"[缓存刷新] key={cache_key[:50]}... 后台刷新失败，继续使用旧值: {e}")
+            finally:
+                api_cache.end_refresh(cache_key)
+
         @functools.wraps(func)
         async def wrapper(*args, **kwargs):
+            response = next((v for v in kwargs.values() if isinstance(v, Response)), None)
+
             # 生成缓存键
             if use_args:
-                # 将参数转换为字符串并生成哈希
+                # 将参数转换为字符串并生成哈希（Response 对象不参与）
                 params_str = json.dumps({
                     'args': [str(arg) for arg in args],
-                    'kwargs': {k: str(v) for k, v in kwargs.items()}
+                    'kwargs': {k: str(v) for k, v in kwargs.items() if not isinstance(v, Response)}
                 }, sort_keys=True)
                 params_hash = hashlib.md5(params_str.encode()).hexdigest()[:8]
                 cache_key = f"{key_prefix}:{params_hash}"
@@ -184,15 +529,24 @@ def cache_response(ttl_seconds: int = 300, key_prefix: str = "", use_args: bool
                 cache_key = key_prefix
 
             # 尝试从缓存获取
-            cached_data = api_cache.get(cache_key)
-            if cached_data is not None:
-                return cached_data
+            entry = api_cache.get_entry(cache_key)
+            if entry is not None:
+                if entry['stale'] and api_cache.begin_refresh(cache_key):
+                    # 旧值立即返回，由一个后台任务刷新（刷新时不写当前请求的响应头）
+                    refresh_kwargs = {k: v for k, v in kwargs.items() if not isinstance(v, Response)}
+                    refresh_kwargs.update({k: Response() for k, v in kwargs.items() if isinstance(v, Response)})
+                    task = asyncio.create_task(refresh(cache_key, args, refresh_kwargs))
+                    _refresh_tasks.add(task)
+                    task.add_done_callback(_refresh_tasks.discard)
+                set_cache_headers(response, entry['age'], 'STALE' if entry['stale'] else 'HIT')
+                return entry['data']
 
             # 缓存未命中，执行实际函数
             result = await func(*args, **kwargs)
 
             # 缓存结果
-            api_cache.set(cache_key, result, ttl_seconds)
+            api_cache.set(cache_key, result, ttl_seconds, stale_seconds)
+            set_cache_headers(response, 0, 'MISS')
 
             return result
 
@@ -0,0 +1,163 @@
+"""
+HTTP 缓存头（ETag / If-None-Match、Cache-Control / Expires）
+数据库表由定时任务整体刷新的接口，在两次刷新之间返回的内容不变。
+ETag 由所依赖数据表的版本（见 db/table_versions.py）和请求路径、查询参数生成，
+客户端带上 If-None-Match 且仍匹配时直接返回 304，不执行任何数据查询
+
+Cache-Control / Expires 按数据的下次刷新时间设置:
+- 定时任务写入的数据: 有效到相关任务的下次运行时间（见 db.scheduler.next_run_time）
+- 按 CacheHelper.TTL_CONFIG 过期后才重新获取的数据: 有效期为该 TTL
+浏览器和 nginx 等代理在有效期内可以直接复用响应，过期后带 If-None-Match 重新验证
+"""
+import os
+import functools
+import hashlib
+import logging
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from typing import Callable, Optional, Sequence, Tuple
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from db.cache_helper import CacheHelper
+from db.scheduler import next_run_time
+from db.table_versions import table_versions
+
+logger = logging.getLogger(__name__)
+
+# Cache-Control max-age 上限（秒），避免每周任务的数据被缓存过久（手动刷新后最多延迟这么久可见）
+CACHE_CONTROL_MAX_AGE_SECONDS = int(os.getenv('CACHE_CONTROL_MAX_AGE_SECONDS', 24 * 3600))
+
+
+def make_etag(request: Request, tables: Sequence[str], versions: Sequence[Tuple[int, float]]) -> str:
+    """
+    生成强 ETag
+
+    Args:
+        request: 当前请求（路径和排序后的查询参数参与计算）
+        tables: 依赖的数据表
+        versions: 各表的 (版本, 更新时间)，更新时间用于区分重建后的数据库
+
+    Returns:
+        带引号的 ETag，如 "3f2a..."
+    """
+    query = '&'.join(f'{key}={value}' for key, value in sorted(request.query_params.multi_items()))
+    state = ';'.join(f'{table}:{version}:{updated:.6f}' for table, (version, updated) in zip(tables, versions))
+    digest = hashlib.sha1(f'{request.url.path}?{query}|{state}'.encode('utf-8')).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    判断 If-None-Match 是否匹配（按 RFC 9110 使用弱比较，忽略 W/ 前缀）
+
+    Args:
+        if_none_match: 请求头 If-None-Match 的值
+        etag: 当前 ETag
+    """
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in candidates or etag in (tag[2:] if tag.startswith('W/') else tag for tag in candidates)
+
+
+def etag_response(*tables: str):
+    """
+    接口 ETag 装饰器
+
+    被装饰的接口需声明 request: Request 和 response: Response 参数:
+    - If-None-Match 与当前 ETag 匹配时直接返回 304（只读取进程内缓存的表版本）
+    - 否则执行接口，并在响应头写入 ETag
+
+    Args:
+        tables: 接口数据所依赖的数据表
+
+    Usage:
+        @app.get("/api/fund_rating/{symbol}")
+        @etag_response('fund_rating_all')
+        async def get_fund_rating(symbol: str, request: Request, response: Response):
+            ...
+    """
+    def decorator(func: Callable):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            request = next((v for v in kwargs.values() if isinstance(v, Request)), None)
+            response = next((v for v in kwargs.values() if isinstance(v, Response)), None)
+            if request is None:
+                return await func(*args, **kwargs)
+
+            etag = make_etag(request, tables, await table_versions.aget(*tables))
+            if etag_matches(request.headers.get('if-none-match'), etag):
+                logger.debug(f"[ETag] 未修改 {request.url.path} {etag}")
+                return Response(status_code=304, headers={'ETag': etag})
+
+            result = await func(*args, **kwargs)
+            if response is not None and not isinstance(result, Response):
+                response.headers['ETag'] = etag
+            return result
+
+        return wrapper
+    return decorator
+
+
+def set_cache_control(response: Response, expires_at: Optional[datetime], now: Optional[datetime] = None):
+    """
+    按数据过期时间写入 Cache-Control 和 Expires
+
+    Args:
+        response: 响应对象
+        expires_at: 数据过期时间（带时区），None 表示无法确定，要求每次重新验证
+        now: 当前时间，默认 datetime.now(timezone.utc)
+    """
+    now = now or datetime.now(timezone.utc)
+    max_age = 0 if expires_at is None else int((expires_at - now).total_seconds())
+    max_age = max(0, min(max_age, CACHE_CONTROL_MAX_AGE_SECONDS))
+    response.headers['Cache-Control'] = f'public, max-age={max_age}' if max_age else 'no-cache'
+    response.headers['Expires'] = format_datetime(now + timedelta(seconds=max_age), usegmt=True)
+
+
+def cache_control(*jobs: str, ttl_key: Optional[str] = None):
+    """
+    接口 Cache-Control 装饰器
+
+    被装饰的接口需声明 response: Response 参数；与 etag_response 同时使用时放在其外层，
+    304 响应也会带上相同的缓存头。接口抛出异常（HTTPException）时不写入缓存头，
+    以 {"success": False, "error": ...} 返回的上游失败结果设为 no-cache
+
+    Args:
+        jobs: 写入接口数据的定时任务 ID，有效期到其中最早的下次运行时间
+        ttl_key: CacheHelper.TTL_CONFIG 中的键，有效期为该 TTL（与 jobs 同时指定时取较早者）
+
+    Usage:
+        @app.get("/api/fund_rating/{symbol}")
+        @cache_control('update_rating')
+        @etag_response('fund_rating_all')
+        async def get_fund_rating(symbol: str, request: Request, response: Response):
+            ...
+    """
+    def decorator(func: Callable):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            result = await func(*args, **kwargs)
+            target = result if isinstance(result, Response) else \
+                next((v for v in kwargs.values() if isinstance(v, Response)), None)
+            # 注入的 response 参数在接口返回前 status_code 为 None
+            if target is None or (target.status_code or 200) >= 400:
+                return result
+
+            now = datetime.now(timezone.utc)
+            if isinstance(result, dict) and result.get('success') is False and 'error' in result:
+                set_cache_control(target, None, now)
+                return result
+
+            expires = []
+            if jobs:
+                expires.append(next_run_time(*jobs))
+            if ttl_key is not None:
+                expires.append(now + timedelta(minutes=CacheHelper.TTL_CONFIG[ttl_key]))
+            set_cache_control(target, None if not expires or None in expires else min(expires), now)
+            return result
+
+        return wrapper
+    return decorator
@@ -0,0 +1,83 @@
+"""
+无数据结果缓存（负缓存）
+部分基金在上游没有行业配置、持仓变动、债券持仓等数据，AkShare 会返回空表或抛出 KeyError/ValueError。
+这类“确定没有数据”的结果按接口 + 参数缓存一段时间，重复查看时直接返回空结果，不再请求上游。
+
+网络错误、超时等临时失败不属于“无数据”，不会被缓存
+"""
+import os
+import logging
+from typing import Any
+
+from utils.tiered_cache import tiered_cache
+
+logger = logging.getLogger(__name__)
+
+# 两级缓存中的命名空间
+NO_DATA_NAMESPACE = 'no_data'
+
+# 无数据结果缓存时间（秒），季报披露前后数据才会变化，默认6小时
+NO_DATA_TTL_SECONDS = int(os.getenv('NO_DATA_TTL_SECONDS', 6 * 3600))
+
+# 表示“无数据”的异常信息关键字（小写）
+_NO_DATA_MESSAGES = ('no data', 'empty', 'length mismatch', 'length of values')
+
+
+def is_no_data_error(error: Exception) -> bool:
+    """
+    判断 AkShare 抛出的异常是否表示“该基金没有此类数据”
+
+    - KeyError: 返回的表缺少预期列（如 '序号'），通常是空结果
+    - ValueError: 列数不匹配（length mismatch / length of values），通常是空结果
+    - 其他异常: 信息中包含 no data / empty
+
+    Args:
+        error: 上游调用抛出的异常
+
+    Returns:
+        True 表示无数据，False 表示其他错误（网络、解析等）
+    """
+    if isinstance(error, KeyError):
+        return True
+    message = str(error).lower()
+    if isinstance(error, ValueError):
+        return 'length mismatch' in message or 'length of values' in message
+    return any(keyword in message for keyword in _NO_DATA_MESSAGES)
+
+
+def _key(endpoint: str, *params: Any) -> str:
+    return ':'.join([endpoint, *(str(param) for param in params)])
+
+
+class NegativeCache:
+    """按接口 + 参数记录“无数据”结果"""
+
+    def __init__(self, ttl_seconds: int = NO_DATA_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        tiered_cache.register_namespace(NO_DATA_NAMESPACE, ttl_seconds)
+
+    async def is_empty(self, endpoint: str, *params: Any) -> bool:
+        """
+        是否已知该接口 + 参数没有数据
+
+        Args:
+            endpoint: 接口名，如 'fund_industry_allocation'
+            params: 查询参数，如基金代码、季度
+        """
+        if await tiered_cache.aget(NO_DATA_NAMESPACE, _key(endpoint, *params)) is not None:
+            logger.info(f"[无数据缓存] 命中 {_key(endpoint, *params)}，跳过上游请求")
+            return True
+        return False
+
+    async def remember(self, endpoint: str, *params: Any):
+        """记录该接口 + 参数没有数据"""
+        await tiered_cache.aset(NO_DATA_NAMESPACE, _key(endpoint, *params), True, self.ttl_seconds)
+        logger.info(f"[无数据缓存] 记录 {_key(endpoint, *params)}，{self.ttl_seconds} 秒内不再请求上游")
+
+    async def forget(self, endpoint: str, *params: Any):
+        """清除某个无数据记录"""
+        await tiered_cache.adelete(NO_DATA_NAMESPACE, _key(endpoint, *params))
+
+
+# 全局无数据缓存实例
+negative_cache = NegativeCache()
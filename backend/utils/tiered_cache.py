@@ -0,0 +1,273 @@
+"""
+两级缓存模块
+一级（L1）: 进程内 APICache，命中只需一次字典查找
+二级（L2）: 共享存储（默认 SQLite 的 cache_kv 表），同一主机的所有 worker 共享
+
+- 读: L1 -> L2（命中后回填 L1）-> 未命中由调用方取数后 set
+- 写: 同时写入 L2 和 L1（write-through）
+- 失效: 定期读取 L2 变更日志，让本进程 L1 中被其他进程改写/删除的键失效
+- 每个命名空间可配置默认 TTL 和 L1 TTL 上限
+"""
+import os
+import asyncio
+import threading
+import time
+import logging
+from typing import Any, Dict, Optional
+
+from db.async_db import async_db
+from db.kv_store import SQLiteKVStore, kv_store
+from utils.api_cache import APICache
+
+logger = logging.getLogger(__name__)
+
+# 命名空间默认配置（秒）: ttl 为默认缓存时间，l1_ttl 为进程内缓存时间上限（None 表示与 ttl 相同）
+CACHE_NAMESPACES: Dict[str, Dict[str, Optional[int]]] = {
+    'aktools': {'ttl': 300, 'l1_ttl': None},   # AKTools 透传接口响应
+}
+
+# 两次同步 L2 变更日志的最小间隔（秒）
+SYNC_INTERVAL_SECONDS = 1.0
+
+# 进程内 L1 缓存容量
+TIERED_CACHE_L1_MAX_ENTRIES = int(os.getenv('TIERED_CACHE_L1_MAX_ENTRIES', 5000))
+TIERED_CACHE_L1_MAX_BYTES = int(os.getenv('TIERED_CACHE_L1_MAX_BYTES', 256 * 1024 * 1024))
+
+
+class TieredCache:
+    """
+    进程内 L1 + 共享 L2 的两级缓存
+
+    L2 读写失败时只记录日志并退化为纯 L1 缓存，不影响业务请求
+    """
+
+    def __init__(self, store: SQLiteKVStore, l1: Optional[APICache] = None,
+                 sync_interval: float = SYNC_INTERVAL_SECONDS):
+        """
+        Args:
+            store: 共享存储，需提供 get/set/delete/changes_since/current_version
+            l1: 进程内缓存，默认新建 APICache
+            sync_interval: 同步变更日志的最小间隔（秒）
+        """
+        self.store = store
+        self.l1 = l1 or APICache()
+        self.namespaces: Dict[str, Dict[str, Optional[int]]] = dict(CACHE_NAMESPACES)
+        self.sync_interval = sync_interval
+        # 已同步到的 L2 版本号，None 表示尚未同步
+        self.version: Optional[int] = None
+        self.last_sync = 0.0
+        self.sync_lock = threading.Lock()
+        self.lock = threading.Lock()
+        self.stats = {
+            'l1_hits': 0,
+            'l2_hits': 0,
+            'misses': 0,
+            'writes': 0,
+            'invalidations': 0,
+            'l2_errors': 0
+        }
+
+    def register_namespace(self, namespace: str, ttl_seconds: int, l1_ttl_seconds: Optional[int] = None):
+        """
+        注册（或覆盖）命名空间配置
+
+        Args:
+            namespace: 命名空间
+            ttl_seconds: 默认缓存时间（秒）
+            l1_ttl_seconds: 进程内缓存时间上限（秒），None 表示与 ttl 相同
+        """
+        self.namespaces[namespace] = {'ttl': ttl_seconds, 'l1_ttl': l1_ttl_seconds}
+
+    def _config(self, namespace: str) -> Dict[str, Optional[int]]:
+        config = self.namespaces.get(namespace)
+        if config is None:
+            raise KeyError(f"未注册的缓存命名空间: {namespace}")
+        return config
+
+    def _l1_ttl(self, namespace: str, ttl_seconds: float) -> float:
+        l1_ttl = self._config(namespace)['l1_ttl']
+        return ttl_seconds if l1_ttl is None else min(ttl_seconds, l1_ttl)
+
+    def _count(self, field: str):
+        with self.lock:
+            self.stats[field] += 1
+
+    @staticmethod
+    def _l1_key(namespace: str, key: str) -> str:
+        return f"{namespace}:{key}"
+
+    def _sync_due(self) -> bool:
+        return time.monotonic() - self.last_sync >= self.sync_interval
+
+    def sync(self, force: bool = False):
+        """
+        读取 L2 变更日志，让 L1 中被改写或删除的键失效（同一时间只有一个线程同步）
+
+        Args:
+            force: 忽略同步间隔立即同步
+        """
+        if not force and not self._sync_due():
+            return
+        if not self.sync_lock.acquire(blocking=False):
+            return
+        try:
+            if self.version is None:
+                # 首次同步: L1 为空，从当前版本开始跟踪
+                self.version = self.store.current_version()
+            else:
+                changes, self.version = self.store.changes_since(self.version)
+                for namespace, key, version in changes:
+                    self._invalidate(namespace, key, version)
+            self.last_sync = time.monotonic()
+        except Exception as e:
+            self._count('l2_errors')
+            logger.warning(f"[两级缓存] 同步变更日志失败: {e}")
+        finally:
+            self.sync_lock.release()
+
+    def _invalidate(self, namespace: str, key: Optional[str], version: int):
+        """按变更日志让 L1 失效；本进程自己写入的同版本或更新的条目保留"""
+        if key is None:
+            removed = self.l1.delete_prefix(f"{namespace}:")
+        else:
+            l1_key = self._l1_key(namespace, key)
+            cached = self.l1.peek(l1_key)
+            removed = int(cached is not None and cached[0] < version and self.l1.delete(l1_key))
+        if removed:
+            with self.lock:
+                self.stats['invalidations'] += removed
+            logger.debug(f"[两级缓存] L1 失效 {namespace}:{key or '*'} (版本 {version})")
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        """
+        读取缓存（L1 -> L2），L2 命中时回填 L1
+
+        Returns:
+            缓存的值，未命中返回 None
+        """
+        self._config(namespace)
+        self.sync()
+
+        l1_key = self._l1_key(namespace, key)
+        cached = self.l1.get(l1_key)
+        if cached is not None:
+            self._count('l1_hits')
+            return cached[1]
+
+        try:
+            row = self.store.get(namespace, key)
+        except Exception as e:
+            self._count('l2_errors')
+            logger.warning(f"[两级缓存] 读取共享缓存失败 {l1_key}: {e}")
+            row = None
+
+        if row is None:
+            self._count('misses')
+            return None
+
+        value, expires_at, version = row
+        remaining = expires_at - time.time()
+        if remaining > 0:
+            self.l1.set(l1_key, (version, value), self._l1_ttl(namespace, remaining))
+        self._count('l2_hits')
+        return value
+
+    def set(self, namespace: str, key: str, value: Any, ttl_seconds: Optional[float] = None):
+        """
+        写入缓存（同时写 L2 和 L1）
+
+        Args:
+            namespace: 命名空间
+            key: 缓存键
+            value: 值（需可 pickle）
+            ttl_seconds: 缓存时间（秒），默认使用命名空间配置
+        """
+        ttl = ttl_seconds if ttl_seconds is not None else self._config(namespace)['ttl']
+        l1_key = self._l1_key(namespace, key)
+        try:
+            version = self.store.set(namespace, key, value, ttl)
+        except Exception as e:
+            self._count('l2_errors')
+            logger.warning(f"[两级缓存] 写入共享缓存失败，仅缓存在本进程 {l1_key}: {e}")
+            version = 0
+        self.l1.set(l1_key, (version, value), self._l1_ttl(namespace, ttl))
+        self._count('writes')
+
+    def delete(self, namespace: str, key: Optional[str] = None):
+        """删除缓存，key 为 None 时删除整个命名空间（同时通知其他进程失效）"""
+        self._config(namespace)
+        try:
+            self.store.delete(namespace, key)
+        except Exception as e:
+            self._count('l2_errors')
+            logger.warning(f"[两级缓存] 删除共享缓存失败 {namespace}:{key or '*'}: {e}")
+        self._delete_l1(namespace, key)
+
+    def _delete_l1(self, namespace: str, key: Optional[str]):
+        """删除本进程 L1 中的条目，key 为 None 时删除整个命名空间"""
+        if key is None:
+            count = self.l1.delete_prefix(f"{namespace}:")
+            logger.info(f"[两级缓存] 已清空命名空间 {namespace}，本进程清除 {count} 项")
+        else:
+            self.l1.delete(self._l1_key(namespace, key))
+
+    async def aget(self, namespace: str, key: str) -> Optional[Any]:
+        """
+        异步读取缓存: 无需同步且 L1 命中时直接返回，否则在数据库读线程中执行 get
+        """
+        if not self._sync_due():
+            cached = self.l1.get(self._l1_key(namespace, key))
+            if cached is not None:
+                self._count('l1_hits')
+                return cached[1]
+        return await async_db.run(self.get, namespace, key)
+
+    async def aset(self, namespace: str, key: str, value: Any, ttl_seconds: Optional[float] = None):
+        """
+        异步写入缓存: 在默认线程池中序列化，直接等待单写线程的 Future，
+        不占用数据库读线程；写入完成后在事件循环中更新 L1
+        """
+        ttl = ttl_seconds if ttl_seconds is not None else self._config(namespace)['ttl']
+        l1_key = self._l1_key(namespace, key)
+        try:
+            payload = await asyncio.to_thread(self.store.serialize, value)
+            version = await asyncio.wrap_future(self.store.submit_set(namespace, key, payload, ttl))
+        except Exception as e:
+            self._count('l2_errors')
+            logger.warning(f"[两级缓存] 写入共享缓存失败，仅缓存在本进程 {l1_key}: {e}")
+            version = 0
+        self.l1.set(l1_key, (version, value), self._l1_ttl(namespace, ttl))
+        self._count('writes')
+
+    async def adelete(self, namespace: str, key: Optional[str] = None):
+        """异步删除缓存: 直接等待单写线程的 Future，不占用数据库读线程"""
+        self._config(namespace)
+        try:
+            await asyncio.wrap_future(self.store.submit_delete(namespace, key))
+        except Exception as e:
+            self._count('l2_errors')
+            logger.warning(f"[两级缓存] 删除共享缓存失败 {namespace}:{key or '*'}: {e}")
+        self._delete_l1(namespace, key)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取两级缓存统计信息"""
+        with self.lock:
+            stats = dict(self.stats)
+        try:
+            l2 = self.store.get_stats()
+        except Exception as e:
+            l2 = {'error': str(e)}
+        return {
+            **stats,
+            'version': self.version,
+            'namespaces': self.namespaces,
+            'l1': self.l1.get_stats(),
+            'l2': l2
+        }
+
+
+# 全局两级缓存实例
+tiered_cache = TieredCache(
+    kv_store,
+    l1=APICache(max_entries=TIERED_CACHE_L1_MAX_ENTRIES, max_bytes=TIERED_CACHE_L1_MAX_BYTES)
+)
@@ -0,0 +1,319 @@
+"""
+上游数据源执行层
+将阻塞的 AkShare 调用从事件循环中移出，按上游站点分配独立的有界线程池
+
+特性:
+- 每个上游站点（东方财富/雪球/新浪）独立线程池，互不拖累
+- 线程池大小可通过环境变量配置（如 UPSTREAM_POOL_SIZE_EASTMONEY=8）
+- 统计排队深度、排队等待时间和执行耗时，便于按实际负载调整池大小
+- 单飞（single-flight）合并：相同函数+参数的并发调用只发起一次上游请求
+"""
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# 各上游站点的默认线程池大小
+UPSTREAM_POOL_SIZES = {
+    'eastmoney': 8,   # 东方财富: 绝大多数 *_em 接口
+    'xueqiu': 4,      # 雪球: *_xq 接口
+    'sina': 2,        # 新浪: *_sina 接口
+    'default': 4,     # 其他无法识别站点的阻塞调用
+}
+
+# 按 AkShare 函数名后缀识别上游站点
+UPSTREAM_HOST_SUFFIXES = (
+    ('_em', 'eastmoney'),
+    ('_xq', 'xueqiu'),
+    ('_sina', 'sina'),
+)
+
+
+def resolve_host(func: Callable) -> str:
+    """
+    根据函数名推断上游站点
+
+    Args:
+        func: AkShare 函数（如 ak.fund_open_fund_rank_em）
+
+    Returns:
+        站点名称，无法识别时返回 'default'
+    """
+    name = getattr(func, '__name__', '')
+    for suffix, host in UPSTREAM_HOST_SUFFIXES:
+        if name.endswith(suffix):
+            return host
+    return 'default'
+
+
+def _pool_size(host: str) -> int:
+    """读取站点线程池大小（环境变量优先）"""
+    env_value = os.getenv(f'UPSTREAM_POOL_SIZE_{host.upper()}')
+    if env_value:
+        try:
+            return max(1, int(env_value))
+        except ValueError:
+            logger.warning(f"[上游执行] 无效的线程池大小配置 {host}={env_value}，使用默认值")
+    return UPSTREAM_POOL_SIZES.get(host, UPSTREAM_POOL_SIZES['default'])
+
+
+class _HostPool:
+    """单个上游站点的线程池及其统计信息"""
+
+    def __init__(self, host: str, max_workers: int):
+        self.host = host
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix=f'upstream-{host}'
+        )
+        self.lock = threading.Lock()
+        self.stats = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'queued': 0,          # 已提交但尚未开始执行
+            'running': 0,         # 正在执行
+            'max_queued': 0,
+            'total_wait': 0.0,    # 累计排队等待时间（秒）
+            'max_wait': 0.0,
+            'total_run': 0.0,     # 累计执行时间（秒）
+            'max_run': 0.0,
+        }
+
+    def submit(self, func: Callable, args: tuple, kwargs: Dict[str, Any]) -> Future:
+        """提交任务，记录排队与执行耗时"""
+        submitted_at = time.monotonic()
+
+        with self.lock:
+            self.stats['submitted'] += 1
+            self.stats['queued'] += 1
+            self.stats['max_queued'] = max(self.stats['max_queued'], self.stats['queued'])
+
+        def task():
+            started_at = time.monotonic()
+            wait = started_at - submitted_at
+            with self.lock:
+                self.stats['queued'] -= 1
+                self.stats['running'] += 1
+                self.stats['total_wait'] += wait
+                self.stats['max_wait'] = max(self.stats['max_wait'], wait)
+
+            failed = False
+            try:
+                return func(*args, **kwargs)
+            except BaseException:
+                failed = True
+                raise
+            finally:
+                elapsed = time.monotonic() - started_at
+                with self.lock:
+                    self.stats['running'] -= 1
+                    self.stats['failed' if failed else 'completed'] += 1
+                    self.stats['total_run'] += elapsed
+                    self.stats['max_run'] = max(self.stats['max_run'], elapsed)
+
+        return self.executor.submit(task)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取线程池统计信息"""
+        with self.lock:
+            started = self.stats['submitted'] - self.stats['queued']
+            finished = self.stats['completed'] + self.stats['failed']
+            return {
+                'max_workers': self.max_workers,
+                'queue_depth': self.stats['queued'],
+                'running': self.stats['running'],
+                'max_queue_depth': self.stats['max_queued'],
+                'submitted': self.stats['submitted'],
+                'completed': self.stats['completed'],
+                'failed': self.stats['failed'],
+                'avg_wait_ms': round(self.stats['total_wait'] / started * 1000, 2) if started else 0,
+                'max_wait_ms': round(self.stats['max_wait'] * 1000, 2),
+                'avg_run_ms': round(self.stats['total_run'] / finished * 1000, 2) if finished else 0,
+                'max_run_ms': round(self.stats['max_run'] * 1000, 2),
+            }
+
+
+def make_call_key(func: Callable, args: tuple, kwargs: Dict[str, Any]) -> Hashable:
+    """
+    生成上游调用的合并键（函数 + 位置参数 + 关键字参数）
+
+    不可哈希的参数退化为 repr，保证任意参数都能生成键
+    """
+    func_name = f"{getattr(func, '__module__', '')}.{getattr(func, '__qualname__', repr(func))}"
+    key = (func_name, args, tuple(sorted(kwargs.items())))
+    try:
+        hash(key)
+        return key
+    except TypeError:
+        return repr(key)
+
+
+class SingleFlight:
+    """
+    单飞调用合并
+
+    同一个键同时只有一个调用在执行，其余调用方共享该调用的 Future；
+    调用完成后立即移除，下一次调用重新发起
+    """
+
+    def __init__(self):
+        self.calls: Dict[Hashable, Future] = {}
+        self.lock = threading.Lock()
+        self.stats = {
+            'leaders': 0,   # 实际发起的调用数
+            'shared': 0,    # 共享他人结果的调用数
+        }
+
+    def do(self, key: Hashable, submit: Callable[[], Future]) -> Future:
+        """
+        执行或加入一次调用
+
+        Args:
+            key: 合并键
+            submit: 没有进行中的调用时，用于发起调用的函数
+
+        Returns:
+            concurrent.futures.Future（所有调用方共享同一个）
+        """
+        with self.lock:
+            future = self.calls.get(key)
+            if future is not None:
+                self.stats['shared'] += 1
+                return future
+
+            future = submit()
+            self.calls[key] = future
+            self.stats['leaders'] += 1
+
+        future.add_done_callback(lambda f: self._forget(key, f))
+        return future
+
+    def _forget(self, key: Hashable, future: Future):
+        with self.lock:
+            if self.calls.get(key) is future:
+                del self.calls[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取合并统计信息"""
+        with self.lock:
+            return {
+                'in_flight': len(self.calls),
+                'leaders': self.stats['leaders'],
+                'shared': self.stats['shared'],
+            }
+
+
+class UpstreamExecutor:
+    """
+    上游调用执行器
+
+    按站点懒加载线程池，对外提供同步 submit 和异步 run 两种调用方式
+    """
+
+    def __init__(self):
+        self.pools: Dict[str, _HostPool] = {}
+        self.lock = threading.Lock()
+        self.single_flight = SingleFlight()
+
+    def _get_pool(self, host: str) -> _HostPool:
+        with self.lock:
+            pool = self.pools.get(host)
+            if pool is None:
+                pool = _HostPool(host, _pool_size(host))
+                self.pools[host] = pool
+                logger.info(f"[上游执行] 已创建线程池: host={host}, 大小={pool.max_workers}")
+            return pool
+
+    def submit(self, func: Callable, *args, host: Optional[str] = None, **kwargs) -> Future:
+        """
+        提交阻塞调用到对应站点的线程池
+
+        Args:
+            func: 阻塞函数
+            host: 上游站点，默认根据函数名推断
+
+        Returns:
+            concurrent.futures.Future
+        """
+        return self._get_pool(host or resolve_host(func)).submit(func, args, kwargs)
+
+    async def run(self, func: Callable, *args, host: Optional[str] = None, **kwargs) -> Any:
+        """在对应站点线程池中执行阻塞调用并等待结果（不阻塞事件循环）"""
+        return await asyncio.wrap_future(self.submit(func, *args, host=host, **kwargs))
+
+    def submit_shared(self, func: Callable, *args, host: Optional[str] = None, **kwargs) -> Future:
+        """
+        以单飞方式提交调用：相同函数和参数的进行中调用会被复用
+
+        注意：所有调用方拿到的是同一个结果对象，需要修改时请先 copy()
+        """
+        key = make_call_key(func, args, kwargs)
+        return self.single_flight.do(
+            key,
+            lambda: self.submit(func, *args, host=host, **kwargs)
+        )
+
+    async def run_shared(self, func: Callable, *args, host: Optional[str] = None, **kwargs) -> Any:
+        """异步等待单飞调用结果"""
+        future = self.submit_shared(func, *args, host=host, **kwargs)
+        # shield: 单个等待方被取消时不能取消其他调用方共享的 Future
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取所有站点线程池统计信息"""
+        with self.lock:
+            pools = dict(self.pools)
+        stats = {host: pool.get_stats() for host, pool in pools.items()}
+        stats['single_flight'] = self.single_flight.get_stats()
+        return stats
+
+    def shutdown(self, wait: bool = False):
+        """关闭所有线程池"""
+        with self.lock:
+            pools = list(self.pools.values())
+            self.pools.clear()
+        for pool in pools:
+            pool.executor.shutdown(wait=wait, cancel_futures=True)
+        logger.info(f"[上游执行] 已关闭 {len(pools)} 个线程池")
+
+
+# 全局上游执行器实例
+upstream_executor = UpstreamExecutor()
+
+
+async def run_upstream(func: Callable, *args, **kwargs) -> Any:
+    """
+    在上游线程池中执行 AkShare 调用
+
+    Usage:
+        df = await run_upstream(ak.fund_open_fund_rank_em, symbol="全部")
+    """
+    return await upstream_executor.run(func, *args, **kwargs)
+
+
+async def run_upstream_shared(func: Callable, *args, **kwargs) -> Any:
+    """
+    单飞方式执行 AkShare 调用，并发的相同调用只请求一次上游
+
+    Usage:
+        df = await run_upstream_shared(ak.fund_open_fund_rank_em, symbol="全部")
+    """
+    return await upstream_executor.run_shared(func, *args, **kwargs)
+
+
+async def run_blocking(func: Callable, *args, **kwargs) -> Any:
+    """在默认线程池中执行其他阻塞操作（如组合了上游调用与数据库写入的函数）"""
+    return await upstream_executor.run(func, *args, host='default', **kwargs)
+
+
+def get_upstream_stats() -> Dict[str, Any]:
+    """获取上游线程池统计信息"""
+    return upstream_executor.get_stats()
@@ -2,10 +2,14 @@ import axios from 'axios'
 import type {
   FundInfo,
   FundDailyData,
+  FundDailyNavQuery,
+  FundDailyNavResponse,
   FundRankData,
   FundHistData,
   FundOverview,
   FundHolding,
+  FundBasicInfo,
+  FundBasicInfoResponse,
   FundBasicInfoXQ,
   FundAnalysisXQ,
   IndustryAllocation,
@@ -102,6 +106,27 @@ export const getFundDailyData = () => {
   )
 }
 
+/**
+ * 分页查询开放式基金每日净值（后端数据库分页，可按基金代码精确查询）
+ * 缓存 5 分钟（后端每小时同步一次）
+ */
+export const getFundDailyNav = (params: FundDailyNavQuery = {}) => {
+  const cacheKey = `fund_daily_nav_${JSON.stringify(params)}`
+
+  // 使用 axios 创建一个临时实例，baseURL 为相对路径
+  const customRequest = axios.create({
+    baseURL: '/',
+    timeout: 30000
+  })
+
+  return apiCache.wrap(
+    cacheKey,
+    () => customRequest.get<FundDailyNavResponse>('/api/fund_open_fund_daily_em', { params })
+      .then(res => res.data),
+    5 * 60 * 1000 // 5 分钟
+  )
+}
+
 /**
  * 获取基金排行榜
  * @param symbol 基金类型：全部、股票型、混合型、债券型、指数型、QDII、LOF、FOF
@@ -219,19 +244,43 @@ export const getFundDividend = (symbol: string) => {
   )
 }
 
+// 基金基本信息字段 -> 雪球信息项名称（页面按雪球的 item 名称展示）
+const BASIC_INFO_XQ_ITEMS: [keyof FundBasicInfo, string][] = [
+  ['基金代码', '基金代码'],
+  ['基金简称', '基金名称'],
+  ['基金全称', '基金全称'],
+  ['成立日期', '成立时间'],
+  ['最新规模', '最新规模'],
+  ['基金公司', '基金公司'],
+  ['基金经理', '基金经理'],
+  ['托管银行', '托管银行'],
+  ['基金类型', '基金类型'],
+  ['投资策略', '投资策略'],
+  ['投资目标', '投资目标'],
+  ['业绩比较基准', '业绩比较基准']
+]
+
 /**
- * 雪球 - 获取基金基本信息（基金经理、公司、规模）
+ * 获取基金基本信息（基金经理、公司、规模），返回雪球格式的 item/value 列表
+ * 读取后端基本信息缓存，后端定时刷新过期条目
  * @param symbol 基金代码
  * 缓存 30 分钟（基本信息变化不频繁）
  */
 export const getFundBasicInfoXQ = (symbol: string) => {
   const cacheKey = `fund_basic_info_xq_${symbol}`
 
+  // 使用 axios 创建一个临时实例，baseURL 为相对路径
+  const customRequest = axios.create({
+    baseURL: '/',
+    timeout: 30000
+  })
+
   return apiCache.wrap(
     cacheKey,
-    () => request.get<any, FundBasicInfoXQ>('/fund_individual_basic_info_xq', {
-      params: { symbol }
-    }),
+    () => customRequest.get<FundBasicInfoResponse>(`/api/fund_basic_info/${symbol}`)
+      .then(res => BASIC_INFO_XQ_ITEMS
+        .filter(([field]) => res.data.data[field])
+        .map(([field, item]): FundBasicInfoXQ => ({ item, value: String(res.data.data[field]) }))),
     30 * 60 * 1000 // 30 分钟
   )
 }
@@ -23,6 +23,44 @@ export interface FundDailyData {
   [key: string]: any
 }
 
+// 开放式基金每日净值（后端分页接口 /api/fund_open_fund_daily_em）
+export interface FundDailyNav {
+  基金代码: string
+  基金简称: string
+  净值日期: string | null
+  单位净值: number | null
+  累计净值: number | null
+  前一净值日期: string | null
+  前一单位净值: number | null
+  前一累计净值: number | null
+  日增长值?: string
+  日增长率?: string
+  申购状态?: string
+  赎回状态?: string
+  手续费?: string
+}
+
+export interface FundDailyNavQuery {
+  fund_code?: string
+  keyword?: string
+  purchase_status?: string
+  sort_by?: '基金代码' | '单位净值' | '累计净值' | '日增长率' | '日增长值'
+  order?: 'asc' | 'desc'
+  page?: number
+  page_size?: number
+}
+
+export interface FundDailyNavResponse {
+  success: boolean
+  data: FundDailyNav[]
+  total: number
+  page: number
+  page_size: number
+  source: string
+  last_update?: string | null
+  error?: string
+}
+
 // 基金排行数据
 export interface FundRankData {
   序号?: number
@@ -100,6 +138,36 @@ export interface FundBasicInfoXQ {
   value: string  // 信息项值
 }
 
+// 基金基本信息（后端 fund_basic_info_cache，合并东方财富与雪球数据）
+export interface FundBasicInfo {
+  基金代码: string
+  基金简称?: string | null
+  基金全称?: string | null
+  基金类型?: string | null
+  基金公司?: string | null
+  基金经理?: string | null
+  成立日期?: string | null
+  最新规模?: string | null
+  托管银行?: string | null
+  业绩比较基准?: string | null
+  投资目标?: string | null
+  投资策略?: string | null
+  管理费率?: string | null
+  托管费率?: string | null
+  销售服务费率?: string | null
+  最高申购费率?: string | null
+  最高赎回费率?: string | null
+  跟踪标的?: string | null
+  更新时间?: string
+}
+
+export interface FundBasicInfoResponse {
+  success: boolean
+  data: FundBasicInfo
+  stale: boolean  // 缓存已过期（后台会刷新）
+  source: 'cache' | 'upstream'
+}
+
 // 雪球 - 基金分析数据（风险指标）
 export interface FundAnalysisXQ {
   周期?: string                // 如：近1年、近3年、近5年